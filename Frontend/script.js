@@ -26,93 +26,75 @@ function confirmDelete(message) {
     return confirm(message || 'Confirm deletion? This action cannot be undone.');
 }
 
-// Clean Table Search
-function searchTable(inputId, tableId) {
-    const input = document.getElementById(inputId);
-    const table = document.getElementById(tableId);
-    
-    if (!input || !table) return;
+// Keyset-paginated lists: search, sort and "Load more" ask the server for rows
+// (?partial=1 returns the rendered rows, X-Next-Cursor the cursor of the next page)
+function initKeysetList(options) {
+    const container = document.getElementById(options.containerId);
+    const moreButton = document.getElementById(options.moreButtonId);
+    const searchInput = options.searchId ? document.getElementById(options.searchId) : null;
+    const sortSelect = options.sortId ? document.getElementById(options.sortId) : null;
+    const list = options.listId ? document.getElementById(options.listId) : null;
+    const noResults = options.noResultsId ? document.getElementById(options.noResultsId) : null;
 
-    input.addEventListener('keyup', function() {
-        const filter = input.value.toUpperCase();
-        const rows = table.getElementsByTagName('tr');
-        
-        // Loop through all table rows, hide those who don't match the search query
-        for (let i = 1; i < rows.length; i++) {
-            const row = rows[i];
-            const cells = row.getElementsByTagName('td');
-            let found = false;
-            
-            for (let j = 0; j < cells.length; j++) {
-                const cell = cells[j];
-                if (cell) {
-                    const textValue = cell.textContent || cell.innerText;
-                    if (textValue.toUpperCase().indexOf(filter) > -1) {
-                        found = true;
-                        break;
-                    }
-                }
-            }
-            
-            // Simple display toggle, no animation
-            row.style.display = found ? '' : 'none';
-        }
-    });
-}
+    if (!container || !moreButton) return;
 
-// Table Sorting (Functional, no visual animation)
-function sortTable(tableId, columnIndex) {
-    const table = document.getElementById(tableId);
-    if (!table) return;
-    
-    const tbody = table.querySelector('tbody') || table;
-    const rows = Array.from(tbody.rows);
-    const currentOrder = table.dataset.sortOrder || 'none';
-    const currentColumn = parseInt(table.dataset.sortColumn || -1);
-    
-    let newOrder;
-    if (currentColumn !== columnIndex) {
-        newOrder = 'asc';
-    } else {
-        newOrder = currentOrder === 'asc' ? 'desc' : 'asc';
-    }
-    
-    rows.sort((a, b) => {
-        const aValue = a.cells[columnIndex].textContent.trim();
-        const bValue = b.cells[columnIndex].textContent.trim();
-        
-        const aNum = parseFloat(aValue);
-        const bNum = parseFloat(bValue);
-        
-        if (!isNaN(aNum) && !isNaN(bNum)) {
-            return newOrder === 'asc' ? aNum - bNum : bNum - aNum;
+    let nextCursor = container.dataset.nextCursor || '';
+    let latestRequest = 0;
+    let searchTimer = null;
+
+    function query(cursor) {
+        const params = new URLSearchParams({ partial: '1' });
+        const search = searchInput ? searchInput.value.trim() : '';
+        if (search) params.set('q', search);
+        if (sortSelect) {
+            const [sort, order] = sortSelect.value.split(':');
+            params.set('sort', sort);
+            params.set('order', order);
         }
-        
-        return newOrder === 'asc' 
-            ? aValue.localeCompare(bValue, undefined, { numeric: true, sensitivity: 'base' })
-            : bValue.localeCompare(aValue, undefined, { numeric: true, sensitivity: 'base' });
-    });
-    
-    rows.forEach(row => tbody.appendChild(row));
-    
-    table.dataset.sortOrder = newOrder;
-    table.dataset.sortColumn = columnIndex;
-    
-    updateSortIndicators(table, columnIndex, newOrder);
-}
+        if (cursor) params.set('cursor', cursor);
+        return params;
+    }
+
+    async function load(reset) {
+        // Only the newest request may update the list (typing fires several)
+        const requestId = ++latestRequest;
+        moreButton.disabled = true;
+        try {
+            const response = await fetch(`${options.url}?${query(reset ? '' : nextCursor)}`);
+            if (requestId !== latestRequest) return;
+            if (!response.ok) {
+                showToast(await response.text());
+                return;
+            }
+            const html = await response.text();
+            if (reset) {
+                container.innerHTML = html;
+            } else {
+                container.insertAdjacentHTML('beforeend', html);
+            }
+            nextCursor = response.headers.get('X-Next-Cursor') || '';
+            moreButton.style.display = nextCursor ? '' : 'none';
 
-function updateSortIndicators(table, activeColumn, order) {
-    const headers = table.querySelectorAll('th');
-    headers.forEach((header, index) => {
-        const existingIcon = header.querySelector('.sort-icon');
-        if (existingIcon) existingIcon.remove();
-        
-        if (index === activeColumn) {
-            const icon = document.createElement('i');
-            icon.className = `bi bi-chevron-${order === 'asc' ? 'up' : 'down'} ms-1 sort-icon small text-muted`;
-            header.appendChild(icon);
+            const empty = container.children.length === 0;
+            if (list) list.style.display = empty ? 'none' : (options.listDisplay || 'block');
+            if (noResults) noResults.style.display = empty ? 'block' : 'none';
+        } catch (err) {
+            console.error('Failed to load page', err);
+        } finally {
+            if (requestId === latestRequest) moreButton.disabled = false;
         }
-    });
+    }
+
+    moreButton.addEventListener('click', () => load(false));
+    if (searchInput) {
+        searchInput.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => load(true), 250);
+        });
+    }
+    if (sortSelect) {
+        sortSelect.addEventListener('change', () => load(true));
+    }
 }
 
 function copyToClipboard(text) {
@@ -19,14 +19,19 @@ CREATE TABLE team_members (
     phone_no VARCHAR(15) UNIQUE NOT NULL,
     role_id INT,
     FOREIGN KEY (role_id) REFERENCES roles(role_id) ON DELETE SET NULL,
-    INDEX (email)
+    INDEX (email),
+    -- Keyset pagination / prefix search on the members list (InnoDB appends mem_id)
+    INDEX idx_members_name (first_name, last_name),
+    INDEX idx_members_last_name (last_name)
 );
 
 -- Skills Table
 CREATE TABLE skills (
     skill_id INT AUTO_INCREMENT PRIMARY KEY,
     skill_name VARCHAR(50) UNIQUE NOT NULL,
-    category ENUM('Technical', 'Clinical', 'Soft Skill', 'Regulatory') NOT NULL
+    category ENUM('Technical', 'Clinical', 'Soft Skill', 'Regulatory') NOT NULL,
+    -- Default skills list order: category, then name
+    INDEX idx_skills_category_name (category, skill_name)
 );
 
 -- Role Requirements (Scale 1-3)
@@ -47,19 +52,37 @@ CREATE TABLE mem_skills (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     PRIMARY KEY (mem_id, skill_id),
     FOREIGN KEY (mem_id) REFERENCES team_members(mem_id) ON DELETE CASCADE,
-    FOREIGN KEY (skill_id) REFERENCES skills(skill_id) ON DELETE CASCADE
+    FOREIGN KEY (skill_id) REFERENCES skills(skill_id) ON DELETE CASCADE,
+    -- Covers the per-skill member count / average proficiency on the skills list
+    INDEX idx_memskills_skill_level (skill_id, proficiency_level)
 );
 
 -- Audit Logs
 CREATE TABLE audit_logs (
-    log_id INT AUTO_INCREMENT PRIMARY KEY,
+    log_id INT AUTO_INCREMENT,
     table_name VARCHAR(50) NOT NULL,
     operation_type VARCHAR(20) NOT NULL,
     record_id VARCHAR(50),
     old_value TEXT,
     new_value TEXT,
     changed_by VARCHAR(50),
-    change_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    change_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    -- Every unique key of a partitioned table must contain the partitioning column
+    PRIMARY KEY (log_id, change_date),
+    -- Audit browser: newest first, optionally filtered by table / operation / record
+    -- (InnoDB appends log_id, so every index ends in the (change_date, log_id) seek key)
+    INDEX idx_audit_date (change_date),
+    INDEX idx_audit_table_date (table_name, change_date),
+    INDEX idx_audit_table_op_date (table_name, operation_type, change_date),
+    INDEX idx_audit_op_date (operation_type, change_date),
+    INDEX idx_audit_record_date (record_id, change_date)
+)
+-- Monthly partitions on UTC month boundaries (epoch seconds; 1767225600 = 2026-01-01).
+-- `flask audit-archive` splits p_future into the coming months and moves months older
+-- than AUDIT_HOT_MONTHS to compressed segment files before dropping their partitions.
+PARTITION BY RANGE (UNIX_TIMESTAMP(change_date)) (
+    PARTITION p_start VALUES LESS THAN (1767225600),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
 );
 
 INSERT INTO roles (role_name, description) VALUES 
@@ -1,4 +1,4 @@
--- TRIGGERS (9) --
+-- TRIGGERS (16) --
 
 DELIMITER //
 
@@ -161,6 +161,48 @@ END //
 
 DELIMITER ;
 
+DELIMITER //
+-- INSERT ROLE REQUIREMENT
+CREATE TRIGGER after_rolereq_insert
+AFTER INSERT ON role_requirements
+FOR EACH ROW
+BEGIN
+    INSERT INTO audit_logs (table_name, operation_type, record_id, old_value, new_value, changed_by)
+    VALUES ('role_requirements', 'INSERT', CONCAT(NEW.role_id, '-', NEW.skill_id), 
+            NULL, 
+            CONCAT('Min Proficiency: ', NEW.min_proficiency_required), USER());
+END //
+DELIMITER ;
+
+DELIMITER //
+-- UPDATE ROLE REQUIREMENT
+CREATE TRIGGER after_rolereq_update
+AFTER UPDATE ON role_requirements
+FOR EACH ROW
+BEGIN
+    -- Only log if the level actually changed
+    IF OLD.min_proficiency_required <> NEW.min_proficiency_required THEN
+        INSERT INTO audit_logs (table_name, operation_type, record_id, old_value, new_value, changed_by)
+        VALUES ('role_requirements', 'UPDATE', CONCAT(NEW.role_id, '-', NEW.skill_id), 
+                CONCAT('Min Proficiency: ', OLD.min_proficiency_required), 
+                CONCAT('Min Proficiency: ', NEW.min_proficiency_required), USER());
+    END IF;
+END //
+DELIMITER ;
+
+DELIMITER //
+-- DELETE ROLE REQUIREMENT
+CREATE TRIGGER after_rolereq_delete
+AFTER DELETE ON role_requirements
+FOR EACH ROW
+BEGIN
+    INSERT INTO audit_logs (table_name, operation_type, record_id, old_value, new_value, changed_by)
+    VALUES ('role_requirements', 'DELETE', CONCAT(OLD.role_id, '-', OLD.skill_id), 
+            CONCAT('Min Proficiency: ', OLD.min_proficiency_required), NULL, USER());
+END //
+
+DELIMITER ;
+
 DELIMITER //
 
 CREATE TRIGGER validate_role_eligibility
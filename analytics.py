@@ -0,0 +1,321 @@
+"""Vectorised analytics behind the /reports page.
+
+reports() used to walk Python dicts for every member x requirement x skill.
+Here the raw rows are loaded once into dense NumPy arrays:
+
+- ``levels``: member x skill proficiency matrix (uint8, 0 = skill not held)
+- role requirements: per role, the required skill columns and minimum levels
+
+and every section of the report (risks, categories, role health, heatmap,
+top skills, member stats) is computed with array operations on them.
+"""
+import numpy as np
+
+CATEGORIES = ['Technical', 'Clinical', 'Regulatory', 'Soft Skill']
+
+# Reductions over the full matrix are done in row blocks to keep temporaries small
+ROW_BLOCK = 4096
+
+
+def format_full_name(member):
+    """Display name used across the reports page"""
+    return f"{member['first_name']} {member.get('middle_name', '') or ''} {member['last_name']}".replace('  ', ' ')
+
+
+def _positions(ids, values):
+    """Index of each value in ``ids`` (-1 when absent), via a sorted lookup"""
+    ids = np.asarray(ids, dtype=np.int64)
+    if not len(ids) or not len(values):
+        return np.full(len(values), -1, dtype=np.intp)
+    order = np.argsort(ids, kind='stable')
+    pos = np.searchsorted(ids[order], values)
+    pos[pos >= len(ids)] = 0
+    found = ids[order][pos] == values
+    return np.where(found, order[pos], -1)
+
+
+class SkillMatrix:
+    """Dense member x skill proficiency matrix plus role requirement vectors"""
+
+    def __init__(self, members, skills, assignments, role_requirements):
+        self.members = members
+        self.skills = skills
+
+        self.member_ids = [m['mem_id'] for m in members]
+        self.member_index = {mid: i for i, mid in enumerate(self.member_ids)}
+        self.skill_ids = [s['skill_id'] for s in skills]
+        self.skill_index = {sid: j for j, sid in enumerate(self.skill_ids)}
+        self.skill_names = [s['skill_name'] for s in skills]
+
+        category_codes = {cat: code for code, cat in enumerate(CATEGORIES)}
+        self.skill_category = np.array(
+            [category_codes.get(s['category'], -1) for s in skills], dtype=np.int8
+        )
+
+        self.levels = np.zeros((len(members), len(skills)), dtype=np.uint8)
+        n = len(assignments)
+        rows = _positions(self.member_ids, np.fromiter((a['mem_id'] for a in assignments), np.int64, n))
+        cols = _positions(self.skill_ids, np.fromiter((a['skill_id'] for a in assignments), np.int64, n))
+        vals = np.fromiter((a['proficiency_level'] for a in assignments), np.uint8, n)
+        valid = (rows >= 0) & (cols >= 0)
+        self.levels[rows[valid], cols[valid]] = vals[valid]
+
+        # role_id -> (required column indices, minimum levels, requirement dicts)
+        self.role_requirements = {}
+        for req in role_requirements:
+            j = self.skill_index.get(req['skill_id'])
+            if j is None:
+                continue
+            cols, mins, req_list = self.role_requirements.setdefault(req['role_id'], ([], [], []))
+            cols.append(j)
+            mins.append(req['min_proficiency_required'])
+            req_list.append({
+                'skill_id': req['skill_id'],
+                'name': req['skill_name'],
+                'cat': req['category'],
+                'min_lvl': req['min_proficiency_required']
+            })
+        self.role_vectors = {
+            role_id: (np.array(cols, dtype=np.intp), np.array(mins, dtype=np.uint8))
+            for role_id, (cols, mins, _) in self.role_requirements.items()
+        }
+
+        self.member_roles = np.array(
+            [m['role_id'] or 0 for m in members], dtype=np.int64
+        )
+
+        self._reduce()
+
+    def _reduce(self):
+        """Per-member and per-skill aggregates shared by several report sections"""
+        n_members, n_skills = self.levels.shape
+        n_cats = len(CATEGORIES)
+
+        self.member_skill_count = np.zeros(n_members, dtype=np.int32)
+        self.member_level_total = np.zeros(n_members, dtype=np.int32)
+        self.member_cat_count = np.zeros((n_members, n_cats), dtype=np.int32)
+        self.member_cat_total = np.zeros((n_members, n_cats), dtype=np.int32)
+        self.skill_holder_count = np.zeros(n_skills, dtype=np.int64)
+        self.skill_level_total = np.zeros(n_skills, dtype=np.int64)
+        self.skill_level_counts = np.zeros((n_skills, 4), dtype=np.int64)
+
+        # One-hot skill -> category map so per-category sums become a matmul
+        # (float32 keeps it on BLAS; the sums stay far below 2**24 so they are exact)
+        onehot = np.zeros((n_skills, n_cats), dtype=np.float32)
+        known = self.skill_category >= 0
+        onehot[np.flatnonzero(known), self.skill_category[known]] = 1
+
+        for start in range(0, n_members, ROW_BLOCK):
+            block = self.levels[start:start + ROW_BLOCK]
+            held = block > 0
+            as_float = block.astype(np.float32)
+
+            self.member_skill_count[start:start + ROW_BLOCK] = held.sum(axis=1)
+            self.member_level_total[start:start + ROW_BLOCK] = block.sum(axis=1, dtype=np.int32)
+            self.member_cat_count[start:start + ROW_BLOCK] = held.astype(np.float32) @ onehot
+            self.member_cat_total[start:start + ROW_BLOCK] = as_float @ onehot
+            self.skill_holder_count += held.sum(axis=0)
+            self.skill_level_total += block.sum(axis=0, dtype=np.int64)
+            for level in (1, 2, 3):
+                self.skill_level_counts[:, level] += (block == level).sum(axis=0)
+
+    def holders(self, j):
+        return np.flatnonzero(self.levels[:, j])
+
+    def compliance(self, role_id, member_rows):
+        """Boolean (members x requirements) matrix of requirements met"""
+        cols, mins = self.role_vectors.get(
+            role_id, (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.uint8))
+        )
+        return self.levels[np.ix_(member_rows, cols)] >= mins, cols
+
+
+def build_reports_payload(members, skills, assignments, role_requirements,
+                          heatmap_size=15, top_skills_size=10):
+    """Compute every template variable of reports.html from the raw rows
+
+    ``members`` need mem_id, first/middle/last_name, role_id and role_name;
+    ``assignments`` need mem_id, skill_id and proficiency_level; role
+    requirement rows need role_id, skill_id, min_proficiency_required,
+    skill_name and category.
+    """
+    matrix = SkillMatrix(members, skills, assignments, role_requirements)
+    names = [format_full_name(m) for m in members]
+    role_labels = [m['role_name'] or 'Unassigned' for m in members]
+
+    # === 1. RISK REPORT (Bus Factor Analysis) ===
+    risk_report = []
+    for j in np.flatnonzero(matrix.skill_holder_count < 2):
+        skill = skills[j]
+        holders = [names[i] for i in matrix.holders(j)]
+        risk_report.append({
+            'category': skill['category'],
+            'skill_name': skill['skill_name'],
+            'skill_id': skill['skill_id'],
+            'count': len(holders),
+            'holders': holders
+        })
+
+    # === 2. CATEGORY BREAKDOWN ===
+    category_data = {}
+    for code, cat in enumerate(CATEGORIES):
+        cols = matrix.skill_category == code
+        counts = matrix.member_cat_count[:, code]
+        experts = np.flatnonzero(counts)
+        avgs = np.round(matrix.member_cat_total[experts, code] / counts[experts], 1)
+        top = experts[np.argsort(-avgs, kind='stable')[:5]] if len(experts) else experts
+        level_totals = matrix.skill_level_counts[cols].sum(axis=0)
+
+        category_data[cat] = {
+            'skills': [s for s, keep in zip(skills, cols) if keep],
+            'member_count': int(len(experts)),
+            'levels': {level: int(level_totals[level]) for level in (1, 2, 3)},
+            'total_count': int(counts.sum()),
+            'top_experts': [
+                {
+                    'name': names[i],
+                    'avg': round(float(matrix.member_cat_total[i, code] / counts[i]), 1),
+                    'skills': int(counts[i])
+                }
+                for i in top
+            ]
+        }
+
+    # === 3. ROLE HEALTH ANALYSIS ===
+    roles_data = {}
+    role_order = []
+    seen = set()
+    for m in members:
+        if m['role_id'] and m['role_id'] not in seen:
+            seen.add(m['role_id'])
+            role_order.append(m)
+
+    for first in role_order:
+        role_id = first['role_id']
+        rows = np.flatnonzero(matrix.member_roles == role_id)
+        met, cols = matrix.compliance(role_id, rows)
+        total_req = len(cols)
+        if total_req:
+            pct = np.rint(met.sum(axis=1) / total_req * 100).astype(int)
+        else:
+            pct = np.full(len(rows), 100)
+
+        # Missing skill names for every member of the role in one pass:
+        # nonzero() is row-major, so splitting at the per-row counts groups them by member
+        miss_rows, miss_cols = np.nonzero(~met)
+        miss_names = np.array(matrix.skill_names, dtype=object)[cols][miss_cols]
+        missing = np.split(miss_names, np.cumsum(np.bincount(miss_rows, minlength=len(rows)))[:-1])
+
+        role_members = [
+            {
+                'mem_id': matrix.member_ids[i],
+                'full_name': names[i],
+                'match_pct': int(pct[k]),
+                'missing': missing[k].tolist()
+            }
+            for k, i in enumerate(rows)
+        ]
+
+        roles_data[role_id] = {
+            'name': first['role_name'],
+            'members': role_members,
+            'requirements': matrix.role_requirements.get(role_id, ([], [], []))[2]
+        }
+
+    # === 4. HEATMAP (Members vs most common skills) ===
+    ranked = sorted(
+        range(len(skills)),
+        key=lambda j: (-matrix.skill_holder_count[j], skills[j]['skill_name'].casefold())
+    )
+    heatmap_cols = ranked[:heatmap_size]
+    heatmap_skills = [
+        {
+            'skill_id': skills[j]['skill_id'],
+            'skill_name': skills[j]['skill_name'],
+            'category': skills[j]['category'],
+            'member_count': int(matrix.skill_holder_count[j])
+        }
+        for j in heatmap_cols
+    ]
+    heatmap_ids = [s['skill_id'] for s in heatmap_skills]
+    heatmap_levels = matrix.levels[:, heatmap_cols].tolist() if heatmap_cols else [[] for _ in members]
+    heatmap_data = [
+        {
+            'mem_id': matrix.member_ids[i],
+            'name': names[i],
+            'role': role_labels[i],
+            'skills': dict(zip(heatmap_ids, heatmap_levels[i]))
+        }
+        for i in range(len(members))
+    ]
+
+    # === 5. KPI CALCULATIONS ===
+    total_members_with_roles = int(np.count_nonzero(matrix.member_roles))
+    compliant_count = sum(
+        1 for r in roles_data.values() for m in r['members'] if m['match_pct'] >= 80
+    )
+    compliance_rate = round((compliant_count / total_members_with_roles * 100) if total_members_with_roles > 0 else 0)
+    critical_gaps = len([r for r in roles_data.values() if r['members'] and any(m['match_pct'] < 60 for m in r['members'])])
+
+    # === 6. CATEGORY STATS FOR CHARTS ===
+    category_stats = [
+        {
+            'category': cat,
+            'skill_count': len(data['skills']),
+            'members_with_skills': data['member_count'],
+            'level_1': data['levels'][1],
+            'level_2': data['levels'][2],
+            'level_3': data['levels'][3]
+        }
+        for cat, data in category_data.items()
+    ]
+
+    # === 7. TOP SKILLS ===
+    held = np.flatnonzero(matrix.skill_holder_count)
+    avg_prof = matrix.skill_level_total[held] / matrix.skill_holder_count[held]
+    order = np.lexsort((-avg_prof, -matrix.skill_holder_count[held]))[:top_skills_size]
+    top_skills = [
+        {
+            'skill_name': skills[held[k]]['skill_name'],
+            'category': skills[held[k]]['category'],
+            'member_count': int(matrix.skill_holder_count[held[k]]),
+            'avg_proficiency': float(avg_prof[k])
+        }
+        for k in order
+    ]
+
+    # === 8. MEMBER STATS ===
+    counts = matrix.member_skill_count
+    member_avgs = np.zeros(len(members))
+    nonzero = counts > 0
+    member_avgs[nonzero] = np.round(matrix.member_level_total[nonzero] / counts[nonzero], 1)
+    member_stats = [
+        {
+            'full_name': names[i],
+            'role': role_labels[i],
+            'skill_count': int(counts[i]),
+            'avg_proficiency': float(member_avgs[i]) if counts[i] else 0
+        }
+        for i in np.argsort(-counts, kind='stable')
+    ]
+
+    return {
+        # KPIs
+        'total_staff': len(members),
+        'compliance_rate': compliance_rate,
+        'critical_gaps': critical_gaps,
+        'skills_at_risk': len(risk_report),
+        'total_skills': len(skills),
+        'total_assignments': int(counts.sum()),
+        # Charts & Tables
+        'category_stats': category_stats,
+        'top_skills': top_skills,
+        'member_stats': member_stats,
+        # Drill-down data
+        'risk_report': risk_report,
+        'category_data': category_data,
+        'roles_data': roles_data,
+        # Heatmap
+        'heatmap_skills': heatmap_skills,
+        'heatmap_data': heatmap_data,
+    }
@@ -0,0 +1,610 @@
+"""In-process analytics state kept current from audit_logs deltas.
+
+Every write to team_members, skills, roles, mem_skills and role_requirements
+leaves an audit_logs row (see MySQL/Triggers & Procedures.sql). Instead of
+rescanning mem_skills, AnalyticsState loads everything once and then tails
+audit_logs by log_id, applying each row as a small delta:
+
+- mem_skills / role_requirements rows carry the new level in the log itself
+  ("Proficiency: 3", "Min Proficiency: 2") and are applied in O(1)
+- team_members / skills / roles rows are re-read by primary key, because the
+  log only has part of the row (no middle name, email, category ...)
+- deletes cascade in InnoDB without firing triggers, so deleting a member,
+  skill or role also drops its dependent rows here (O(k) in those rows)
+
+Listeners registered with subscribe() receive the same deltas, so other
+in-memory indexes can be kept current from a single tail. The tail also keeps
+a data version per table (the newest applied log_id and its change_date), which
+views expose as ETag / Last-Modified.
+
+Anything the tail can't account for (an id still missing after the gap
+timeout) triggers a full reload in the background, and a full reload also runs
+periodically, so a missed delta can't drift the state for the process lifetime.
+"""
+import re
+import threading
+import time
+from collections import deque
+
+CATEGORIES = ['Technical', 'Clinical', 'Regulatory', 'Soft Skill']
+# MySQL sorts the skills.category ENUM by declaration order
+CATEGORY_SORT = {'Technical': 0, 'Clinical': 1, 'Soft Skill': 2, 'Regulatory': 3}
+
+TABLES = ('team_members', 'skills', 'roles', 'mem_skills', 'role_requirements')
+# Rows that go with a deleted parent through FK cascades (or SET NULL) without a log row
+CASCADES = {
+    'team_members': ('mem_skills',),
+    'skills': ('mem_skills', 'role_requirements'),
+    'roles': ('role_requirements', 'team_members'),
+}
+
+RECONCILE_INTERVAL = 1800  # seconds between full reloads that catch anything the tail missed
+
+# Entity tables re-read by primary key when logged, in the order they are applied
+REFETCH = (
+    ('roles', 'role_id', 'role_id, role_name'),
+    ('skills', 'skill_id', 'skill_id, skill_name, category'),
+    ('team_members', 'mem_id', 'mem_id, first_name, middle_name, last_name, email, phone_no, role_id'),
+)
+
+COMPLIANT_PCT = 80
+CRITICAL_PCT = 60
+RECENT_LOGS = 10
+
+_LEVEL_RE = re.compile(r'(\d+)\s*$')
+
+
+def _level(value):
+    match = _LEVEL_RE.search(value or '')
+    return int(match.group(1)) if match else None
+
+
+def _pair(record_id):
+    left, _, right = (record_id or '').partition('-')
+    return int(left), int(right)
+
+
+class AuditTail:
+    """Reads audit_logs rows past the last applied log_id
+
+    AUTO_INCREMENT ids are handed out at insert time, not commit time, so a
+    slower transaction can commit a lower log_id after a higher one has been
+    read. Skipped ids are remembered and re-read for ``gap_timeout`` seconds;
+    read() reports the ones it gives up on, since only a full reload can tell
+    a rollback from a transaction that took longer still to commit.
+
+    read() doesn't move the tail, so it can run without a lock: it returns a
+    function that moves it, which refuses when another reader moved it first.
+    """
+
+    def __init__(self, batch_size=5000, gap_timeout=60):
+        self.batch_size = batch_size
+        self.gap_timeout = gap_timeout
+        self.last_id = 0
+        self.version = 0  # bumped whenever the tail moves
+        self._gaps = {}   # log_id -> time first noticed missing; replaced, never changed in place
+
+    def gaps(self):
+        return dict(self._gaps)
+
+    def reset(self, last_id, gaps=None):
+        self.last_id = last_id or 0
+        self._gaps = dict(gaps or {})
+        self.version += 1
+
+    def read(self, cursor):
+        """``(rows, more, expired, advance)``: the next batch, the gaps given up on,
+        and ``advance()`` to move past them (False when the batch is stale)"""
+        version, last_id, gaps = self.version, self.last_id, dict(self._gaps)
+        now = time.monotonic()
+        expired = sorted(log_id for log_id, seen in gaps.items() if now - seen > self.gap_timeout)
+        for log_id in expired:
+            del gaps[log_id]
+
+        fresh = []
+        if gaps:
+            ids = sorted(gaps)[:self.batch_size]
+            cursor.execute(f"""
+                SELECT * FROM audit_logs
+                WHERE log_id IN ({','.join(['%s'] * len(ids))})
+                ORDER BY log_id
+            """, ids)
+            for row in cursor.fetchall():
+                del gaps[row['log_id']]
+                fresh.append(row)
+
+        cursor.execute("""
+            SELECT * FROM audit_logs
+            WHERE log_id > %s
+            ORDER BY log_id
+            LIMIT %s
+        """, (last_id, self.batch_size))
+        rows = cursor.fetchall()
+
+        for row in rows:
+            log_id = row['log_id']
+            for missing in range(last_id + 1, log_id):
+                gaps.setdefault(missing, now)
+            last_id = log_id
+            fresh.append(row)
+
+        def advance():
+            if self.version != version:
+                return False
+            self.last_id, self._gaps = last_id, gaps
+            self.version += 1
+            return True
+
+        return fresh, len(rows) == self.batch_size, expired, advance
+
+
+class AnalyticsState:
+    """Members, catalog, skill assignments and role compliance held in memory
+
+    ``connect()`` returns a DB-API connection (or raises); it is used when
+    load()/sync() are called without a cursor and for background reloads. A
+    full reload runs every ``reconcile_interval`` seconds (0 turns it off) and
+    whenever the tail gives up on a gap.
+    """
+
+    def __init__(self, connect, reconcile_interval=RECONCILE_INTERVAL):
+        self._connect = connect
+        self._lock = threading.RLock()
+        self._listeners = []
+        self.tail = AuditTail()
+        self.loaded = False
+        self.applied = 0
+        self.reloads = 0
+        self.reconcile_interval = reconcile_interval
+        self._reconcile_at = None
+        self._reload_thread = None
+        self._loading = False
+        self._reset()
+
+    def _reset(self):
+        self.members = {}             # mem_id -> member row (with role_name)
+        self.skills = {}              # skill_id -> skill row
+        self.roles = {}               # role_id -> role row
+        self.member_skills_map = {}   # mem_id -> {skill_id: level}
+        self.skill_holders = {}       # skill_id -> {mem_id: level}
+        self.category_levels = {cat: {1: 0, 2: 0, 3: 0} for cat in CATEGORIES}
+        self.role_requirements = {}   # role_id -> {skill_id: min level}
+        self.role_members = {}        # role_id -> set(mem_id)
+        self.requirements_met = {}    # mem_id -> requirements of own role met
+        self.total_assignments = 0
+        self.recent_logs = deque(maxlen=RECENT_LOGS)
+        self.versions = {}            # table -> (log_id, late rows, change_date)
+
+    # ------------------------------------------------------------------ loading
+
+    def subscribe(self, listener):
+        """Register ``listener(event, *args)`` for every applied delta"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _emit(self, event, *args):
+        if self._loading:
+            return  # listeners get a single 'reload' once a full load finishes
+        for listener in self._listeners:
+            listener(event, *args)
+
+    def _with_cursor(self, cursor, fn):
+        if cursor is not None:
+            return fn(cursor)
+        connection = self._connect()
+        own = connection.cursor(dictionary=True, buffered=True)
+        try:
+            return fn(own)
+        finally:
+            own.close()
+            connection.close()
+
+    def load(self, cursor=None):
+        """Full load; the tail starts at the log position read before the scan"""
+        def run(cur):
+            cur.execute("SELECT * FROM audit_logs ORDER BY log_id DESC LIMIT %s", (RECENT_LOGS,))
+            recent = cur.fetchall()
+            last_id = recent[0]['log_id'] if recent else 0
+            pending = self._pending(cur, last_id) if self.loaded else {}
+            # One (table_name, change_date) index seek per table, in a single statement
+            cur.execute(' UNION ALL '.join(["""
+                (SELECT table_name, log_id, change_date FROM audit_logs
+                 WHERE table_name = %s AND log_id <= %s
+                 ORDER BY change_date DESC, log_id DESC
+                 LIMIT 1)"""] * len(TABLES)), [value for table in TABLES for value in (table, last_id)])
+            versions = dict.fromkeys(TABLES, (0, 0, None))
+            for row in cur.fetchall():
+                versions[row['table_name']] = (row['log_id'], 0, row['change_date'])
+
+            cur.execute("SELECT role_id, role_name FROM roles")
+            roles = cur.fetchall()
+            cur.execute("SELECT skill_id, skill_name, category FROM skills")
+            skills = cur.fetchall()
+            cur.execute("""
+                SELECT mem_id, first_name, middle_name, last_name, email, phone_no, role_id
+                FROM team_members
+            """)
+            members = cur.fetchall()
+            cur.execute("SELECT mem_id, skill_id, proficiency_level FROM mem_skills")
+            assignments = cur.fetchall()
+            cur.execute("SELECT role_id, skill_id, min_proficiency_required FROM role_requirements")
+            requirements = cur.fetchall()
+
+            with self._lock:
+                self._reset()
+                self._loading = True
+                for role in roles:
+                    self.roles[role['role_id']] = role
+                    self.role_requirements[role['role_id']] = {}
+                    self.role_members[role['role_id']] = set()
+                for skill in skills:
+                    self.skills[skill['skill_id']] = skill
+                    self.skill_holders[skill['skill_id']] = {}
+                for req in requirements:
+                    self.role_requirements.setdefault(req['role_id'], {})[req['skill_id']] = req['min_proficiency_required']
+                for member in members:
+                    self._put_member(member)
+                for row in assignments:
+                    self._set_level(row['mem_id'], row['skill_id'], row['proficiency_level'])
+                self.recent_logs.extend(reversed(recent))
+                self.versions = versions
+                self.tail.reset(last_id, pending)
+                self.loaded = True
+                self.reloads += 1
+                self._reconcile_at = time.monotonic() + self.reconcile_interval
+                self._loading = False
+                self._emit('reload')
+        self._with_cursor(cursor, run)
+
+    def _pending(self, cursor, last_id):
+        """Gaps up to ``last_id`` that are still uncommitted, to be tailed after a reload
+
+        Known gaps keep their age; ids between the tail and the reload's
+        position that are missing become new gaps.
+        """
+        gaps, tail_id = self.tail.gaps(), self.tail.last_id
+        low = min(gaps, default=tail_id)
+        if low >= last_id:
+            return {}
+        cursor.execute("SELECT log_id FROM audit_logs WHERE log_id > %s AND log_id <= %s", (low, last_id))
+        present = {row['log_id'] for row in cursor.fetchall()}
+        now = time.monotonic()
+        pending = {log_id: seen for log_id, seen in gaps.items() if log_id not in present}
+        pending.update((log_id, now) for log_id in range(tail_id + 1, last_id + 1) if log_id not in present)
+        return pending
+
+    def sync(self, cursor=None):
+        """Apply every audit_logs row written since the last sync
+
+        The audit rows, and the entity rows they point at, are read without the
+        lock; it is only held to apply them and move the tail, so requests don't
+        queue behind each other's round trips. A batch another sync applied
+        first is read again from the new position.
+        """
+        def run(cur):
+            if not self.loaded:
+                self.load(cur)
+            more = True
+            while more:
+                rows, more, expired, advance = self.tail.read(cur)
+                found = self._fetch_entities(rows, cur)
+                with self._lock:
+                    if not advance():
+                        more = True
+                        continue
+                    self._apply_rows(rows, found)
+                    self.recent_logs.extend(rows)
+                if expired:
+                    # Rolled back, or committed too late to be tailed: only a reload can tell
+                    self.reload_in_background()
+            if self.reconcile_interval and self._reconcile_at is not None and time.monotonic() >= self._reconcile_at:
+                self.reload_in_background()
+        self._with_cursor(cursor, run)
+        return self
+
+    def reload_in_background(self):
+        """Start a full load() on its own connection; requests keep the current state meanwhile"""
+        with self._lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return
+            # A failed reload waits for the next interval instead of retrying per request
+            self._reconcile_at = time.monotonic() + self.reconcile_interval
+            self._reload_thread = threading.Thread(target=self._reload, name='analytics-reload', daemon=True)
+            self._reload_thread.start()
+
+    def _reload(self):
+        try:
+            self.load()
+        except Exception as e:
+            print("Analytics reload failed:", e)
+
+    # ----------------------------------------------------------------- deltas
+
+    def _fetch_entities(self, rows, cursor):
+        """Current rows of the members, skills and roles ``rows`` touch: ``{table: {id: row or None}}``
+
+        Entity log rows only carry part of the row, so they are re-read (one
+        query per table) instead of parsed.
+        """
+        found = {}
+        for table, key, columns in REFETCH:
+            ids = set()
+            for row in rows:
+                if row['table_name'] == table and row['operation_type'] != 'DELETE':
+                    try:
+                        ids.add(int(row['record_id']))
+                    except (TypeError, ValueError):
+                        pass
+            if ids:
+                ids = sorted(ids)
+                cursor.execute(
+                    f"SELECT {columns} FROM {table} WHERE {key} IN ({','.join(['%s'] * len(ids))})", ids
+                )
+                current = {row[key]: row for row in cursor.fetchall()}
+                found[table] = {id_: current.get(id_) for id_ in ids}
+        return found
+
+    def _apply_rows(self, rows, found):
+        # Entity rows first, so skill/requirement deltas later in the batch find their member/skill
+        self._apply_entities(found)
+        refetch = {table for table, _, _ in REFETCH}
+
+        for row in rows:
+            table, op = row['table_name'], row['operation_type']
+            self._bump(table, row)
+            if op == 'DELETE':
+                for dependent in CASCADES.get(table, ()):
+                    self._bump(dependent, row)
+            try:
+                if table == 'mem_skills':
+                    mem_id, skill_id = _pair(row['record_id'])
+                    level = 0 if op == 'DELETE' else _level(row['new_value']) or 0
+                    self._set_level(mem_id, skill_id, level)
+                elif table == 'role_requirements':
+                    role_id, skill_id = _pair(row['record_id'])
+                    level = 0 if op == 'DELETE' else _level(row['new_value']) or 0
+                    self._set_requirement(role_id, skill_id, level)
+                elif table in refetch and op == 'DELETE':
+                    self._delete(table, int(row['record_id']))
+            except (TypeError, ValueError):
+                continue  # malformed record_id - nothing sensible to apply
+            self.applied += 1
+
+    def _bump(self, table, row):
+        log_id, late, changed = self.versions.get(table, (0, 0, None))
+        if row['log_id'] > log_id:
+            log_id = row['log_id']
+        else:
+            late += 1  # a lower log_id committed after a higher one was read
+        change_date = row.get('change_date')
+        if changed is None or (change_date is not None and change_date > changed):
+            changed = change_date
+        self.versions[table] = (log_id, late, changed)
+
+    def _apply_entities(self, found):
+        # Roles and skills first so members pick up fresh role names
+        put = {'roles': self._put_role, 'skills': self._put_skill, 'team_members': self._put_member}
+        for table, _, _ in REFETCH:
+            for key, row in found.get(table, {}).items():
+                if row is not None:
+                    put[table](row)
+                else:
+                    self._delete(table, key)
+
+    def _put_role(self, role):
+        role_id = role['role_id']
+        self.roles[role_id] = role
+        self.role_requirements.setdefault(role_id, {})
+        self.role_members.setdefault(role_id, set())
+        for mem_id in self.role_members[role_id]:
+            self.members[mem_id]['role_name'] = role['role_name']
+        self._emit('role', role_id, role)
+
+    def _put_skill(self, skill):
+        skill_id = skill['skill_id']
+        old = self.skills.get(skill_id)
+        self.skills[skill_id] = skill
+        holders = self.skill_holders.setdefault(skill_id, {})
+        if old and old['category'] != skill['category']:
+            for level in holders.values():
+                self.category_levels[old['category']][level] -= 1
+                self.category_levels[skill['category']][level] += 1
+        self._emit('skill', skill_id, skill)
+
+    def _put_member(self, member):
+        mem_id = member['mem_id']
+        old = self.members.get(mem_id)
+        role_id = member['role_id']
+        member = dict(member)
+        member['role_name'] = self.roles[role_id]['role_name'] if role_id in self.roles else None
+        self.members[mem_id] = member
+        self.member_skills_map.setdefault(mem_id, {})
+
+        if old is None or old['role_id'] != role_id:
+            if old is not None and old['role_id'] in self.role_members:
+                self.role_members[old['role_id']].discard(mem_id)
+            if role_id is not None:
+                self.role_members.setdefault(role_id, set()).add(mem_id)
+            self.requirements_met[mem_id] = self._count_met(mem_id, role_id)
+        self._emit('member', mem_id, member)
+
+    def _delete(self, table, key):
+        if table == 'team_members':
+            if key not in self.members:
+                return
+            for skill_id in list(self.member_skills_map.get(key, {})):
+                self._set_level(key, skill_id, 0)
+            member = self.members.pop(key)
+            self.member_skills_map.pop(key, None)
+            self.requirements_met.pop(key, None)
+            if member['role_id'] in self.role_members:
+                self.role_members[member['role_id']].discard(key)
+            self._emit('member_deleted', key)
+        elif table == 'skills':
+            if key not in self.skills:
+                return
+            for mem_id in list(self.skill_holders.get(key, {})):
+                self._set_level(mem_id, key, 0)
+            for role_id, reqs in self.role_requirements.items():
+                if key in reqs:
+                    self._set_requirement(role_id, key, 0)
+            self.skill_holders.pop(key, None)
+            del self.skills[key]
+            self._emit('skill_deleted', key)
+        elif table == 'roles':
+            if key not in self.roles:
+                return
+            for skill_id in list(self.role_requirements.get(key, {})):
+                self._set_requirement(key, skill_id, 0)
+            # team_members.role_id is ON DELETE SET NULL
+            for mem_id in list(self.role_members.get(key, ())):
+                member = dict(self.members[mem_id], role_id=None)
+                self._put_member(member)
+            self.role_requirements.pop(key, None)
+            self.role_members.pop(key, None)
+            del self.roles[key]
+            self._emit('role_deleted', key)
+
+    def _set_level(self, mem_id, skill_id, level):
+        """Set (level > 0) or remove (level 0) one member skill"""
+        if mem_id not in self.members or skill_id not in self.skills:
+            return
+        skills = self.member_skills_map.setdefault(mem_id, {})
+        old = skills.get(skill_id, 0)
+        if old == level:
+            return
+
+        category = self.skills[skill_id]['category']
+        holders = self.skill_holders.setdefault(skill_id, {})
+        if old:
+            self.category_levels[category][old] -= 1
+        if level:
+            self.category_levels[category][level] += 1
+            skills[skill_id] = level
+            holders[mem_id] = level
+        else:
+            skills.pop(skill_id, None)
+            holders.pop(mem_id, None)
+        self.total_assignments += (level > 0) - (old > 0)
+
+        member = self.members.get(mem_id)
+        if member is not None and member['role_id'] is not None:
+            needed = self.role_requirements.get(member['role_id'], {}).get(skill_id)
+            if needed:
+                self.requirements_met[mem_id] += (level >= needed) - (old >= needed)
+        self._emit('mem_skill', mem_id, skill_id, old, level)
+
+    def _set_requirement(self, role_id, skill_id, level):
+        """Set (level > 0) or remove (level 0) one role requirement; O(members in role)"""
+        if role_id not in self.roles or skill_id not in self.skills:
+            return
+        reqs = self.role_requirements.setdefault(role_id, {})
+        old = reqs.get(skill_id, 0)
+        if old == level:
+            return
+        if level:
+            reqs[skill_id] = level
+        else:
+            reqs.pop(skill_id, None)
+
+        for mem_id in self.role_members.get(role_id, ()):
+            held = self.member_skills_map.get(mem_id, {}).get(skill_id, 0)
+            was_met = bool(old) and held >= old
+            now_met = bool(level) and held >= level
+            self.requirements_met[mem_id] += now_met - was_met
+        self._emit('requirement', role_id, skill_id, old, level)
+
+    def _count_met(self, mem_id, role_id):
+        skills = self.member_skills_map.get(mem_id, {})
+        return sum(
+            1 for skill_id, needed in self.role_requirements.get(role_id, {}).items()
+            if skills.get(skill_id, 0) >= needed
+        )
+
+    # ------------------------------------------------------------------ reads
+
+    def match_pct(self, mem_id):
+        member = self.members[mem_id]
+        total = len(self.role_requirements.get(member['role_id'], {}))
+        return round(self.requirements_met.get(mem_id, 0) / total * 100) if total else 100
+
+    def counters(self):
+        """Dashboard counters, O(1)"""
+        with self._lock:
+            return {
+                'total_members': len(self.members),
+                'total_roles': len(self.roles),
+                'total_skills': len(self.skills),
+                'total_assignments': self.total_assignments,
+            }
+
+    def category_counts(self):
+        """Number of catalog skills per category, in ENUM order"""
+        with self._lock:
+            counts = dict.fromkeys(sorted(CATEGORY_SORT, key=CATEGORY_SORT.get), 0)
+            for skill in self.skills.values():
+                counts[skill['category']] = counts.get(skill['category'], 0) + 1
+            return counts
+
+    def version(self, tables):
+        """``(tag, last_modified)`` for the newest change applied to any of ``tables``
+
+        The tag names each table's newest log_id, so every process tailing the
+        same audit_logs hands out the same tag for the same data.
+        """
+        with self._lock:
+            entries = [self.versions.get(table, (0, 0, None)) for table in tables]
+        tag = '-'.join(f'{log_id}.{late}' if late else str(log_id) for log_id, late, _ in entries)
+        dates = [changed for _, _, changed in entries if changed is not None]
+        return tag, max(dates, default=None)
+
+    def latest_logs(self):
+        """Most recent audit_logs rows seen by the tail, newest first"""
+        with self._lock:
+            return sorted(self.recent_logs, key=lambda row: row['log_id'], reverse=True)
+
+    def compliance_summary(self):
+        """Compliance rate and critical gaps the way the reports page defines them"""
+        with self._lock:
+            with_roles = 0
+            compliant = 0
+            critical_roles = set()
+            for role_id, mem_ids in self.role_members.items():
+                for mem_id in mem_ids:
+                    pct = self.match_pct(mem_id)
+                    with_roles += 1
+                    if pct >= COMPLIANT_PCT:
+                        compliant += 1
+                    if pct < CRITICAL_PCT:
+                        critical_roles.add(role_id)
+            return {
+                'compliance_rate': round(compliant / with_roles * 100) if with_roles else 0,
+                'critical_gaps': len(critical_roles),
+            }
+
+    def report_rows(self):
+        """Rows shaped like fetch_report_rows() in app.py, built from memory"""
+        with self._lock:
+            members = [dict(m) for m in self.members.values()]
+            skills = sorted(
+                self.skills.values(),
+                key=lambda s: (CATEGORY_SORT.get(s['category'], 99), s['skill_name'].casefold())
+            )
+            assignments = [
+                {'mem_id': mem_id, 'skill_id': skill_id, 'proficiency_level': level}
+                for mem_id, levels in self.member_skills_map.items()
+                for skill_id, level in levels.items()
+            ]
+            requirements = [
+                {
+                    'role_id': role_id,
+                    'skill_id': skill_id,
+                    'min_proficiency_required': level,
+                    'skill_name': self.skills[skill_id]['skill_name'],
+                    'category': self.skills[skill_id]['category'],
+                }
+                for role_id, reqs in self.role_requirements.items()
+                for skill_id, level in reqs.items()
+                if skill_id in self.skills
+            ]
+            return members, [dict(s) for s in skills], assignments, requirements
@@ -1,12 +1,36 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, g, session, Response, stream_with_context, make_response
 import mysql.connector
 from mysql.connector import Error
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 from functools import wraps
-import re
+import csv
+import json
+import threading
+import time
+from itertools import islice
+import click
+from werkzeug.datastructures import MultiDict
 from dotenv import load_dotenv
 
+from analytics import build_reports_payload
+from analytics_state import CATEGORY_SORT, RECONCILE_INTERVAL, AnalyticsState
+from audit_archive import AuditArchive, archive_partition, closed_partitions, ensure_partitions, list_partitions
+from bulk_import import CHUNK_ROWS, GMAIL_RE, PHONE_RE, import_members, parse_members
+from cache import TTLCache, cache_stats
+from db_pool import ConnectionPool
+from eligibility import EligibilityEngine
+from expert_index import EXPERTS_PAGE, EXPERTS_PAGE_MAX, MODES, ExpertIndex
+from fanout import FANOUT_WORKERS, FanOut, fetchall, fetchone
+from metrics import FLUSH_INTERVAL, Metrics
+from pagination import Keyset
+from query_stats import REPEAT_THRESHOLD, WINDOW, QueryStats, RequestTrace, TracedConnection, current as current_trace
+from report_export import openpyxl, report_sections, stream_csv, stream_xlsx
+from report_snapshots import ReportSnapshotService
+from search_index import KINDS, SEARCH_LIMIT, SEARCH_LIMIT_MAX, SearchIndex
+from slow_queries import COST_FACTOR, EXPLAIN_INTERVAL, RING_SIZE, SLOW_QUERY_MS, PlanBaselines, SlowQueryLog
+from staffing import ALTERNATIVES, ALTERNATIVES_MAX, MAX_NEEDS, OBJECTIVES
+
 
 app = Flask(__name__, 
             template_folder='Frontend/', 
@@ -15,20 +39,105 @@ app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here-change-in-pr
 
 load_dotenv()
 
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
+
+def _open_raw_connection():
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        database=os.getenv("DB_NAME")
+    )
+
+
+def get_db_pool():
+    """Create the connection pool on first use (so .env / test settings apply)"""
+    global _db_pool
+    if _db_pool is None:
+        with _db_pool_lock:
+            if _db_pool is None:
+                _db_pool = ConnectionPool(
+                    # Traced: every statement is timed into the current request's trace,
+                    # slow ones go to the slow query log
+                    lambda: TracedConnection(_open_raw_connection(), slow_log if SLOW_QUERY_LOG else None),
+                    size=int(os.getenv("DB_POOL_SIZE", 5)),
+                    max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", 10)),
+                    recycle=int(os.getenv("DB_POOL_RECYCLE", 3600)),
+                    pre_ping=os.getenv("DB_POOL_PRE_PING", "1") not in ("0", "false", "False"),
+                    timeout=float(os.getenv("DB_POOL_TIMEOUT", 5)),
+                    on_wait=lambda waited: metrics.observe('db_pool_checkout_wait_seconds', waited)
+                )
+    return _db_pool
+
+
+# Side connections for a page's independent reads (see fanout.py)
+fan_out = FanOut(get_db_pool, workers=int(os.getenv("FANOUT_WORKERS", FANOUT_WORKERS)))
+
+
 def get_db_connection():
     try:
-        conn = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
-        )
-        return conn
+        return get_db_pool().connect()
     except Exception as e:
         print("DB connection failed:", e)
         return None
 
 
+def get_db():
+    """Request-scoped connection: opened on first use, released in close_db()"""
+    if 'db' not in g:
+        # Pooled connections aren't autocommit: the request reads one snapshot
+        # from here on, so catalog loads are checked against this generation
+        g.catalog_generation = catalog_cache.generation
+        g.db = get_db_connection()
+    return g.db
+
+
+def get_cursor():
+    """Request-scoped dictionary cursor on the request's connection"""
+    if 'db_cursor' not in g:
+        connection = get_db()
+        g.db_cursor = connection.cursor(dictionary=True, buffered=True) if connection else None
+    return g.db_cursor
+
+
+def rollback_db():
+    """Mark the request's transaction as failed so close_db() rolls it back"""
+    g.db_failed = True
+    connection = g.get('db')
+    if connection is not None:
+        try:
+            connection.rollback()
+        except Error:
+            pass
+
+
+@app.teardown_appcontext
+def close_db(exc):
+    """Commit or roll back the request's transaction and return the connection to the pool"""
+    cursor = g.pop('db_cursor', None)
+    connection = g.pop('db', None)
+    failed = g.pop('db_failed', False)
+    if connection is None:
+        return
+
+    try:
+        if exc is None and not failed:
+            connection.commit()
+        else:
+            connection.rollback()
+    except Error as e:
+        print("DB transaction cleanup failed:", e)
+    finally:
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Error:
+                pass
+        connection.close()
+
+
 def handle_db_error(f):
     """Decorator to handle database errors"""
     @wraps(f)
@@ -36,6 +145,7 @@ def handle_db_error(f):
         try:
             return f(*args, **kwargs)
         except Error as e:
+            rollback_db()
             flash(f'Database error: {str(e)}', 'danger')
             return redirect(url_for('index'))
     return decorated_function
@@ -43,76 +153,508 @@ def handle_db_error(f):
 #routes
 
 
+def _analytics_connection():
+    # Used off-request (snapshot thread), so it raises instead of returning None
+    connection = get_db_connection()
+    if connection is None:
+        raise Error(msg='Database connection failed')
+    return connection
+
+
+analytics_state = AnalyticsState(
+    _analytics_connection,
+    reconcile_interval=float(os.getenv('ANALYTICS_RECONCILE_INTERVAL', RECONCILE_INTERVAL)),
+)
+eligibility = EligibilityEngine(analytics_state)
+expert_index = ExpertIndex(analytics_state)
+search_index = SearchIndex(analytics_state)
+dashboard_cache = TTLCache('dashboard', ttl=float(os.getenv('DASHBOARD_CACHE_TTL', 10)))
+
+
+def get_dashboard_stats():
+    """Homepage counters and recent audit logs from the in-memory analytics state, cached briefly"""
+    def load():
+        cursor = get_cursor()
+        if cursor is None:
+            return None
+        # One incremental read of audit_logs keeps every counter current without COUNT(*) scans
+        analytics_state.sync(cursor)
+        stats = analytics_state.counters()
+        stats['skill_categories'] = analytics_state.category_counts()
+        stats['recent_logs'] = analytics_state.latest_logs()
+        return stats
+
+    return dashboard_cache.get_or_load('stats', load)
+
+
+# ==================== METRICS ====================
+
+# Per-process totals; with METRICS_DIR shared by all workers, /metrics sums them (see metrics.py)
+metrics = Metrics(
+    directory=os.getenv("METRICS_DIR") or None,
+    flush_interval=float(os.getenv("METRICS_FLUSH_INTERVAL", FLUSH_INTERVAL))
+)
+metrics.counter('http_requests_total', 'Requests served, by route, method and status')
+metrics.histogram('http_request_duration_seconds', 'Time to build the response, by route')
+metrics.counter('http_request_errors_total',
+                'Failed requests by route and kind: db (rolled back, including those handle_db_error redirects) or 5xx')
+metrics.counter('db_queries_total', 'SQL statements run, by route')
+metrics.counter('db_query_seconds_total', 'Time spent in SQL statements, by route')
+metrics.histogram('db_pool_checkout_wait_seconds', 'Wait for a pooled connection per checkout',
+                  buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0))
+metrics.counter('db_pool_checkouts_total', 'Connections checked out of the pool')
+metrics.counter('db_pool_fallbacks_total', 'Unpooled connections opened because the pool was exhausted')
+metrics.gauge('db_pool_checked_out', 'Pooled connections in use')
+metrics.gauge('db_pool_open', 'Pooled connections open (idle and in use)')
+metrics.gauge('db_pool_waiting', 'Requests waiting for a pooled connection')
+metrics.counter('cache_hits_total', 'In-process cache hits, by cache')
+metrics.counter('cache_misses_total', 'In-process cache misses, by cache')
+metrics.gauge('cache_entries', 'Entries held, by cache')
+metrics.ratio('cache_hit_ratio', 'Cache hits / lookups, by cache', 'cache_hits_total', 'cache_misses_total')
+
+
+@metrics.collector
+def _pool_and_cache_metrics():
+    samples = []
+    if _db_pool is not None:
+        pool = _db_pool.stats()
+        samples += [
+            ('db_pool_checkouts_total', (), pool['checkouts']),
+            ('db_pool_fallbacks_total', (), pool['fallbacks']),
+            ('db_pool_checked_out', (), pool['checked_out']),
+            ('db_pool_open', (), pool['open']),
+            ('db_pool_waiting', (), pool['waiting']),
+        ]
+    for name, stats in cache_stats().items():
+        labels = (('cache', name),)
+        samples += [
+            ('cache_hits_total', labels, stats['hits']),
+            ('cache_misses_total', labels, stats['misses']),
+            ('cache_entries', labels, stats['entries']),
+        ]
+    return samples
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    metrics.start_flusher()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the request, its latency, DB time and (swallowed or not) errors"""
+    started = g.get('request_started')
+    if started is None:
+        return response
+    route = request.endpoint or 'unmatched'
+    labels = (('route', route),)
+    metrics.inc('http_requests_total', labels + (('method', request.method), ('status', str(response.status_code))))
+    metrics.observe('http_request_duration_seconds', time.perf_counter() - started, labels)
+    if g.get('db_failed'):
+        metrics.inc('http_request_errors_total', labels + (('kind', 'db'),))
+    elif response.status_code >= 500:
+        metrics.inc('http_request_errors_total', labels + (('kind', '5xx'),))
+    trace = g.get('query_trace')
+    if trace is not None:
+        metrics.inc('db_queries_total', labels, len(trace.entries))
+        metrics.inc('db_query_seconds_total', labels, trace.db_time)
+    return response
+
+
+# ==================== QUERY TRACING ====================
+
+# Off by default: /debug/queries lists the statements every route runs
+QUERY_TRACING = os.getenv("QUERY_TRACING", "0") not in ("0", "false", "False")
+query_stats = QueryStats(
+    window=int(os.getenv("QUERY_STATS_WINDOW", WINDOW)),
+    repeat_threshold=int(os.getenv("QUERY_REPEAT_THRESHOLD", REPEAT_THRESHOLD))
+)
+
+
+@app.before_request
+def start_query_trace():
+    """Record this request's statements (see query_stats.py)"""
+    if QUERY_TRACING:
+        g.query_trace = RequestTrace(request.endpoint or 'unmatched')
+        g.query_trace_token = current_trace.set(g.query_trace)
+
+
+@app.after_request
+def finish_query_trace(response):
+    """Server-Timing header, per-route summary and a warning for N+1 patterns"""
+    trace = g.get('query_trace')  # left on g for record_request_metrics
+    if trace is None:
+        return response
+    response.headers.add('Server-Timing', trace.server_timing())
+    route = request.endpoint or 'unmatched'
+    for sql, stat in query_stats.add(route, trace, response.status_code).items():
+        app.logger.warning('Possible N+1 in %s: %d x %s (from %s)', route, stat['count'], sql,
+                           ', '.join(sorted(stat['sites'])) or 'unknown')
+    return response
+
+
+@app.teardown_request
+def end_query_trace(exc):
+    token = g.pop('query_trace_token', None)
+    if token is not None:
+        try:
+            current_trace.reset(token)
+        except ValueError:
+            current_trace.set(None)  # streamed responses finish in another context
+
+
+# ==================== SLOW QUERIES ====================
+
+# Statements slower than SLOW_QUERY_MS, EXPLAINed in the background (see slow_queries.py).
+# Off by default: the captures hold bound parameters (emails, phone numbers)
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "0") not in ("0", "false", "False")
+slow_log = SlowQueryLog(
+    lambda: _open_raw_connection(),
+    threshold=float(os.getenv("SLOW_QUERY_MS", SLOW_QUERY_MS)) / 1000,
+    size=int(os.getenv("SLOW_QUERY_RING_SIZE", RING_SIZE)),
+    baselines=PlanBaselines(os.getenv("SLOW_QUERY_BASELINES", "slow_query_baselines.json") or None),
+    release=os.getenv("APP_RELEASE", "dev"),
+    explain_interval=float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", EXPLAIN_INTERVAL)),
+    cost_factor=float(os.getenv("SLOW_QUERY_COST_FACTOR", COST_FACTOR)),
+    baseline_params=os.getenv("SLOW_QUERY_BASELINE_PARAMS", "0") not in ("0", "false", "False")
+)
+metrics.counter('db_slow_queries_total', 'Statements slower than SLOW_QUERY_MS')
+metrics.gauge('db_slow_query_regressions', 'Statements whose plan changed or got costlier than its baseline')
+
+
+@metrics.collector
+def _slow_query_metrics():
+    stats = slow_log.stats()
+    return [
+        ('db_slow_queries_total', (), stats['captured']),
+        ('db_slow_query_regressions', (), stats['regressions']),
+    ]
+
+
+@app.cli.command('slow-query-rebaseline')
+def slow_query_rebaseline_command():
+    """EXPLAIN every baselined statement again and accept the current plans (after an intended plan change)"""
+    updated, cleared, failed = slow_log.rebaseline()
+    click.echo(f'{updated} baseline(s) updated')
+    if cleared:
+        click.echo(f'{cleared} baseline(s) stored without parameters cleared; the next plan of each is kept')
+    for sql, message in failed:
+        click.echo(f'failed: {sql}: {message}')
+    if failed:
+        raise click.ClickException(f'{len(failed)} statement(s) could not be explained')
+
+
+# ==================== CATALOG ====================
+
+# Skills, roles and role requirements change rarely and are read by most forms.
+# Entries are keyed on the analytics state's version of those tables, so a
+# write by any worker (or outside the app) shows up at its next audit_logs
+# sync; invalidate() only saves this worker that round trip after its own writes.
+CATALOG_TABLES = ('skills', 'roles', 'role_requirements')
+catalog_cache = TTLCache('catalog', ttl=float(os.getenv('CATALOG_CACHE_TTL', 300)))
+
+
+def get_catalog(cursor):
+    """Skills, roles and requirements by role, each also pre-serialized as JSON"""
+    def load():
+        cursor.execute("""
+            SELECT skill_id, skill_name, category
+            FROM skills
+            ORDER BY category, skill_name
+        """)
+        skills = cursor.fetchall()
+        cursor.execute("""
+            SELECT role_id, role_name, description
+            FROM roles
+            ORDER BY role_name
+        """)
+        roles = cursor.fetchall()
+        cursor.execute("""
+            SELECT role_id, skill_id, min_proficiency_required
+            FROM role_requirements
+            ORDER BY role_id, skill_id
+        """)
+        role_requirements = {}
+        for req in cursor.fetchall():
+            role_requirements.setdefault(req['role_id'], []).append({
+                'skill_id': req['skill_id'],
+                'min_proficiency_required': req['min_proficiency_required']
+            })
+        return {
+            'skills': skills,
+            'roles': roles,
+            'role_requirements': role_requirements,
+            'skills_json': json.dumps(skills),
+            'roles_json': json.dumps(roles),
+            'role_requirements_json': json.dumps(role_requirements),
+        }
+
+    analytics_state.sync(cursor)
+    tag, _ = analytics_state.version(CATALOG_TABLES)
+    return catalog_cache.get_or_load(('catalog', tag), load, generation=g.get('catalog_generation'))
+
+
+def invalidate_catalog():
+    """Call after committing a write to skills, roles or role_requirements"""
+    catalog_cache.invalidate()
+
+
+# ==================== CONDITIONAL GET ====================
+
+# Tables each list view reads (counts and joined names included)
+MEMBER_TABLES = ('team_members', 'roles', 'mem_skills')
+SKILL_TABLES = ('skills', 'mem_skills')
+ROLE_TABLES = ('roles', 'team_members', 'role_requirements')
+
+
+def table_version(tables):
+    """Version source for ``conditional``: the analytics state's version of ``tables``"""
+    def version():
+        cursor = get_cursor()
+        if cursor is None:
+            return None
+        # One incremental audit_logs read; the heavy queries only run on a miss
+        applied = analytics_state.applied
+        analytics_state.sync(cursor)
+        if analytics_state.applied != applied:
+            # List pages show dashboard counters - keep them in step with the ETag
+            dashboard_cache.invalidate('stats')
+        return analytics_state.version(tables)
+    return version
+
+
+def conditional(version):
+    """Decorator: ETag / Last-Modified from ``version()`` and 304 when the client is current
+
+    ``version()`` returns ``(tag, last_modified)`` or None. Responses carrying
+    flashed messages are never validated, so a pending flash is always shown.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if session.get('_flashes'):
+                return f(*args, **kwargs)
+            try:
+                current = version()
+            except Error:
+                rollback_db()
+                current = None
+            if current is None:
+                return f(*args, **kwargs)
+
+            tag, last_modified = current
+            if request.if_none_match:
+                fresh = request.if_none_match.contains_weak(tag)
+            else:
+                fresh = (last_modified is not None and request.if_modified_since is not None
+                         and last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None))
+            response = Response(status=304) if fresh else make_response(f(*args, **kwargs))
+            if response.status_code not in (200, 304):
+                return response
+            response.set_etag(tag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Stored copies are always revalidated: a write must show up on the next load
+            response.cache_control.no_cache = True
+            response.cache_control.private = True
+            return response
+        return decorated_function
+    return decorator
+
+
+# ==================== SKILL DIFFS ====================
+
+def apply_skill_changes(cursor, table, owner_column, owner_id, level_column, levels, removed):
+    """Write a skill diff in two statements: one multi-row upsert and one DELETE ... IN
+
+    ``levels`` maps skill_id to the level for added or changed skills. Triggers
+    still fire per row: new rows log an INSERT, existing rows take the
+    ON DUPLICATE KEY UPDATE path and log an UPDATE, deleted rows log a DELETE.
+    ``VALUES(col)`` rather than a row alias, which needs MySQL 8.0.19.
+    """
+    if levels:
+        cursor.execute(f"""
+            INSERT INTO {table} ({owner_column}, skill_id, {level_column})
+            VALUES {', '.join(['(%s, %s, %s)'] * len(levels))}
+            ON DUPLICATE KEY UPDATE {level_column} = VALUES({level_column})
+        """, [value for skill_id, level in levels.items() for value in (owner_id, skill_id, level)])
+    if removed:
+        cursor.execute(f"""
+            DELETE FROM {table}
+            WHERE {owner_column} = %s AND skill_id IN ({', '.join(['%s'] * len(removed))})
+        """, [owner_id, *removed])
+
+
+# ==================== LIST PAGINATION ====================
+
+def _like_prefix(text):
+    """LIKE pattern matching values that start with ``text`` (prefix LIKEs can use an index)"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _category_index(category):
+    # ORDER BY on an ENUM follows declaration order, so seek on the ENUM index too
+    if category not in CATEGORY_SORT:
+        raise ValueError('Invalid cursor')
+    return CATEGORY_SORT[category] + 1
+
+
+MEMBER_KEYSET = Keyset({
+    'name': [('tm.first_name', 'first_name'), ('tm.last_name', 'last_name'), ('tm.mem_id', 'mem_id')],
+    'email': [('tm.email', 'email'), ('tm.mem_id', 'mem_id')],
+    'id': [('tm.mem_id', 'mem_id')],
+}, default_sort='name')
+
+SKILL_KEYSET = Keyset({
+    'category': [('s.category', 'category'), ('s.skill_name', 'skill_name'), ('s.skill_id', 'skill_id')],
+    'name': [('s.skill_name', 'skill_name'), ('s.skill_id', 'skill_id')],
+    'id': [('s.skill_id', 'skill_id')],
+}, default_sort='category', params={'category': _category_index})
+
+ROLE_KEYSET = Keyset({
+    'name': [('r.role_name', 'role_name'), ('r.role_id', 'role_id')],
+    'id': [('r.role_id', 'role_id')],
+}, default_sort='name')
+
+
+def fetch_keyset_rows(cursor, keyset, args, select_sql, where, params):
+    """Run ``select_sql`` for one page: filters + seek, ORDER BY the sort key, LIMIT page + 1"""
+    page = keyset.parse(args)
+    seek, seek_params, order_by = keyset.seek(page)
+    if seek:
+        where = where + [seek]
+        params = params + seek_params
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+    cursor.execute(f"{select_sql} {where_sql} ORDER BY {order_by} LIMIT %s", params + [page.limit + 1])
+    return page, cursor.fetchall()
+
+
+def fetch_keyset_page(cursor, keyset, args, select_sql, where, params):
+    """One page envelope (see ``Keyset.page``) for ``select_sql``"""
+    page, rows = fetch_keyset_rows(cursor, keyset, args, select_sql, where, params)
+    return keyset.page(rows, page)
+
+
+def fetch_members_page(cursor, args):
+    """One page of members; filters: q (name/email prefix), role_id"""
+    where, params = [], []
+    search = args.get('q', '').strip()
+    if search:
+        where.append("(tm.first_name LIKE %s OR tm.last_name LIKE %s OR tm.email LIKE %s)")
+        params += [_like_prefix(search)] * 3
+    role_id = args.get('role_id', type=int)
+    if role_id:
+        where.append("tm.role_id = %s")
+        params.append(role_id)
+
+    # Skill counts are correlated subqueries, so they only run for the rows on this page
+    return fetch_keyset_page(cursor, MEMBER_KEYSET, args, """
+        SELECT
+            tm.mem_id,
+            tm.first_name,
+            tm.last_name,
+            CONCAT_WS(' ', tm.first_name, NULLIF(tm.middle_name, ''), tm.last_name) AS full_name,
+            tm.email,
+            tm.phone_no,
+            tm.role_id,
+            r.role_name,
+            (SELECT COUNT(*) FROM mem_skills ms WHERE ms.mem_id = tm.mem_id) AS skill_count
+        FROM team_members tm
+        LEFT JOIN roles r ON tm.role_id = r.role_id
+    """, where, params)
+
+
+def fetch_skills_page(cursor, args):
+    """One page of skills; filters: q (name prefix), category"""
+    where, params = [], []
+    search = args.get('q', '').strip()
+    if search:
+        where.append("s.skill_name LIKE %s")
+        params.append(_like_prefix(search))
+    category = args.get('category', '').strip()
+    if category:
+        if category not in CATEGORY_SORT:
+            raise ValueError(f"Unknown category '{category}'")
+        where.append("s.category = %s")
+        params.append(category)
+
+    return fetch_keyset_page(cursor, SKILL_KEYSET, args, """
+        SELECT
+            s.skill_id,
+            s.skill_name,
+            s.category,
+            (SELECT COUNT(*) FROM mem_skills ms WHERE ms.skill_id = s.skill_id) AS member_count,
+            (SELECT COALESCE(AVG(ms.proficiency_level), 0) FROM mem_skills ms WHERE ms.skill_id = s.skill_id) AS avg_proficiency
+        FROM skills s
+    """, where, params)
+
+
+def fetch_roles_page(cursor, args):
+    """One page of roles; filters: q (name prefix)"""
+    where, params = [], []
+    search = args.get('q', '').strip()
+    if search:
+        where.append("r.role_name LIKE %s")
+        params.append(_like_prefix(search))
+
+    return fetch_keyset_page(cursor, ROLE_KEYSET, args, """
+        SELECT
+            r.role_id,
+            r.role_name,
+            r.description,
+            (SELECT COUNT(*) FROM team_members tm WHERE tm.role_id = r.role_id) AS member_count,
+            (SELECT COUNT(*) FROM role_requirements rr WHERE rr.role_id = r.role_id) AS required_skills
+        FROM roles r
+    """, where, params)
+
+
+def render_list_page(endpoint, template, rows_template, fetch, item_name, **context):
+    """Full list page, or just the rows of the next page when the list script asks (?partial=1)"""
+    cursor = get_cursor()
+    try:
+        page = fetch(cursor, request.args)
+    except ValueError as e:
+        if request.args.get('partial'):
+            return str(e), 400
+        flash(str(e), 'danger')
+        return redirect(url_for(endpoint))
+
+    if request.args.get('partial'):
+        response = make_response(render_template(rows_template, **{item_name: page['items']}))
+        response.headers['X-Next-Cursor'] = page['next_cursor'] or ''
+        return response
+
+    stats = get_dashboard_stats() or {}
+    return render_template(template, page=page, stats=stats, **{item_name: page['items']}, **context)
+
+
+def api_list_page(fetch):
+    """JSON envelope for one page: items, next_cursor, sort, order, limit"""
+    try:
+        return jsonify(fetch(get_cursor(), request.args))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+
 @app.route('/')
 def index():
     """Home page with dashboard"""
-    connection = get_db_connection()
-    if not connection:
+    stats = get_dashboard_stats()
+    if stats is None:
         flash('Database connection failed', 'danger')
         return render_template('index.html', stats={})
     
-    cursor = connection.cursor(dictionary=True)
-    
-    # Get statistics
-    stats = {}
-    
-    # Total members
-    cursor.execute("SELECT COUNT(*) as count FROM team_members")
-    stats['total_members'] = cursor.fetchone()['count']
-    
-    # Total roles
-    cursor.execute("SELECT COUNT(*) as count FROM roles")
-    stats['total_roles'] = cursor.fetchone()['count']
-    
-    # Total skills in catalog
-    cursor.execute("SELECT COUNT(*) as count FROM skills")
-    stats['total_skills'] = cursor.fetchone()['count']
-    
-    # Total skill assignments
-    cursor.execute("SELECT COUNT(*) as count FROM mem_skills")
-    stats['total_assignments'] = cursor.fetchone()['count']
-    
-    # Recent audit logs (triggered automatically)
-    cursor.execute("""
-        SELECT * FROM audit_logs 
-        ORDER BY change_date DESC 
-        LIMIT 10
-    """)
-    stats['recent_logs'] = cursor.fetchall()
-    
-    cursor.close()
-    connection.close()
-    
     return render_template('index.html', stats=stats)
 
 #Role management
 
 @app.route('/roles')
 @handle_db_error
+@conditional(table_version(ROLE_TABLES))
 def list_roles():
-    """List all roles with their requirements"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
-    
-    cursor.execute("""
-        SELECT 
-            r.role_id,
-            r.role_name,
-            r.description,
-            COUNT(DISTINCT tm.mem_id) as member_count,
-            COUNT(DISTINCT rr.skill_id) as required_skills
-        FROM roles r
-        LEFT JOIN team_members tm ON r.role_id = tm.role_id
-        LEFT JOIN role_requirements rr ON r.role_id = rr.role_id
-        GROUP BY r.role_id
-        ORDER BY r.role_name
-    """)
-    
-    roles = cursor.fetchall()
-    cursor.close()
-    connection.close()
-    
-    return render_template('roles/list.html', roles=roles)
+    """List roles a page at a time with their requirement and member counts"""
+    return render_list_page('list_roles', 'roles/list.html', 'roles/_rows.html', fetch_roles_page, 'roles')
 
 # Replace your add_role route with this updated version:
 
@@ -120,8 +662,8 @@ def list_roles():
 @handle_db_error
 def add_role():
     """Add a new role with skill requirements (triggers after_role_insert)"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
+    connection = get_db()
+    cursor = get_cursor()
     
     if request.method == 'POST':
         # Check if it's a JSON request (from new add page)
@@ -151,8 +693,7 @@ def add_role():
                     """, (role_id, skill_id, min_prof))
             
             connection.commit()
-            cursor.close()
-            connection.close()
+            invalidate_catalog()
             
             return jsonify({
                 'success': True,
@@ -187,84 +728,59 @@ def add_role():
                         """, (role_id, skill_id, min_prof))
             
             connection.commit()
-            cursor.close()
-            connection.close()
+            invalidate_catalog()
             
             flash(f'Role "{role_name}" added successfully!', 'success')
             return redirect(url_for('view_role', role_id=role_id))
     
-    # GET request - get all skills for the dropdown
-    cursor.execute("""
-        SELECT skill_id, skill_name, category 
-        FROM skills 
-        ORDER BY category, skill_name
-    """)
-    skills = cursor.fetchall()
-    
-    cursor.close()
-    connection.close()
-    
-    # Convert skills to JSON for JavaScript
-    import json
-    skills_json = json.dumps(skills)
+    # GET request - skills for the dropdown, already serialized for JavaScript
+    catalog = get_catalog(cursor)
     
-    return render_template('roles/add.html', skills_json=skills_json, all_skills=skills)
+    return render_template('roles/add.html', skills_json=catalog['skills_json'], all_skills=catalog['skills'])
 
 @app.route('/roles/<int:role_id>')
 @handle_db_error
 def view_role(role_id):
     """View role details with requirements and current members"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
-    
-    # Get role details
-    cursor.execute("SELECT * FROM roles WHERE role_id = %s", (role_id,))
-    role = cursor.fetchone()
+    cursor = get_cursor()
+    
+    # Independent reads run side by side on pooled connections
+    found = fan_out.run(cursor, {
+        'role': fetchone("SELECT * FROM roles WHERE role_id = %s", (role_id,)),
+        'requirements': fetchall("""
+            SELECT 
+                s.skill_id,
+                s.skill_name,
+                s.category,
+                rr.min_proficiency_required
+            FROM role_requirements rr
+            JOIN skills s ON rr.skill_id = s.skill_id
+            WHERE rr.role_id = %s
+            ORDER BY s.category, s.skill_name
+        """, (role_id,)),
+        'members': fetchall("""
+            SELECT 
+                tm.mem_id,
+                CONCAT_WS(' ', tm.first_name, NULLIF(tm.middle_name, ''), tm.last_name) AS full_name,
+                tm.email,
+                tm.phone_no
+            FROM team_members tm
+            WHERE tm.role_id = %s
+            ORDER BY tm.first_name, tm.last_name
+        """, (role_id,)),
+        'catalog': get_catalog,
+    })
+    role = found['role']
     
     if not role:
         flash('Role not found', 'warning')
         return redirect(url_for('list_roles'))
     
-    # Get role requirements
-    cursor.execute("""
-        SELECT 
-            s.skill_id,
-            s.skill_name,
-            s.category,
-            rr.min_proficiency_required
-        FROM role_requirements rr
-        JOIN skills s ON rr.skill_id = s.skill_id
-        WHERE rr.role_id = %s
-        ORDER BY s.category, s.skill_name
-    """, (role_id,))
-    requirements = cursor.fetchall()
-    
-    # Get members with this role
-    cursor.execute("""
-        SELECT 
-            tm.mem_id,
-            CONCAT_WS(' ', tm.first_name, NULLIF(tm.middle_name, ''), tm.last_name) AS full_name,
-            tm.email,
-            tm.phone_no
-        FROM team_members tm
-        WHERE tm.role_id = %s
-        ORDER BY tm.first_name, tm.last_name
-    """, (role_id,))
-    members = cursor.fetchall()
-    
-    # Get available skills for adding requirements
-    cursor.execute("""
-        SELECT skill_id, skill_name, category 
-        FROM skills 
-        WHERE skill_id NOT IN (
-            SELECT skill_id FROM role_requirements WHERE role_id = %s
-        )
-        ORDER BY category, skill_name
-    """, (role_id,))
-    available_skills = cursor.fetchall()
-    
-    cursor.close()
-    connection.close()
+    # Catalog skills the role doesn't require yet, for adding requirements
+    requirements = found['requirements']
+    required = {req['skill_id'] for req in requirements}
+    available_skills = [skill for skill in found['catalog']['skills'] if skill['skill_id'] not in required]
+    members = found['members']
     
     return render_template('roles/view.html', 
                          role=role, 
@@ -276,8 +792,8 @@ def view_role(role_id):
 @handle_db_error
 def edit_role(role_id):
     """Edit role details and skill requirements (triggers after_role_update)"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
+    connection = get_db()
+    cursor = get_cursor()
     
     if request.method == 'POST':
         role_name = request.form['role_name'].strip()
@@ -293,7 +809,16 @@ def edit_role(role_id):
         
         # Get skills marked for deletion
         skills_to_delete = request.form.get('skills_to_delete', '')
-        skills_to_delete_list = [s.strip() for s in skills_to_delete.split(',') if s.strip()]
+        skills_to_delete_set = {int(s) for s in skills_to_delete.split(',') if s.strip()}
+        
+        # Requested levels: edited existing requirements, then newly added ones
+        requested = {}
+        for skill_id, min_prof in zip(existing_skill_ids, existing_min_proficiencies):
+            if skill_id and min_prof and int(skill_id) not in skills_to_delete_set:
+                requested[int(skill_id)] = int(min_prof)
+        for skill_id, min_prof in zip(new_skill_ids, new_min_proficiencies):
+            if skill_id and min_prof:  # Only insert if both values are present
+                requested[int(skill_id)] = int(min_prof)
         
         # Update role basic info - This UPDATE will trigger after_role_update
         cursor.execute("""
@@ -302,36 +827,18 @@ def edit_role(role_id):
             WHERE role_id = %s
         """, (role_name, description, role_id))
         
-        # Delete marked skill requirements
-        if skills_to_delete_list:
-            for skill_id in skills_to_delete_list:
-                cursor.execute("""
-                    DELETE FROM role_requirements 
-                    WHERE role_id = %s AND skill_id = %s
-                """, (role_id, skill_id))
-        
-        # Update existing skill requirements (proficiency levels)
-        if existing_skill_ids and existing_min_proficiencies:
-            for skill_id, min_prof in zip(existing_skill_ids, existing_min_proficiencies):
-                if skill_id and min_prof and skill_id not in skills_to_delete_list:
-                    cursor.execute("""
-                        UPDATE role_requirements 
-                        SET min_proficiency_required = %s 
-                        WHERE role_id = %s AND skill_id = %s
-                    """, (min_prof, role_id, skill_id))
+        # Diff against the stored requirements so unchanged rows are not touched
+        cursor.execute("SELECT skill_id, min_proficiency_required FROM role_requirements WHERE role_id = %s", (role_id,))
+        current = {row['skill_id']: row['min_proficiency_required'] for row in cursor.fetchall()}
+        changed = {skill_id: level for skill_id, level in requested.items() if current.get(skill_id) != level}
+        removed = sorted((skills_to_delete_set & current.keys()) - requested.keys())
         
-        # Insert new skill requirements
-        if new_skill_ids and new_min_proficiencies:
-            for skill_id, min_prof in zip(new_skill_ids, new_min_proficiencies):
-                if skill_id and min_prof:  # Only insert if both values are present
-                    cursor.execute("""
-                        INSERT INTO role_requirements (role_id, skill_id, min_proficiency_required) 
-                        VALUES (%s, %s, %s)
-                    """, (role_id, skill_id, min_prof))
+        # Triggers after_rolereq_insert / _update / _delete per row
+        apply_skill_changes(cursor, 'role_requirements', 'role_id', role_id,
+                            'min_proficiency_required', changed, removed)
         
         connection.commit()
-        cursor.close()
-        connection.close()
+        invalidate_catalog()
         
         flash('Role updated successfully!', 'success')
         return redirect(url_for('view_role', role_id=role_id))
@@ -342,8 +849,6 @@ def edit_role(role_id):
     
     if not role:
         flash('Role not found', 'warning')
-        cursor.close()
-        connection.close()
         return redirect(url_for('list_roles'))
     
     # Get existing skill requirements for this role
@@ -371,9 +876,6 @@ def edit_role(role_id):
     """, (role_id,))
     available_skills = cursor.fetchall()
     
-    cursor.close()
-    connection.close()
-    
     # Convert to JSON for JavaScript
     import json
     available_skills_json = json.dumps(available_skills)
@@ -390,15 +892,13 @@ def edit_role(role_id):
 @handle_db_error
 def delete_role(role_id):
     """Delete a role (triggers after_role_delete)"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    connection = get_db()
+    cursor = get_cursor()
     
     # This DELETE will trigger after_role_delete
     cursor.execute("DELETE FROM roles WHERE role_id = %s", (role_id,))
     connection.commit()
-    
-    cursor.close()
-    connection.close()
+    invalidate_catalog()
     
     flash('Role deleted successfully!', 'success')
     return redirect(url_for('list_roles'))
@@ -410,8 +910,8 @@ def add_role_requirement(role_id):
     skill_id = request.form['skill_id']
     min_proficiency = request.form['min_proficiency_required']
     
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    connection = get_db()
+    cursor = get_cursor()
     
     cursor.execute("""
         INSERT INTO role_requirements (role_id, skill_id, min_proficiency_required) 
@@ -419,8 +919,7 @@ def add_role_requirement(role_id):
     """, (role_id, skill_id, min_proficiency))
     
     connection.commit()
-    cursor.close()
-    connection.close()
+    invalidate_catalog()
     
     flash('Skill requirement added successfully!', 'success')
     return redirect(url_for('view_role', role_id=role_id))
@@ -429,8 +928,8 @@ def add_role_requirement(role_id):
 @handle_db_error
 def delete_role_requirement(role_id, skill_id):
     """Remove skill requirement from a role"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    connection = get_db()
+    cursor = get_cursor()
     
     cursor.execute("""
         DELETE FROM role_requirements 
@@ -438,8 +937,7 @@ def delete_role_requirement(role_id, skill_id):
     """, (role_id, skill_id))
     
     connection.commit()
-    cursor.close()
-    connection.close()
+    invalidate_catalog()
     
     flash('Skill requirement removed successfully!', 'success')
     return redirect(url_for('view_role', role_id=role_id))
@@ -448,37 +946,17 @@ def delete_role_requirement(role_id, skill_id):
 
 @app.route('/members')
 @handle_db_error
+@conditional(table_version(MEMBER_TABLES))
 def list_members():
-    """List all team members"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
-    
-    cursor.execute("""
-        SELECT 
-            tm.mem_id,
-            CONCAT_WS(' ', tm.first_name, NULLIF(tm.middle_name, ''), tm.last_name) AS full_name,
-            tm.email,
-            tm.phone_no,
-            r.role_name,
-            COUNT(ms.skill_id) as skill_count
-        FROM team_members tm
-        LEFT JOIN roles r ON tm.role_id = r.role_id
-        LEFT JOIN mem_skills ms ON tm.mem_id = ms.mem_id
-        GROUP BY tm.mem_id
-        ORDER BY tm.first_name, tm.last_name
-    """)
-    
-    members = cursor.fetchall()
-    cursor.close()
-    connection.close()
-    
-    return render_template('members/list.html', members=members)
+    """List team members a page at a time, sorted and filtered on the server"""
+    return render_list_page('list_members', 'members/list.html', 'members/_cards.html', fetch_members_page, 'members')
+
 @app.route('/members/add', methods=['GET', 'POST'])
 @handle_db_error
 def add_member():
     """Add a new team member with skills and proficiency (triggers after_member_insert)"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
+    connection = get_db()
+    cursor = get_cursor()
     
     if request.method == 'POST':
         # Handle JSON request (for progressive save)
@@ -498,27 +976,21 @@ def add_member():
                 return jsonify({'success': False, 'message': 'Role selection is required'}), 400
             
             # Validate Gmail
-            gmail_regex = re.compile(r'^[a-zA-Z0-9._%+-]+@gmail\.com$')
-            if not gmail_regex.match(email):
+            if not GMAIL_RE.match(email):
                 return jsonify({'success': False, 'message': 'Only Gmail addresses (@gmail.com) are allowed'}), 400
             
             # Validate phone number (10 digits)
-            phone_regex = re.compile(r'^\d{10}$')
-            if not phone_regex.match(phone_no):
+            if not PHONE_RE.match(phone_no):
                 return jsonify({'success': False, 'message': 'Phone number must be exactly 10 digits'}), 400
             
             # Check for duplicate email
             cursor.execute("SELECT mem_id FROM team_members WHERE email = %s", (email,))
             if cursor.fetchone():
-                cursor.close()
-                connection.close()
                 return jsonify({'success': False, 'message': 'Email already exists'}), 400
             
             # Check for duplicate phone
             cursor.execute("SELECT mem_id FROM team_members WHERE phone_no = %s", (phone_no,))
             if cursor.fetchone():
-                cursor.close()
-                connection.close()
                 return jsonify({'success': False, 'message': 'Phone number already exists'}), 400
             
             try:
@@ -549,9 +1021,6 @@ def add_member():
                     if role_result:
                         role_name = role_result['role_name']
                 
-                cursor.close()
-                connection.close()
-                
                 return jsonify({
                     'success': True, 
                     'message': f'Member {first_name} {last_name} added successfully!',
@@ -560,9 +1029,7 @@ def add_member():
                 }), 200
                 
             except Error as e:
-                connection.rollback()
-                cursor.close()
-                connection.close()
+                rollback_db()
                 return jsonify({'success': False, 'message': f'Database error: {str(e)}'}), 500
         
         # Handle traditional form submission (if needed for backward compatibility)
@@ -577,24 +1044,16 @@ def add_member():
             # Validate role_id is provided
             if not role_id or role_id == '':
                 flash('Role selection is required', 'danger')
-                cursor.close()
-                connection.close()
                 return redirect(url_for('add_member'))
             
             # Validate Gmail
-            gmail_regex = re.compile(r'^[a-zA-Z0-9._%+-]+@gmail\.com$')
-            if not gmail_regex.match(email):
+            if not GMAIL_RE.match(email):
                 flash('Only Gmail addresses (@gmail.com) are allowed', 'danger')
-                cursor.close()
-                connection.close()
                 return redirect(request.referrer)
             
             # Validate phone number (10 digits)
-            phone_regex = re.compile(r'^\d{10}$')
-            if not phone_regex.match(phone_no):
+            if not PHONE_RE.match(phone_no):
                 flash('Phone number must be exactly 10 digits', 'danger')
-                cursor.close()
-                connection.close()
                 return redirect(request.referrer)
             
             # This INSERT will trigger after_member_insert
@@ -615,139 +1074,80 @@ def add_member():
                 """, (mem_id, skill_id, proficiency))
             
             connection.commit()
-            cursor.close()
-            connection.close()
             
             flash(f'Team member {first_name} {last_name} added successfully!', 'success')
             return redirect(url_for('list_members'))
     
-    # GET request - fetch all skills and roles with requirements
-    cursor.execute("""
-        SELECT skill_id, skill_name, category 
-        FROM skills 
-        ORDER BY category, skill_name
-    """)
-    all_skills = cursor.fetchall()
-    
-    cursor.execute("""
-        SELECT role_id, role_name, description 
-        FROM roles 
-        ORDER BY role_name
-    """)
-    all_roles = cursor.fetchall()
-    
-    # Get role requirements for dynamic filtering
-    cursor.execute("""
-        SELECT 
-            rr.role_id,
-            rr.skill_id,
-            rr.min_proficiency_required
-        FROM role_requirements rr
-        ORDER BY rr.role_id, rr.skill_id
-    """)
-    requirements = cursor.fetchall()
-    
-    # Organize requirements by role_id
-    role_requirements = {}
-    for req in requirements:
-        role_id = req['role_id']
-        if role_id not in role_requirements:
-            role_requirements[role_id] = []
-        role_requirements[role_id].append({
-            'skill_id': req['skill_id'],
-            'min_proficiency_required': req['min_proficiency_required']
-        })
-    
-    cursor.close()
-    connection.close()
-    
-    # Convert to JSON for JavaScript
-    import json
-    all_roles_json = json.dumps(all_roles)
-    role_requirements_json = json.dumps(role_requirements)
+    # GET request - skills, roles and requirements (for dynamic filtering) from the catalog
+    catalog = get_catalog(cursor)
     
     return render_template('members/add.html', 
-                         all_skills=all_skills,
-                         all_roles_json=all_roles_json,
-                         role_requirements_json=role_requirements_json)
+                         all_skills=catalog['skills'],
+                         all_roles_json=catalog['roles_json'],
+                         role_requirements_json=catalog['role_requirements_json'])
 
 
 @app.route('/members/<int:mem_id>')
 @handle_db_error
 def view_member(mem_id):
     """View member profile with skills"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
-    
-    # Get member details
-    cursor.execute("""
-        SELECT 
-            tm.*,
-            r.role_name,
-            r.description as role_description,
-            CONCAT_WS(' ', tm.first_name, NULLIF(tm.middle_name, ''), tm.last_name) AS full_name
-        FROM team_members tm
-        LEFT JOIN roles r ON tm.role_id = r.role_id
-        WHERE tm.mem_id = %s
-    """, (mem_id,))
-    member = cursor.fetchone()
+    cursor = get_cursor()
+    
+    # Independent reads run side by side on pooled connections
+    found = fan_out.run(cursor, {
+        'member': fetchone("""
+            SELECT 
+                tm.*,
+                r.role_name,
+                r.description as role_description,
+                CONCAT_WS(' ', tm.first_name, NULLIF(tm.middle_name, ''), tm.last_name) AS full_name
+            FROM team_members tm
+            LEFT JOIN roles r ON tm.role_id = r.role_id
+            WHERE tm.mem_id = %s
+        """, (mem_id,)),
+        'skills': fetchall("""
+            SELECT 
+                s.skill_id,
+                s.skill_name,
+                s.category,
+                ms.proficiency_level,
+                ms.updated_at
+            FROM mem_skills ms
+            JOIN skills s ON ms.skill_id = s.skill_id
+            WHERE ms.mem_id = %s
+            ORDER BY s.category, s.skill_name
+        """, (mem_id,)),
+        'catalog': get_catalog,
+        'state': analytics_state.sync,
+    })
+    member = found['member']
     
     if not member:
         flash('Member not found', 'warning')
         return redirect(url_for('list_members'))
     
-    # Get member skills
-    cursor.execute("""
-        SELECT 
-            s.skill_id,
-            s.skill_name,
-            s.category,
-            ms.proficiency_level,
-            ms.updated_at
-        FROM mem_skills ms
-        JOIN skills s ON ms.skill_id = s.skill_id
-        WHERE ms.mem_id = %s
-        ORDER BY s.category, s.skill_name
-    """, (mem_id,))
-    skills = cursor.fetchall()
-    
-    # Get all available skills for adding new ones
-    cursor.execute("""
-        SELECT skill_id, skill_name, category 
-        FROM skills 
-        WHERE skill_id NOT IN (
-            SELECT skill_id FROM mem_skills WHERE mem_id = %s
-        )
-        ORDER BY category, skill_name
-    """, (mem_id,))
-    available_skills = cursor.fetchall()
-    
-    # Get eligible roles using stored procedure
-    cursor.callproc('Get_Eligible_Roles_For_Member', (mem_id,))
-    eligible_roles = []
-    for result in cursor.stored_results():
-        eligible_roles = result.fetchall()
-    
-    # Get all roles for the dropdown
-    cursor.execute("SELECT role_id, role_name FROM roles ORDER BY role_name")
-    all_roles = cursor.fetchall()
+    # Catalog skills the member doesn't have yet, for adding new ones
+    skills = found['skills']
+    catalog = found['catalog']
+    held = {skill['skill_id'] for skill in skills}
+    available_skills = [skill for skill in catalog['skills'] if skill['skill_id'] not in held]
     
-    cursor.close()
-    connection.close()
+    # Eligible roles from the bitset index (same answer as Get_Eligible_Roles_For_Member)
+    eligible_roles = eligibility.eligible_roles(mem_id)
     
     return render_template('members/view.html', 
                          member=member, 
                          skills=skills,
                          available_skills=available_skills,
                          eligible_roles=eligible_roles,
-                         all_roles=all_roles)
+                         all_roles=catalog['roles'])
 
 @app.route('/members/<int:mem_id>/edit', methods=['GET', 'POST'])
 @handle_db_error
 def edit_member(mem_id):
     """Edit team member details with skill management and proficiency (triggers after_member_update and validate_role_eligibility)"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
+    connection = get_db()
+    cursor = get_cursor()
     
     if request.method == 'POST':
         first_name = request.form['first_name'].strip()
@@ -770,40 +1170,28 @@ def edit_member(mem_id):
         # Validate role_id is provided
         if not role_id or role_id == '':
             flash('Role selection is required', 'danger')
-            cursor.close()
-            connection.close()
             return redirect(url_for('edit_member', mem_id=mem_id))
         
         # Validate Gmail
-        gmail_regex = re.compile(r'^[a-zA-Z0-9._%+-]+@gmail\.com$')
-        if not gmail_regex.match(email):
+        if not GMAIL_RE.match(email):
             flash('Only Gmail addresses (@gmail.com) are allowed', 'danger')
-            cursor.close()
-            connection.close()
             return redirect(url_for('edit_member', mem_id=mem_id))
         
         # Validate phone number (10 digits)
-        phone_regex = re.compile(r'^\d{10}$')
-        if not phone_regex.match(phone_no):
+        if not PHONE_RE.match(phone_no):
             flash('Phone number must be exactly 10 digits', 'danger')
-            cursor.close()
-            connection.close()
             return redirect(url_for('edit_member', mem_id=mem_id))
         
         # Check for duplicate email (excluding current member)
         cursor.execute("SELECT mem_id FROM team_members WHERE email = %s AND mem_id != %s", (email, mem_id))
         if cursor.fetchone():
             flash('Email already exists for another member', 'danger')
-            cursor.close()
-            connection.close()
             return redirect(url_for('edit_member', mem_id=mem_id))
         
         # Check for duplicate phone (excluding current member)
         cursor.execute("SELECT mem_id FROM team_members WHERE phone_no = %s AND mem_id != %s", (phone_no, mem_id))
         if cursor.fetchone():
             flash('Phone number already exists for another member', 'danger')
-            cursor.close()
-            connection.close()
             return redirect(url_for('edit_member', mem_id=mem_id))
         
         try:
@@ -826,31 +1214,15 @@ def edit_member(mem_id):
                 WHERE mem_id = %s
             """, (first_name, middle_name, last_name, email, phone_no, role_id, mem_id))
             
-            # Add new skills with their proficiency levels
-            for skill_id in skills_to_add:
-                proficiency = skill_proficiencies.get(skill_id, 3)
-                cursor.execute("""
-                    INSERT INTO mem_skills (mem_id, skill_id, proficiency_level) 
-                    VALUES (%s, %s, %s)
-                """, (mem_id, skill_id, proficiency))
-            
-            # Update proficiency for existing skills (only if changed)
-            for skill_id in skills_to_update:
-                new_proficiency = skill_proficiencies.get(skill_id, 3)
-                old_proficiency = current_skills_data.get(skill_id)
-                if new_proficiency != old_proficiency:
-                    cursor.execute("""
-                        UPDATE mem_skills 
-                        SET proficiency_level = %s 
-                        WHERE mem_id = %s AND skill_id = %s
-                    """, (new_proficiency, mem_id, skill_id))
-            
-            # Remove deselected skills
-            for skill_id in skills_to_remove:
-                cursor.execute("""
-                    DELETE FROM mem_skills 
-                    WHERE mem_id = %s AND skill_id = %s
-                """, (mem_id, skill_id))
+            # New skills plus existing ones whose proficiency changed, written in one upsert;
+            # deselected skills in one DELETE (triggers after_memskill_insert / _update / _delete)
+            levels = {
+                skill_id: skill_proficiencies.get(skill_id, 3)
+                for skill_id in sorted(skills_to_add | skills_to_update)
+                if skill_proficiencies.get(skill_id, 3) != current_skills_data.get(skill_id)
+            }
+            apply_skill_changes(cursor, 'mem_skills', 'mem_id', mem_id,
+                                'proficiency_level', levels, sorted(skills_to_remove))
             
             connection.commit()
             
@@ -867,114 +1239,66 @@ def edit_member(mem_id):
                 flash('Member updated successfully!', 'success')
             
         except Error as e:
-            connection.rollback()
+            rollback_db()
             # Check if it's the role eligibility error
             if '45000' in str(e) or 'Ineligible for Role' in str(e):
                 flash('Cannot assign this role: Member does not meet the minimum skill requirements.', 'danger')
             else:
                 flash(f'Error updating member: {str(e)}', 'danger')
         
-        cursor.close()
-        connection.close()
-        
         return redirect(url_for('list_members'))
     
-    # GET request
-    cursor.execute("""
-        SELECT 
-            tm.*,
-            CONCAT_WS(' ', tm.first_name, NULLIF(tm.middle_name, ''), tm.last_name) AS full_name
-        FROM team_members tm
-        WHERE tm.mem_id = %s
-    """, (mem_id,))
-    member = cursor.fetchone()
+    # GET request - independent reads run side by side on pooled connections
+    found = fan_out.run(cursor, {
+        'member': fetchone("""
+            SELECT 
+                tm.*,
+                CONCAT_WS(' ', tm.first_name, NULLIF(tm.middle_name, ''), tm.last_name) AS full_name
+            FROM team_members tm
+            WHERE tm.mem_id = %s
+        """, (mem_id,)),
+        # Member's current skills WITH proficiency levels
+        'member_skills': fetchall("""
+            SELECT skill_id, proficiency_level 
+            FROM mem_skills 
+            WHERE mem_id = %s
+        """, (mem_id,)),
+        'catalog': get_catalog,
+    })
+    member = found['member']
     
     if not member:
         flash('Member not found', 'warning')
-        cursor.close()
-        connection.close()
         return redirect(url_for('list_members'))
     
-    # Get all skills
-    cursor.execute("""
-        SELECT skill_id, skill_name, category 
-        FROM skills 
-        ORDER BY category, skill_name
-    """)
-    all_skills = cursor.fetchall()
-    
-    # Get member's current skills WITH proficiency levels
-    cursor.execute("""
-        SELECT skill_id, proficiency_level 
-        FROM mem_skills 
-        WHERE mem_id = %s
-    """, (mem_id,))
-    member_skills_data = cursor.fetchall()
+    catalog = found['catalog']
+    member_skills_data = found['member_skills']
     member_skill_ids = [row['skill_id'] for row in member_skills_data]
     member_skill_proficiencies = {row['skill_id']: row['proficiency_level'] for row in member_skills_data}
     
-    # Get all roles for dropdown
-    cursor.execute("""
-        SELECT role_id, role_name, description 
-        FROM roles 
-        ORDER BY role_name
-    """)
-    all_roles = cursor.fetchall()
-    
-    # Get role requirements for dynamic filtering
-    cursor.execute("""
-        SELECT 
-            rr.role_id,
-            rr.skill_id,
-            rr.min_proficiency_required
-        FROM role_requirements rr
-        ORDER BY rr.role_id, rr.skill_id
-    """)
-    requirements = cursor.fetchall()
-    
-    # Organize requirements by role_id
-    role_requirements = {}
-    for req in requirements:
-        role_id = req['role_id']
-        if role_id not in role_requirements:
-            role_requirements[role_id] = []
-        role_requirements[role_id].append({
-            'skill_id': req['skill_id'],
-            'min_proficiency_required': req['min_proficiency_required']
-        })
-    
-    cursor.close()
-    connection.close()
-    
-    # Convert to JSON for JavaScript
-    import json
-    all_roles_json = json.dumps(all_roles)
-    role_requirements_json = json.dumps(role_requirements)
+    # Convert to JSON for JavaScript (the catalog blobs are serialized once)
     member_skill_proficiencies_json = json.dumps(member_skill_proficiencies)
     
     return render_template('members/edit.html', 
                          member=member,
-                         all_skills=all_skills,
+                         all_skills=catalog['skills'],
                          member_skill_ids=member_skill_ids,
                          member_skill_proficiencies=member_skill_proficiencies_json,
-                         all_roles=all_roles,
-                         all_roles_json=all_roles_json,
-                         role_requirements_json=role_requirements_json)
+                         all_roles=catalog['roles'],
+                         all_roles_json=catalog['roles_json'],
+                         role_requirements_json=catalog['role_requirements_json'])
 
 @app.route('/members/<int:mem_id>/delete', methods=['POST'])
 @handle_db_error
 def delete_member(mem_id):
     """Delete a team member (triggers after_member_delete)"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    connection = get_db()
+    cursor = get_cursor()
     
     # This DELETE will trigger after_member_delete
     cursor.execute("DELETE FROM team_members WHERE mem_id = %s", (mem_id,))
     connection.commit()
     
-    cursor.close()
-    connection.close()
-    
     flash('Member deleted successfully!', 'success')
     return redirect(url_for('list_members'))
 
@@ -982,37 +1306,18 @@ def delete_member(mem_id):
 
 @app.route('/skills')
 @handle_db_error
+@conditional(table_version(SKILL_TABLES))
 def list_skills():
-    """List all skills in catalog"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
-    
-    cursor.execute("""
-        SELECT 
-            s.skill_id,
-            s.skill_name,
-            s.category,
-            COUNT(DISTINCT ms.mem_id) as member_count,
-            COALESCE(AVG(ms.proficiency_level), 0) as avg_proficiency
-        FROM skills s
-        LEFT JOIN mem_skills ms ON s.skill_id = ms.skill_id
-        GROUP BY s.skill_id
-        ORDER BY s.category, s.skill_name
-    """)
-    
-    skills = cursor.fetchall()
-    cursor.close()
-    connection.close()
-    
-    return render_template('skills/list.html', skills=skills)
+    """List the skills catalog a page at a time, sorted and filtered on the server"""
+    return render_list_page('list_skills', 'skills/list.html', 'skills/_rows.html', fetch_skills_page, 'skills')
 
 
 @app.route('/skills/add', methods=['GET', 'POST'])
 @handle_db_error
 def add_skill():
     """Add a new skill to catalog with optional role assignments (triggers after_skill_insert)"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
+    connection = get_db()
+    cursor = get_cursor()
     
     if request.method == 'POST':
         # Check if it's a JSON request (from new add page)
@@ -1042,8 +1347,7 @@ def add_skill():
                     """, (role_id, skill_id, min_prof))
             
             connection.commit()
-            cursor.close()
-            connection.close()
+            invalidate_catalog()
             
             return jsonify({
                 'success': True,
@@ -1078,77 +1382,60 @@ def add_skill():
                         """, (role_id, skill_id, min_prof))
             
             connection.commit()
-            cursor.close()
-            connection.close()
+            invalidate_catalog()
             
             flash(f'Skill "{skill_name}" added successfully!', 'success')
             return redirect(url_for('view_skill', skill_id=skill_id))
     
-    # GET request - get all roles for the dropdown
-    cursor.execute("""
-        SELECT role_id, role_name, description 
-        FROM roles 
-        ORDER BY role_name
-    """)
-    roles = cursor.fetchall()
-    
-    cursor.close()
-    connection.close()
-    
-    # Convert roles to JSON for JavaScript
-    import json
-    roles_json = json.dumps(roles)
+    # GET request - roles for the dropdown, already serialized for JavaScript
+    catalog = get_catalog(cursor)
     
     categories = ['Technical', 'Clinical', 'Soft Skill', 'Regulatory']
-    return render_template('skills/add.html', categories=categories, roles_json=roles_json, all_roles=roles)
+    return render_template('skills/add.html', categories=categories, roles_json=catalog['roles_json'],
+                           all_roles=catalog['roles'])
 
 @app.route('/skills/<int:skill_id>')
 @handle_db_error
 def view_skill(skill_id):
     """View skill details and who has it"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
-    
-    # Get skill details
-    cursor.execute("SELECT * FROM skills WHERE skill_id = %s", (skill_id,))
-    skill = cursor.fetchone()
+    cursor = get_cursor()
+    
+    # Independent reads run side by side on pooled connections
+    found = fan_out.run(cursor, {
+        'skill': fetchone("SELECT * FROM skills WHERE skill_id = %s", (skill_id,)),
+        'members': fetchall("""
+            SELECT 
+                tm.mem_id,
+                CONCAT_WS(' ', tm.first_name, NULLIF(tm.middle_name, ''), tm.last_name) AS full_name,
+                r.role_name,
+                tm.email,
+                ms.proficiency_level,
+                ms.updated_at
+            FROM mem_skills ms
+            JOIN team_members tm ON ms.mem_id = tm.mem_id
+            LEFT JOIN roles r ON tm.role_id = r.role_id
+            WHERE ms.skill_id = %s
+            ORDER BY ms.proficiency_level DESC, tm.first_name, tm.last_name
+        """, (skill_id,)),
+        'required_by_roles': fetchall("""
+            SELECT 
+                r.role_id,
+                r.role_name,
+                rr.min_proficiency_required
+            FROM role_requirements rr
+            JOIN roles r ON rr.role_id = r.role_id
+            WHERE rr.skill_id = %s
+            ORDER BY r.role_name
+        """, (skill_id,)),
+    })
+    skill = found['skill']
     
     if not skill:
         flash('Skill not found', 'warning')
         return redirect(url_for('list_skills'))
     
-    # Get members with this skill
-    cursor.execute("""
-        SELECT 
-            tm.mem_id,
-            CONCAT_WS(' ', tm.first_name, NULLIF(tm.middle_name, ''), tm.last_name) AS full_name,
-            r.role_name,
-            tm.email,
-            ms.proficiency_level,
-            ms.updated_at
-        FROM mem_skills ms
-        JOIN team_members tm ON ms.mem_id = tm.mem_id
-        LEFT JOIN roles r ON tm.role_id = r.role_id
-        WHERE ms.skill_id = %s
-        ORDER BY ms.proficiency_level DESC, tm.first_name, tm.last_name
-    """, (skill_id,))
-    members = cursor.fetchall()
-    
-    # Get roles requiring this skill
-    cursor.execute("""
-        SELECT 
-            r.role_id,
-            r.role_name,
-            rr.min_proficiency_required
-        FROM role_requirements rr
-        JOIN roles r ON rr.role_id = r.role_id
-        WHERE rr.skill_id = %s
-        ORDER BY r.role_name
-    """, (skill_id,))
-    required_by_roles = cursor.fetchall()
-    
-    cursor.close()
-    connection.close()
+    members = found['members']
+    required_by_roles = found['required_by_roles']
     
     return render_template('skills/view.html', 
                          skill=skill, 
@@ -1160,8 +1447,8 @@ def view_skill(skill_id):
 @handle_db_error
 def edit_skill(skill_id):
     """Edit skill name, category, and role assignments (triggers after_skill_update_master)"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
+    connection = get_db()
+    cursor = get_cursor()
     
     if request.method == 'POST':
         skill_name = request.form['skill_name'].strip()
@@ -1182,14 +1469,10 @@ def edit_skill(skill_id):
         # Validate inputs
         if not skill_name:
             flash('Skill name cannot be empty', 'danger')
-            cursor.close()
-            connection.close()
             return redirect(url_for('edit_skill', skill_id=skill_id))
         
         if category not in ['Technical', 'Clinical', 'Soft Skill', 'Regulatory']:
             flash('Invalid category selected', 'danger')
-            cursor.close()
-            connection.close()
             return redirect(url_for('edit_skill', skill_id=skill_id))
         
         # This UPDATE will trigger after_skill_update_master
@@ -1227,8 +1510,7 @@ def edit_skill(skill_id):
                     """, (role_id, skill_id, min_prof))
         
         connection.commit()
-        cursor.close()
-        connection.close()
+        invalidate_catalog()
         
         flash(f'Skill "{skill_name}" updated successfully!', 'success')
         return redirect(url_for('view_skill', skill_id=skill_id))
@@ -1239,8 +1521,6 @@ def edit_skill(skill_id):
     
     if not skill:
         flash('Skill not found', 'warning')
-        cursor.close()
-        connection.close()
         return redirect(url_for('list_skills'))
     
     # Get existing role requirements for this skill
@@ -1267,9 +1547,6 @@ def edit_skill(skill_id):
     """, (skill_id,))
     available_roles = cursor.fetchall()
     
-    cursor.close()
-    connection.close()
-    
     # Convert to JSON for JavaScript
     import json
     available_roles_json = json.dumps(available_roles)
@@ -1287,15 +1564,13 @@ def edit_skill(skill_id):
 @handle_db_error
 def delete_skill(skill_id):
     """Delete a skill from catalog (triggers after_skill_delete)"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    connection = get_db()
+    cursor = get_cursor()
     
     # This DELETE will trigger after_skill_delete
     cursor.execute("DELETE FROM skills WHERE skill_id = %s", (skill_id,))
     connection.commit()
-    
-    cursor.close()
-    connection.close()
+    invalidate_catalog()
     
     flash('Skill deleted successfully!', 'success')
     return redirect(url_for('list_skills'))
@@ -1309,8 +1584,8 @@ def add_member_skill(mem_id):
     skill_id = request.form['skill_id']
     proficiency_level = request.form['proficiency_level']
     
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    connection = get_db()
+    cursor = get_cursor()
     
     # This INSERT will trigger after_memskill_insert
     cursor.execute("""
@@ -1319,8 +1594,6 @@ def add_member_skill(mem_id):
     """, (mem_id, skill_id, proficiency_level))
     
     connection.commit()
-    cursor.close()
-    connection.close()
     
     flash('Skill added successfully!', 'success')
     return redirect(url_for('view_member', mem_id=mem_id))
@@ -1331,8 +1604,8 @@ def update_member_skill(mem_id, skill_id):
     """Update skill proficiency level (triggers after_memskill_update)"""
     proficiency_level = request.form['proficiency_level']
     
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    connection = get_db()
+    cursor = get_cursor()
     
     # This UPDATE will trigger after_memskill_update (only logs if level actually changed)
     cursor.execute("""
@@ -1342,8 +1615,6 @@ def update_member_skill(mem_id, skill_id):
     """, (proficiency_level, mem_id, skill_id))
     
     connection.commit()
-    cursor.close()
-    connection.close()
     
     flash('Skill proficiency updated successfully!', 'success')
     return redirect(url_for('view_member', mem_id=mem_id))
@@ -1352,8 +1623,8 @@ def update_member_skill(mem_id, skill_id):
 @handle_db_error
 def delete_member_skill(mem_id, skill_id):
     """Remove a skill from a member (triggers after_memskill_delete)"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    connection = get_db()
+    cursor = get_cursor()
     
     # This DELETE will trigger after_memskill_delete
     cursor.execute("""
@@ -1362,76 +1633,98 @@ def delete_member_skill(mem_id, skill_id):
     """, (mem_id, skill_id))
     
     connection.commit()
-    cursor.close()
-    connection.close()
     
     flash('Skill removed successfully!', 'success')
     return redirect(url_for('view_member', mem_id=mem_id))
 
-# ==================== FIND EXPERTS (Stored Procedure) ====================
+# ==================== FIND EXPERTS ====================
 
-@app.route('/find-experts', methods=['GET', 'POST'])
-@handle_db_error
-def find_experts():
-    """Find experts for a project using stored procedure Find_Experts_For_Project"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
+def parse_skill_terms(values, min_proficiency=1):
+    """``(terms, names)`` from ``Name[:level]`` strings or ``{'skill', 'min_proficiency'}`` objects
 
-    cursor.execute(
-        "SELECT skill_id, skill_name, category FROM skills ORDER BY category, skill_name"
-    )
-    all_skills = cursor.fetchall()
-
-    experts = []
-    selected_skill = None
-    min_proficiency = 1
-
-    # Handle both GET (for AJAX) and POST requests
-    if request.method == 'POST' or request.method == 'GET':
-        if request.method == 'POST':
-            selected_skill = request.form.get('skill_name', '').strip()
-            min_proficiency = int(request.form.get('min_proficiency', 1))
-        else:  # GET request
-            selected_skill = request.args.get('skill', '').strip()
-            min_proficiency = int(request.args.get('min_proficiency', 1))
-        
-        # If no skill selected, get all members with their highest proficiency skill
-        if not selected_skill or selected_skill == '':
-            # Get all members with their best skill
-            cursor.execute("""
-                SELECT 
-                    CONCAT_WS(' ', tm.first_name, NULLIF(tm.middle_name, ''), tm.last_name) AS 'Team Member',
-                    r.role_name AS 'Job Role',
-                    tm.email AS 'Contact Email',
-                    s.skill_name AS 'Skill',
-                    ms.proficiency_level AS 'Proficiency'
-                FROM team_members tm
-                LEFT JOIN roles r ON tm.role_id = r.role_id
-                INNER JOIN mem_skills ms ON tm.mem_id = ms.mem_id
-                INNER JOIN skills s ON ms.skill_id = s.skill_id
-                WHERE ms.proficiency_level >= %s
-                ORDER BY ms.proficiency_level DESC, tm.first_name, tm.last_name
-            """, (min_proficiency,))
-            experts = cursor.fetchall()
+    Skills are names or ids; a need without a level uses ``min_proficiency``.
+    Raises ValueError for unknown skills and levels outside 1-3.
+    """
+    terms, names = [], []
+    for value in values:
+        if isinstance(value, dict):
+            name = value.get('skill') or value.get('skill_id') or value.get('skill_name') or ''
+            level = value.get('min_proficiency', min_proficiency)
         else:
-            # Call stored procedure for specific skill
-            cursor.callproc(
-                'Find_Experts_For_Project',
-                (selected_skill, min_proficiency)
-            )
+            value = str(value).strip()
+            name, _, level = value.rpartition(':')
+            if not (name and level.strip().isdigit()):
+                name, level = value, min_proficiency
+        name = str(name).strip()
+        if not name:
+            continue
+        skill_id = expert_index.skill_id(name)
+        if skill_id is None:
+            raise ValueError(f"Unknown skill '{name}'")
+        try:
+            level = int(level)
+        except (TypeError, ValueError):
+            level = 0
+        if not 1 <= level <= 3:
+            raise ValueError(f"Proficiency for '{name}' must be 1, 2 or 3")
+        terms.append((skill_id, level))
+        names.append(name)
+    return terms, names
+
+
+def parse_expert_query(args):
+    """Search terms from ``skill`` (name or id, optionally ``:level``; repeatable), min_proficiency, mode, limit, offset"""
+    try:
+        min_proficiency = int(args.get('min_proficiency', 1))
+        limit = min(int(args.get('limit', EXPERTS_PAGE)), EXPERTS_PAGE_MAX)
+        offset = int(args.get('offset', 0))
+    except ValueError:
+        raise ValueError('min_proficiency, limit and offset must be numbers')
+    if not 1 <= min_proficiency <= 3:
+        raise ValueError('min_proficiency must be 1, 2 or 3')
+    if limit < 1 or offset < 0:
+        raise ValueError('limit must be positive and offset not negative')
+    mode = args.get('mode', 'all').lower()
+    if mode not in MODES:
+        raise ValueError("mode must be 'all' or 'any'")
+
+    terms, names = parse_skill_terms(args.getlist('skill') + args.getlist('skill_name'), min_proficiency)
+    return {
+        'terms': terms, 'skill_names': names, 'mode': mode,
+        'min_proficiency': min_proficiency, 'limit': limit, 'offset': offset,
+    }
+
 
-            for result in cursor.stored_results():
-                experts = result.fetchall()
+def search_experts(query):
+    """``(total, rows)`` for a parsed expert query, from the in-memory index"""
+    return expert_index.search(query['terms'], query['mode'], query['limit'], query['offset'],
+                               query['min_proficiency'])
 
-    cursor.close()
-    connection.close()
+
+@app.route('/find-experts', methods=['GET', 'POST'])
+@handle_db_error
+def find_experts():
+    """Find experts for one or more skills from the in-memory expert index"""
+    cursor = get_cursor()
+    analytics_state.sync(cursor)
+    all_skills = get_catalog(cursor)['skills']
+
+    try:
+        query = parse_expert_query(request.values)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        query = parse_expert_query(MultiDict())
+    total, experts = search_experts(query)
 
     return render_template(
         'find_experts.html',
         all_skills=all_skills,
         experts=experts,
-        selected_skill=selected_skill,
-        min_proficiency=min_proficiency
+        total=total,
+        selected_skills=query['skill_names'],
+        selected_skill=', '.join(query['skill_names']),
+        mode=query['mode'],
+        min_proficiency=query['min_proficiency']
     )
 
 # ==================== MEMBER PROFILE (Stored Procedure) ====================
@@ -1440,8 +1733,7 @@ def find_experts():
 @handle_db_error
 def member_profile(email):
     """Get member profile using stored procedure Get_Member_Profile"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
+    cursor = get_cursor()
     
     # Call stored procedure
     cursor.callproc('Get_Member_Profile', (email,))
@@ -1451,9 +1743,6 @@ def member_profile(email):
     for result in cursor.stored_results():
         profile_data = result.fetchall()
     
-    cursor.close()
-    connection.close()
-    
     if not profile_data:
         flash('Member not found', 'warning')
         return redirect(url_for('list_members'))
@@ -1467,14 +1756,13 @@ def member_profile(email):
     
     return render_template('member_profile.html', member=member, skills=profile_data)
 
-# ==================== ELIGIBLE ROLES (Stored Procedure) ====================
+# ==================== ELIGIBLE ROLES ====================
 
 @app.route('/members/<int:mem_id>/eligible-roles')
 @handle_db_error
 def eligible_roles(mem_id):
-    """View roles that member is eligible for using Get_Eligible_Roles_For_Member"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
+    """View roles that member is eligible for, from the in-memory eligibility engine"""
+    cursor = get_cursor()
     
     # Get member details
     cursor.execute("""
@@ -1491,15 +1779,9 @@ def eligible_roles(mem_id):
         flash('Member not found', 'warning')
         return redirect(url_for('list_members'))
     
-    # Call stored procedure
-    cursor.callproc('Get_Eligible_Roles_For_Member', (mem_id,))
-    
-    eligible = []
-    for result in cursor.stored_results():
-        eligible = result.fetchall()
-    
-    cursor.close()
-    connection.close()
+    # Bitset index kept current from audit_logs (same answer as Get_Eligible_Roles_For_Member)
+    analytics_state.sync(cursor)
+    eligible = eligibility.eligible_roles(mem_id)
     
     return render_template('members/eligible_roles.html', 
                          member=member, 
@@ -1507,355 +1789,298 @@ def eligible_roles(mem_id):
 
 # ==================== AUDIT LOGS ====================
 
+# Newest first only: pages run on into the archive, which is read newest first
+AUDIT_KEYSET = Keyset({
+    'date': [('change_date', 'change_date'), ('log_id', 'log_id')],
+}, default_sort='date', default_order='desc', default_limit=100, max_limit=500, orders=('desc',))
+
+audit_facet_cache = TTLCache('audit_facets', ttl=float(os.getenv('AUDIT_FACET_CACHE_TTL', 300)))
+
+# Closed months of audit_logs live here as compressed segments (see audit_archive.py)
+audit_archive = AuditArchive(os.getenv('AUDIT_ARCHIVE_DIR', 'audit_archive'))
+
+
+def get_audit_facets(cursor):
+    """Distinct table names and operations for the filter dropdowns, cached"""
+    def load():
+        # Both are answered by a loose index scan on the audit_logs indexes
+        cursor.execute("SELECT DISTINCT table_name FROM audit_logs ORDER BY table_name")
+        tables = [row['table_name'] for row in cursor.fetchall()]
+        cursor.execute("SELECT DISTINCT operation_type FROM audit_logs ORDER BY operation_type")
+        operations = [row['operation_type'] for row in cursor.fetchall()]
+        archived_tables, archived_operations = audit_archive.facets()
+        return {
+            'tables': sorted(set(tables) | archived_tables),
+            'operations': sorted(set(operations) | archived_operations),
+        }
+
+    return audit_facet_cache.get_or_load('facets', load)
+
+
+def _parse_day(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
+
+
+def audit_filters(args):
+    """Filter values from the query string (unset ones are empty strings)"""
+    return {
+        key: args.get(key, '').strip()
+        for key in ('table', 'operation', 'record_id', 'date_from', 'date_to')
+    }
+
+
+def fetch_audit_page(cursor, args):
+    """One page of audit logs, newest first (only), seeking on (change_date, log_id)
+
+    Archived months are older than every live row, so a page that runs off
+    the end of the live table is filled from the archive segments.
+    """
+    filters = audit_filters(args)
+    bounds = {key: filters[key] for key in ('table', 'operation', 'record_id')}
+    if filters['date_from']:
+        bounds['date_from'] = _parse_day(filters['date_from'], 'From date')
+    if filters['date_to']:
+        # Inclusive: everything before the start of the next day
+        bounds['date_to'] = _parse_day(filters['date_to'], 'To date') + timedelta(days=1)
+
+    where, params = [], []
+    for key, condition in (('table', "table_name = %s"), ('operation', "operation_type = %s"),
+                           ('record_id', "record_id = %s"), ('date_from', "change_date >= %s"),
+                           ('date_to', "change_date < %s")):
+        if bounds.get(key):
+            where.append(condition)
+            params.append(bounds[key])
+
+    page, rows = fetch_keyset_rows(cursor, AUDIT_KEYSET, args, "SELECT * FROM audit_logs", where, params)
+    if len(rows) <= page.limit:
+        if rows:
+            before = (rows[-1]['change_date'], rows[-1]['log_id'])
+        else:
+            before = page.after
+        rows += islice(audit_archive.read(bounds, before), page.limit + 1 - len(rows))
+    return AUDIT_KEYSET.page(rows, page)
+
+
 @app.route('/audit-logs')
 @handle_db_error
 def audit_logs():
-    """View audit log history (populated by triggers)"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
-    
-    # Filter parameters
-    table_filter = request.args.get('table', '')
-    operation_filter = request.args.get('operation', '')
-    limit = request.args.get('limit', 100, type=int)
-    
-    query = "SELECT * FROM audit_logs WHERE 1=1"
-    params = []
-    
-    if table_filter:
-        query += " AND table_name = %s"
-        params.append(table_filter)
-    
-    if operation_filter:
-        query += " AND operation_type = %s"
-        params.append(operation_filter)
-    
-    query += " ORDER BY change_date DESC LIMIT %s"
-    params.append(limit)
-    
-    cursor.execute(query, params)
-    logs = cursor.fetchall()
-    
-    # Get distinct tables and operations for filters
-    cursor.execute("SELECT DISTINCT table_name FROM audit_logs ORDER BY table_name")
-    tables = cursor.fetchall()
+    """View audit log history (populated by triggers), one keyset page at a time"""
+    cursor = get_cursor()
     
-    cursor.execute("SELECT DISTINCT operation_type FROM audit_logs ORDER BY operation_type")
-    operations = cursor.fetchall()
+    try:
+        page = fetch_audit_page(cursor, request.args)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('audit_logs'))
     
-    cursor.close()
-    connection.close()
+    filters = audit_filters(request.args)
+    facets = get_audit_facets(cursor)
     
     return render_template('audit_logs.html', 
-                         logs=logs,
-                         tables=tables,
-                         operations=operations,
-                         table_filter=table_filter,
-                         operation_filter=operation_filter,
-                         limit=limit)
+                         logs=page['items'],
+                         next_cursor=page['next_cursor'],
+                         tables=facets['tables'],
+                         operations=facets['operations'],
+                         filters=filters,
+                         filtered=any(filters.values()),
+                         paged=bool(request.args.get('cursor')),
+                         limit=page['limit'])
+
+
+@app.cli.command('audit-archive')
+@click.option('--dry-run', is_flag=True, help='List what would be archived without changing anything')
+def audit_archive_command(dry_run):
+    """Add upcoming audit_logs partitions and archive months past AUDIT_HOT_MONTHS"""
+    connection = get_db_connection()
+    if connection is None:
+        raise click.ClickException('Database connection failed')
+    try:
+        cursor = connection.cursor(dictionary=True, buffered=True)
+        partitions = list_partitions(cursor)
+        if not partitions:
+            raise click.ClickException('audit_logs is not partitioned (see MySQL/DDL.sql)')
+
+        closed = closed_partitions(partitions, hot_months=int(os.getenv('AUDIT_HOT_MONTHS', 3)))
+        if dry_run:
+            for partition in closed:
+                click.echo(f'would archive {partition.name} (~{partition.row_estimate} rows)')
+            return
+
+        added = ensure_partitions(cursor, months_ahead=int(os.getenv('AUDIT_PARTITIONS_AHEAD', 3)))
+        if added:
+            click.echo(f"added partitions: {', '.join(added)}")
+        cursor.close()
+        for partition in closed:
+            try:
+                entry = archive_partition(connection, audit_archive, partition)
+            except RuntimeError as e:
+                raise click.ClickException(str(e))
+            click.echo(f"archived {partition.name}: {entry['rows']} rows -> {entry['file']}")
+        audit_facet_cache.invalidate()
+    finally:
+        connection.close()
+
+
+@app.cli.command('audit-verify')
+def audit_verify_command():
+    """Check every archived audit segment against its manifest checksum and row count"""
+    problems = 0
+    for entry, problem in audit_archive.verify():
+        if problem:
+            problems += 1
+            click.echo(f'FAILED {problem}')
+        else:
+            click.echo(f"ok {entry['file']} ({entry['rows']} rows)")
+    if problems:
+        raise click.ClickException(f'{problems} archived segment(s) failed verification')
+
+
+# ==================== BULK IMPORT ====================
+
+@app.cli.command('import-members')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--dry-run', is_flag=True, help='Validate only; nothing is written')
+@click.option('--chunk-size', default=CHUNK_ROWS, show_default=True, help='Members per transaction')
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False), help='Write every row error to this CSV file')
+def import_members_command(path, dry_run, chunk_size, errors_path):
+    """Bulk-import team members and their skills from a CSV or JSON file"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    try:
+        rows = parse_members(data, 'json' if path.lower().endswith('.json') else 'csv')
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    connection = get_db_connection()
+    if connection is None:
+        raise click.ClickException('Database connection failed')
+    try:
+        report = import_members(connection, rows, dry_run=dry_run, chunk_rows=chunk_size)
+    except Error as e:
+        raise click.ClickException(f'Database error: {str(e)}')
+    finally:
+        connection.close()
+
+    click.echo(f"{report['total']} rows, {report['valid']} valid, "
+               f"{report['imported']} members and {report['skills']} skills imported"
+               + (' (dry run)' if dry_run else ''))
+    errors = report['errors']
+    if errors_path:
+        with open(errors_path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=['row', 'email', 'message'])
+            writer.writeheader()
+            writer.writerows(errors)
+        click.echo(f'{len(errors)} errors written to {errors_path}')
+    else:
+        for error in errors[:20]:
+            click.echo(f"row {error['row']} ({error['email']}): {error['message']}")
+        if len(errors) > 20:
+            click.echo(f'... {len(errors) - 20} more (use --errors FILE for the full list)')
+
 
 # ==================== REPORTS ====================
 
+def _build_report_payload():
+    # Runs on the snapshot thread: the state syncs on its own pooled connection
+    analytics_state.sync()
+    return build_reports_payload(*analytics_state.report_rows())
+
+
+def _latest_audit_log_id():
+    return analytics_state.sync().tail.last_id
+
+
+report_snapshots = ReportSnapshotService(
+    _build_report_payload,
+    _latest_audit_log_id,
+    interval=float(os.getenv('REPORT_SNAPSHOT_INTERVAL', 300)),
+    poll=float(os.getenv('REPORT_SNAPSHOT_POLL', 10))
+)
+
+
+def _report_version():
+    # The page shows the snapshot, so it is versioned by the data the snapshot was built from
+    snapshot = report_snapshots.get()
+    return f'r{snapshot.marker}', snapshot.as_of
+
+
 @app.route('/reports')
 @handle_db_error
+@conditional(_report_version)
 def reports():
-    """Generate comprehensive analytics reports with drill-down capabilities"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
-    
-    # === FETCH ALL RAW DATA (Optimized queries) ===
-    
-    # A. Members & Roles
-    cursor.execute("""
-        SELECT tm.mem_id, tm.first_name, tm.middle_name, tm.last_name, 
-               tm.email, r.role_id, r.role_name 
-        FROM team_members tm 
-        LEFT JOIN roles r ON tm.role_id = r.role_id
-    """)
-    members = cursor.fetchall()
-    
-    # B. All Skills
-    cursor.execute("SELECT * FROM skills ORDER BY category, skill_name")
-    skills = cursor.fetchall()
-    
-    # C. All Skill Assignments (The Matrix Data)
-    cursor.execute("""
-        SELECT ms.mem_id, ms.skill_id, ms.proficiency_level, 
-               s.skill_name, s.category, 
-               CONCAT_WS(' ', tm.first_name, NULLIF(tm.middle_name, ''), tm.last_name) as holder_name
-        FROM mem_skills ms
-        JOIN skills s ON ms.skill_id = s.skill_id
-        JOIN team_members tm ON ms.mem_id = tm.mem_id
-    """)
-    assignments = cursor.fetchall()
-    
-    # D. Role Requirements
-    cursor.execute("""
-        SELECT rr.role_id, rr.skill_id, rr.min_proficiency_required,
-               s.skill_name, s.category
-        FROM role_requirements rr
-        JOIN skills s ON rr.skill_id = s.skill_id
-    """)
-    role_requirements = cursor.fetchall()
-    
-    # === PROCESS DATA IN PYTHON (More efficient than complex SQL) ===
-    
-    # Initialize data structures
-    skill_holders = {}  # {skill_id: [list of holder names]}
-    category_data = {}  # {Category: {skills: [], experts: {}, levels: {1:count, 2:count, 3:count}}}
-    member_skills_map = {}  # {mem_id: {skill_id: proficiency_level}}
-    role_req_map = {}  # {role_id: {skill_id: min_proficiency}}
-    
-    # Initialize categories
-    for cat in ['Technical', 'Clinical', 'Regulatory', 'Soft Skill']:
-        category_data[cat] = {
-            'skills': [],
-            'experts': {},
-            'levels': {1: 0, 2: 0, 3: 0},
-            'total_count': 0
-        }
-    
-    # Process assignments for various analytics
-    for row in assignments:
-        sid = row['skill_id']
-        mid = row['mem_id']
-        prof = row['proficiency_level']
-        cat = row['category']
-        
-        # For Risk Analysis
-        if sid not in skill_holders:
-            skill_holders[sid] = []
-        skill_holders[sid].append(row['holder_name'])
-        
-        # For Category Analysis
-        if mid not in category_data[cat]['experts']:
-            category_data[cat]['experts'][mid] = {
-                'name': row['holder_name'],
-                'total_lvl': 0,
-                'count': 0
-            }
-        category_data[cat]['experts'][mid]['total_lvl'] += prof
-        category_data[cat]['experts'][mid]['count'] += 1
-        category_data[cat]['levels'][prof] += 1
-        category_data[cat]['total_count'] += 1
-        
-        # For Member Skills Map (used in role compliance)
-        if mid not in member_skills_map:
-            member_skills_map[mid] = {}
-        member_skills_map[mid][sid] = prof
-    
-    # Process role requirements
-    for req in role_requirements:
-        role_id = req['role_id']
-        if role_id not in role_req_map:
-            role_req_map[role_id] = {
-                'requirements': {},
-                'req_list': []
-            }
-        role_req_map[role_id]['requirements'][req['skill_id']] = req['min_proficiency_required']
-        role_req_map[role_id]['req_list'].append({
-            'skill_id': req['skill_id'],
-            'name': req['skill_name'],
-            'cat': req['category'],
-            'min_lvl': req['min_proficiency_required']
-        })
-    
-    # === 1. GENERATE RISK REPORT (Bus Factor Analysis) ===
-    risk_report = []
-    for skill in skills:
-        sid = skill['skill_id']
-        holders = skill_holders.get(sid, [])
-        count = len(holders)
-        
-        if count < 2:  # RISK CRITERIA: Less than 2 people
-            risk_report.append({
-                'category': skill['category'],
-                'skill_name': skill['skill_name'],
-                'skill_id': sid,
-                'count': count,
-                'holders': holders
-            })
-    
-    # === 2. GENERATE CATEGORY BREAKDOWN ===
-    for cat in category_data:
-        # Calculate top experts by average proficiency
-        expert_list = []
-        for mid, data in category_data[cat]['experts'].items():
-            avg = data['total_lvl'] / data['count']
-            expert_list.append({
-                'name': data['name'],
-                'avg': round(avg, 1),
-                'skills': data['count']
-            })
-        category_data[cat]['top_experts'] = sorted(expert_list, key=lambda x: x['avg'], reverse=True)[:5]
-        
-        # Add skill list for this category
-        category_data[cat]['skills'] = [s for s in skills if s['category'] == cat]
-    
-    # === 3. GENERATE ROLE HEALTH ANALYSIS ===
-    roles_data = {}
-    for member in members:
-        role_id = member['role_id']
-        if not role_id:
-            continue
-            
-        mem_id = member['mem_id']
-        full_name = f"{member['first_name']} {member.get('middle_name', '') or ''} {member['last_name']}".replace('  ', ' ')
-        
-        if role_id not in roles_data:
-            roles_data[role_id] = {
-                'name': member['role_name'],
-                'members': [],
-                'requirements': role_req_map.get(role_id, {'requirements': {}, 'req_list': []})['req_list']
-            }
-        
-        # Calculate member's compliance with role
-        requirements = role_req_map.get(role_id, {'requirements': {}})['requirements']
-        member_skills = member_skills_map.get(mem_id, {})
-        
-        missing = []
-        met = 0
-        total_req = len(requirements)
-        
-        for skill_id, min_prof in requirements.items():
-            if skill_id in member_skills and member_skills[skill_id] >= min_prof:
-                met += 1
-            else:
-                # Find skill name
-                skill_name = next((s['skill_name'] for s in skills if s['skill_id'] == skill_id), 'Unknown')
-                missing.append(skill_name)
-        
-        match_pct = round((met / total_req * 100) if total_req > 0 else 100)
-        
-        roles_data[role_id]['members'].append({
-            'mem_id': mem_id,
-            'full_name': full_name,
-            'match_pct': match_pct,
-            'missing': missing
-        })
-    
-    # === 4. HEATMAP DATA (Members vs Top Skills) ===
-    # Select top 15 most common skills for the heatmap
-    cursor.execute("""
-        SELECT s.skill_id, s.skill_name, s.category,
-               COUNT(ms.mem_id) as member_count
-        FROM skills s
-        LEFT JOIN mem_skills ms ON s.skill_id = ms.skill_id
-        GROUP BY s.skill_id
-        ORDER BY member_count DESC, s.skill_name
-        LIMIT 15
-    """)
-    heatmap_skills = cursor.fetchall()
-    
-    heatmap_data = []
-    for member in members:
-        mem_id = member['mem_id']
-        full_name = f"{member['first_name']} {member.get('middle_name', '') or ''} {member['last_name']}".replace('  ', ' ')
-        
-        row = {
-            'mem_id': mem_id,
-            'name': full_name,
-            'role': member['role_name'] or 'Unassigned',
-            'skills': {}
-        }
-        
-        for skill in heatmap_skills:
-            skill_id = skill['skill_id']
-            row['skills'][skill_id] = member_skills_map.get(mem_id, {}).get(skill_id, 0)
-        
-        heatmap_data.append(row)
-    
-    # === 5. KPI CALCULATIONS ===
-    total_staff = len(members)
-    total_skills = len(skills)
-    total_assignments = len(assignments)
-    
-    # Calculate overall compliance rate
-    total_members_with_roles = len([m for m in members if m['role_id']])
-    compliant_count = 0
-    for role_id, role_data in roles_data.items():
-        for member in role_data['members']:
-            if member['match_pct'] >= 80:
-                compliant_count += 1
-    
-    compliance_rate = round((compliant_count / total_members_with_roles * 100) if total_members_with_roles > 0 else 0)
-    critical_gaps = len([r for r in roles_data.values() if r['members'] and any(m['match_pct'] < 60 for m in r['members'])])
-    skills_at_risk = len(risk_report)
-    
-    # === 6. CATEGORY STATS FOR CHARTS ===
-    category_stats = []
-    for cat, data in category_data.items():
-        category_stats.append({
-            'category': cat,
-            'skill_count': len(data['skills']),
-            'members_with_skills': len(data['experts']),
-            'level_1': data['levels'][1],
-            'level_2': data['levels'][2],
-            'level_3': data['levels'][3]
-        })
-    
-    # === 7. TOP SKILLS ===
-    cursor.execute("""
-        SELECT 
-            s.skill_name,
-            s.category,
-            COUNT(ms.mem_id) as member_count,
-            AVG(ms.proficiency_level) as avg_proficiency
-        FROM skills s
-        LEFT JOIN mem_skills ms ON s.skill_id = ms.skill_id
-        GROUP BY s.skill_id
-        HAVING member_count > 0
-        ORDER BY member_count DESC, avg_proficiency DESC
-        LIMIT 10
-    """)
-    top_skills = cursor.fetchall()
-    
-    # === 8. MEMBER STATS ===
-    member_stats = []
-    for member in members:
-        mem_id = member['mem_id']
-        full_name = f"{member['first_name']} {member.get('middle_name', '') or ''} {member['last_name']}".replace('  ', ' ')
-        
-        member_skills = member_skills_map.get(mem_id, {})
-        skill_count = len(member_skills)
-        avg_prof = round(sum(member_skills.values()) / skill_count, 1) if skill_count > 0 else 0
-        
-        member_stats.append({
-            'full_name': full_name,
-            'role': member['role_name'] or 'Unassigned',
-            'skill_count': skill_count,
-            'avg_proficiency': avg_prof
-        })
-    
-    member_stats.sort(key=lambda x: x['skill_count'], reverse=True)
-    
-    cursor.close()
-    connection.close()
+    """Comprehensive analytics reports, served from the latest precomputed snapshot"""
+    snapshot = report_snapshots.get()
     
     return render_template('reports.html',
-                         # KPIs
-                         total_staff=total_staff,
-                         compliance_rate=compliance_rate,
-                         critical_gaps=critical_gaps,
-                         skills_at_risk=skills_at_risk,
-                         # Charts & Tables
-                         category_stats=category_stats,
-                         top_skills=top_skills,
-                         member_stats=member_stats,
-                         # Drill-down data
-                         risk_report=risk_report,
-                         category_data=category_data,
-                         roles_data=roles_data,
-                         # Heatmap
-                         heatmap_skills=heatmap_skills,
-                         heatmap_data=heatmap_data)
+                         snapshot_version=snapshot.version,
+                         snapshot_as_of=snapshot.as_of,
+                         **snapshot.payload)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+@app.route('/reports/export')
+def export_reports():
+    """Stream the reports page as CSV (default) or XLSX, one section at a time"""
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        flash(f'Unsupported export format: {fmt}', 'danger')
+        return redirect(url_for('reports'))
+    if fmt == 'xlsx' and openpyxl is None:
+        flash('XLSX export requires openpyxl (pip install openpyxl)', 'warning')
+        return redirect(url_for('reports'))
+
+    snapshot = report_snapshots.get()
+    # The response outlives this view, so the stream holds its own connection
+    connection = get_db_connection()
+    if connection is None:
+        flash('Database connection failed', 'danger')
+        return redirect(url_for('reports'))
+
+    def generate():
+        # Unbuffered: member rows are fetched from the server as they are written out
+        cursor = connection.cursor(dictionary=True)
+        finished = False
+        try:
+            sections = report_sections(snapshot, cursor)
+            if fmt == 'xlsx':
+                yield from stream_xlsx(sections)
+            else:
+                yield from stream_csv(sections, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            finished = True
+        finally:
+            if not finished:
+                # Client went away mid-stream; unread rows make the connection unusable
+                connection.invalidate()
+            try:
+                cursor.close()
+            except Error:
+                pass
+            connection.close()
+
+    filename = f"team-skills-report-{datetime.now().strftime('%Y-%m-%d')}.{fmt}"
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@app.route('/api/reports/snapshots')
+def api_report_snapshots():
+    """API endpoint to list recent report snapshot versions"""
+    return jsonify(report_snapshots.history())
 
 @app.route('/reports/user-skills')
 @handle_db_error
 def user_skills_report():
     """User-wise skill assignment report"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
+    cursor = get_cursor()
 
     cursor.execute("""
         SELECT 
@@ -1878,9 +2103,6 @@ def user_skills_report():
 
     report = cursor.fetchall()
 
-    cursor.close()
-    connection.close()
-
     return render_template(
         'reports/user_skills.html',
         report=report
@@ -1888,56 +2110,269 @@ def user_skills_report():
 
 # ==================== API ENDPOINTS ====================
 
+IMPORT_MAX_ERRORS = 1000  # per-row errors returned by the import API (the CLI can write them all)
+
 @app.route('/api/skills')
+@conditional(table_version(SKILL_TABLES))
 def api_skills():
-    """API endpoint to get all skills"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
-    
-    cursor.execute("SELECT * FROM skills ORDER BY category, skill_name")
-    skills = cursor.fetchall()
-    
-    cursor.close()
-    connection.close()
-    
-    return jsonify(skills)
+    """API endpoint to page through skills (sort, order, limit, cursor, q, category)"""
+    return api_list_page(fetch_skills_page)
 
 @app.route('/api/members')
+@conditional(table_version(MEMBER_TABLES))
 def api_members():
-    """API endpoint to get all members"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
-    
-    cursor.execute("""
-        SELECT 
-            mem_id, 
-            CONCAT_WS(' ', first_name, NULLIF(middle_name, ''), last_name) AS full_name,
-            email, 
-            phone_no,
-            role_id
-        FROM team_members
-        ORDER BY first_name, last_name
-    """)
-    members = cursor.fetchall()
-    
-    cursor.close()
-    connection.close()
-    
-    return jsonify(members)
+    """API endpoint to page through members (sort, order, limit, cursor, q, role_id)"""
+    return api_list_page(fetch_members_page)
 
 @app.route('/api/roles')
+@conditional(table_version(ROLE_TABLES))
 def api_roles():
-    """API endpoint to get all roles"""
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
-    
-    cursor.execute("SELECT * FROM roles ORDER BY role_name")
-    roles = cursor.fetchall()
-    
-    cursor.close()
-    connection.close()
-    
-    return jsonify(roles)
+    """API endpoint to page through roles (sort, order, limit, cursor, q)"""
+    return api_list_page(fetch_roles_page)
+
+@app.route('/api/audit-logs')
+def api_audit_logs():
+    """API endpoint to page through audit history, live and archived (limit, cursor, table, operation, record_id, date_from, date_to)"""
+    return api_list_page(fetch_audit_page)
+
+@app.route('/api/members/import', methods=['POST'])
+def api_import_members():
+    """API endpoint to bulk-import members and skills from a CSV/JSON upload ("file") or JSON body; dry_run=1 only validates"""
+    dry_run = request.values.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    upload = request.files.get('file')
+    try:
+        if upload:
+            fmt = request.values.get('format') or upload.filename.rsplit('.', 1)[-1].lower()
+            rows = parse_members(upload.read(), fmt)
+        elif request.is_json:
+            rows = parse_members(request.get_data(), 'json')
+        else:
+            raise ValueError('Upload a CSV or JSON file as "file", or send a JSON list of members')
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    connection = get_db()
+    if connection is None:
+        return jsonify({'success': False, 'message': 'Database connection failed'}), 500
+    try:
+        report = import_members(connection, rows, dry_run=dry_run)
+    except Error as e:
+        rollback_db()
+        return jsonify({'success': False, 'message': f'Database error: {str(e)}'}), 500
+
+    errors = report['errors']
+    return jsonify({**report, 'success': True, 'error_count': len(errors), 'errors': errors[:IMPORT_MAX_ERRORS]})
+
+ELIGIBILITY_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+@app.route('/api/eligibility')
+def api_eligibility():
+    """API endpoint streaming the member x role eligibility matrix (role_id, category, missing=1, format=ndjson|csv)"""
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in ELIGIBILITY_FORMATS:
+        return jsonify({'success': False, 'message': f'Unsupported format: {fmt}'}), 400
+    try:
+        role_ids = {int(value) for value in request.args.getlist('role_id')} or None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'role_id must be a number'}), 400
+    category = request.args.get('category') or None
+    if category is not None and category not in CATEGORY_SORT:
+        return jsonify({'success': False, 'message': f"Unknown category '{category}'"}), 400
+    with_missing = request.args.get('missing', '').lower() in ('1', 'true', 'yes')
+
+    cursor = get_cursor()
+    if cursor is None:
+        return jsonify({'success': False, 'message': 'Database connection failed'}), 500
+    try:
+        analytics_state.sync(cursor)
+    except Error as e:
+        rollback_db()
+        return jsonify({'success': False, 'message': f'Database error: {str(e)}'}), 500
+
+    # The matrix is a snapshot, so the stream needs no database connection
+    matrix = eligibility.matrix(role_ids, category)
+    body = matrix.stream_csv(with_missing) if fmt == 'csv' else matrix.stream_ndjson(with_missing)
+    headers = {}
+    if fmt == 'csv':
+        headers['Content-Disposition'] = f"attachment; filename=eligibility-{datetime.now().strftime('%Y-%m-%d')}.csv"
+    return Response(body, mimetype=ELIGIBILITY_FORMATS[fmt], headers=headers)
+
+@app.route('/api/experts')
+def api_experts():
+    """API endpoint for expert search (skill=name[:level] repeatable, mode=all|any, min_proficiency, limit, offset)"""
+    cursor = get_cursor()
+    if cursor is None:
+        return jsonify({'success': False, 'message': 'Database connection failed'}), 500
+    try:
+        analytics_state.sync(cursor)
+    except Error as e:
+        rollback_db()
+        return jsonify({'success': False, 'message': f'Database error: {str(e)}'}), 500
+    try:
+        query = parse_expert_query(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    total, experts = search_experts(query)
+    return jsonify({
+        'total': total,
+        'offset': query['offset'],
+        'limit': query['limit'],
+        'mode': query['mode'],
+        'items': experts,
+    })
+
+def parse_staffing_request():
+    """Needs and options for /api/staffing from a JSON body or the query string"""
+    body = request.get_json(silent=True) if request.method == 'POST' else None
+    if body is None:
+        body = {
+            'needs': request.args.getlist('skill'),
+            'min_proficiency': request.args.get('min_proficiency', 1),
+            'objective': request.args.get('objective', 'size'),
+            'alternatives': request.args.get('alternatives', ALTERNATIVES),
+            'exclude': request.args.getlist('exclude'),
+        }
+    if not isinstance(body, dict) or not isinstance(body.get('needs', []), list):
+        raise ValueError('Send {"needs": ["Python:3", ...]} or skill=Python:3 parameters')
+    try:
+        min_proficiency = int(body.get('min_proficiency', 1))
+        alternatives = int(body.get('alternatives', ALTERNATIVES))
+        exclude = {int(mem_id) for mem_id in body.get('exclude') or []}
+        loads = {int(mem_id): float(load) for mem_id, load in (body.get('load') or {}).items()}
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError('min_proficiency, alternatives, exclude and load must be numbers')
+    if not 1 <= min_proficiency <= 3:
+        raise ValueError('min_proficiency must be 1, 2 or 3')
+    if not 1 <= alternatives <= ALTERNATIVES_MAX:
+        raise ValueError(f'alternatives must be between 1 and {ALTERNATIVES_MAX}')
+    if any(load < 0 for load in loads.values()):
+        raise ValueError('load values must not be negative')
+    objective = str(body.get('objective', 'size')).lower()
+    if objective not in OBJECTIVES:
+        raise ValueError("objective must be 'size' or 'load'")
+
+    terms, names = parse_skill_terms(body.get('needs', []), min_proficiency)
+    if not terms:
+        raise ValueError('At least one skill need is required')
+    if len(terms) > MAX_NEEDS:
+        raise ValueError(f'At most {MAX_NEEDS} skill needs are supported')
+    return terms, names, objective, alternatives, exclude, loads
+
+
+@app.route('/api/staffing', methods=['GET', 'POST'])
+def api_staffing():
+    """API endpoint for the smallest (or least loaded) team covering a set of skill needs, with alternatives"""
+    cursor = get_cursor()
+    if cursor is None:
+        return jsonify({'success': False, 'message': 'Database connection failed'}), 500
+    try:
+        analytics_state.sync(cursor)
+    except Error as e:
+        rollback_db()
+        return jsonify({'success': False, 'message': f'Database error: {str(e)}'}), 500
+    try:
+        terms, names, objective, alternatives, exclude, loads = parse_staffing_request()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    result = expert_index.staffing(terms, objective, alternatives, exclude, loads)
+    needs = [
+        {'skill_id': skill_id, 'skill': name, 'min_proficiency': level}
+        for (skill_id, level), name in zip(terms, names)
+    ]
+    teams = result['teams']
+    return jsonify({
+        'success': True,
+        'needs': needs,
+        'objective': objective,
+        'exact': result['exact'],
+        'uncovered': [needs[i] for i in result['uncovered']],
+        'team': teams[0] if teams else None,
+        'alternatives': teams[1:],
+    })
+
+SEARCH_URLS = {
+    'member': ('view_member', 'mem_id'),
+    'skill': ('view_skill', 'skill_id'),
+    'role': ('view_role', 'role_id'),
+}
+
+
+@app.route('/api/search')
+def api_search():
+    """API endpoint for search-as-you-type over members, skills and roles (q, type, limit)"""
+    query = request.args.get('q', '').strip()
+    kinds = request.args.getlist('type') or None
+    if kinds and not set(kinds) <= set(KINDS):
+        return jsonify({'success': False, 'message': f"type must be one of: {', '.join(KINDS)}"}), 400
+    try:
+        limit = min(int(request.args.get('limit', SEARCH_LIMIT)), SEARCH_LIMIT_MAX)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'limit must be a number'}), 400
+    if limit < 1:
+        return jsonify({'success': False, 'message': 'limit must be positive'}), 400
+
+    cursor = get_cursor()
+    if cursor is None:
+        return jsonify({'success': False, 'message': 'Database connection failed'}), 500
+    try:
+        analytics_state.sync(cursor)
+    except Error as e:
+        rollback_db()
+        return jsonify({'success': False, 'message': f'Database error: {str(e)}'}), 500
+
+    results = search_index.search(query, limit, kinds)
+    for result in results:
+        endpoint, arg = SEARCH_URLS[result['type']]
+        result['url'] = url_for(endpoint, **{arg: result['id']})
+    return jsonify({'query': query, 'results': results})
+
+@app.route('/api/pool-stats')
+def api_pool_stats():
+    """API endpoint to get connection pool usage (checked out, waiting, wait time, reconnects)"""
+    return jsonify(get_db_pool().stats())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint: request, DB, pool and cache metrics of every worker process"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+def debug_queries():
+    """Rolling per-route query summary: counts, DB time, busiest statements and N+1 patterns (?route=endpoint)"""
+    return jsonify({
+        'window': query_stats.window,
+        'repeat_threshold': query_stats.repeat_threshold,
+        'routes': query_stats.summary(request.args.get('route') or None),
+    })
+
+if QUERY_TRACING:
+    app.add_url_rule('/debug/queries', view_func=debug_queries)
+
+def debug_slow_queries():
+    """Latest slow statements with their parameters and EXPLAIN plans; plan regressions first"""
+    return render_template('slow_queries.html', stats=slow_log.stats(), entries=slow_log.entries(),
+                           regressions=slow_log.regressions())
+
+def api_slow_queries():
+    """API endpoint to get the slow query ring buffer, plans and flagged plan regressions"""
+    return jsonify({
+        'stats': slow_log.stats(),
+        'regressions': slow_log.regressions(),
+        'entries': slow_log.entries(),
+    })
+
+if SLOW_QUERY_LOG:
+    app.add_url_rule('/debug/slow-queries', view_func=debug_slow_queries)
+    app.add_url_rule('/api/slow-queries', view_func=api_slow_queries)
+
+@app.route('/api/cache-stats')
+def api_cache_stats():
+    """API endpoint to get entries and hit/miss counters of every in-process cache (dashboard, catalog, audit facets)"""
+    return jsonify(cache_stats())
 
 # ==================== ERROR HANDLERS ====================
 
@@ -1949,5 +2384,14 @@ def not_found(e):
 def server_error(e):
     return render_template('500.html'), 500
 
+def warm_indexes():
+    """Load the analytics state (and the eligibility, expert and search indexes fed by it)"""
+    try:
+        analytics_state.sync()
+    except Error as e:
+        app.logger.warning('Index warm-up failed, loading on first request instead: %s', e)
+
+
 if __name__ == '__main__':
+    threading.Thread(target=warm_indexes, name='index-warmup', daemon=True).start()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
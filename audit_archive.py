@@ -0,0 +1,324 @@
+"""Monthly audit_logs partitions and their archive of compressed segments.
+
+audit_logs is range-partitioned by month on ``change_date`` (see MySQL/DDL.sql).
+``ensure_partitions`` keeps empty partitions ready for the coming months, and
+``archive_partition`` moves a closed month out of MySQL into a gzip JSON-lines
+segment file, newest row first. A partition is only dropped once its segment
+has been read back, matched against the row count and listed with its sha256
+in the append-only ``manifest.jsonl``, so the hot table stays small without
+losing the retained history.
+
+``AuditArchive.read`` streams archived rows in the audit browser's
+``(change_date, log_id)`` descending order. Months never overlap, so reading
+segments newest first continues exactly where the live table ends.
+"""
+import calendar
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+TABLE = 'audit_logs'
+FUTURE_PARTITION = 'p_future'
+MANIFEST = 'manifest.jsonl'
+FETCH_SIZE = 1000
+CHUNK = 64 * 1024
+
+
+class Partition:
+    """One range partition; ``upper`` is its exclusive UTC epoch bound (None for MAXVALUE)"""
+
+    def __init__(self, name, upper, row_estimate=0):
+        self.name = name
+        self.upper = upper
+        self.row_estimate = row_estimate
+
+
+def month_start(moment):
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(moment, months):
+    years, month = divmod(moment.month - 1 + months, 12)
+    return moment.replace(year=moment.year + years, month=month + 1)
+
+
+def _epoch(moment):
+    return calendar.timegm(moment.timetuple())
+
+
+def _utc(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None)
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _as_datetime(value):
+    # Cursor values come back from the query string as text
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+def list_partitions(cursor):
+    """audit_logs partitions in bound order (empty if the table is not partitioned)"""
+    cursor.execute("""
+        SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS bound, TABLE_ROWS AS row_estimate
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (TABLE,))
+    return [
+        Partition(row['name'], None if row['bound'] == 'MAXVALUE' else int(row['bound']),
+                  int(row['row_estimate'] or 0))
+        for row in cursor.fetchall()
+    ]
+
+
+def ensure_partitions(cursor, months_ahead=3, now=None):
+    """Split ``p_future`` into monthly partitions up to ``months_ahead`` months from now
+
+    Done ahead of time, the split only moves an empty partition. Returns the
+    names of the partitions that were added.
+    """
+    partitions = list_partitions(cursor)
+    if not partitions or partitions[-1].name != FUTURE_PARTITION:
+        return []
+    now = now or _utcnow()
+    bounded = [p for p in partitions if p.upper is not None]
+    start = _utc(bounded[-1].upper) if bounded else month_start(now)
+    target = add_months(month_start(now), months_ahead + 1)
+
+    added, definitions = [], []
+    while start < target:
+        end = add_months(month_start(start), 1)
+        name = start.strftime('p%Y%m')
+        added.append(name)
+        definitions.append(f"PARTITION {name} VALUES LESS THAN ({_epoch(end)})")
+        start = end
+    if definitions:
+        definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+        cursor.execute(
+            f"ALTER TABLE {TABLE} REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({', '.join(definitions)})"
+        )
+    return added
+
+
+def closed_partitions(partitions, hot_months=3, now=None):
+    """Partitions that end before the last ``hot_months`` months (oldest first)"""
+    cutoff = _epoch(add_months(month_start(now or _utcnow()), -hot_months))
+    return [p for p in partitions if p.upper is not None and p.upper <= cutoff]
+
+
+def archive_partition(connection, archive, partition):
+    """Copy one closed partition into a verified segment, then drop it from MySQL
+
+    Safe to re-run: a partition already in the manifest (e.g. the drop failed
+    last time) is checked against its segment and dropped without rewriting.
+    """
+    entry = archive.entry(partition.name)
+    if entry is None:
+        # Unbuffered: the month is streamed to disk without being held in memory
+        stream = connection.cursor(dictionary=True)
+        try:
+            stream.execute(
+                f"SELECT * FROM {TABLE} PARTITION ({partition.name}) ORDER BY change_date DESC, log_id DESC"
+            )
+            entry = archive.write_segment(partition.name, _fetch_all(stream))
+        finally:
+            stream.close()
+
+    cursor = connection.cursor(dictionary=True, buffered=True)
+    try:
+        cursor.execute(f"SELECT COUNT(*) AS total FROM {TABLE} PARTITION ({partition.name})")
+        total = cursor.fetchone()['total']
+        if total != entry['rows']:
+            archive.discard(entry)
+            raise RuntimeError(
+                f"{partition.name}: {total} rows in MySQL but {entry['rows']} archived; partition kept"
+            )
+        archive.check(entry)
+        archive.commit(entry)
+        cursor.execute(f"ALTER TABLE {TABLE} DROP PARTITION {partition.name}")
+    finally:
+        cursor.close()
+    return entry
+
+
+def _fetch_all(cursor):
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            return
+        yield from rows
+
+
+class AuditArchive:
+    """Append-only directory of gzip JSON-lines segments plus their manifest"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._manifest_stamp = None
+        self._segments = []
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def segments(self):
+        """Manifest entries, newest first; re-read only when the manifest changes"""
+        try:
+            stat = os.stat(self._path(MANIFEST))
+        except FileNotFoundError:
+            return []
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp != self._manifest_stamp:
+                with open(self._path(MANIFEST), encoding='utf-8') as file:
+                    entries = {}
+                    for line in file:
+                        if line.strip():
+                            entry = json.loads(line)
+                            entries[entry['partition']] = entry
+                self._segments = sorted(entries.values(), key=lambda e: e['date_to'], reverse=True)
+                self._manifest_stamp = stamp
+            return self._segments
+
+    def entry(self, partition):
+        return next((e for e in self.segments() if e['partition'] == partition), None)
+
+    def facets(self):
+        """Table names and operations that appear in archived segments"""
+        tables, operations = set(), set()
+        for entry in self.segments():
+            tables.update(entry['tables'])
+            operations.update(entry['operations'])
+        return tables, operations
+
+    def write_segment(self, partition, rows):
+        """Write rows (already newest first) to ``audit_logs-<partition>.jsonl.gz``
+
+        Returns the manifest entry; nothing is listed until ``commit``.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = f'{TABLE}-{partition}.jsonl.gz'
+        entry = {
+            'partition': partition, 'file': file_name, 'rows': 0,
+            'first_log_id': None, 'last_log_id': None, 'date_from': None, 'date_to': None,
+            'tables': set(), 'operations': set(),
+        }
+        with gzip.open(self._path(file_name + '.tmp'), 'wt', encoding='utf-8') as out:
+            for row in rows:
+                changed = row['change_date'].isoformat(sep=' ')
+                out.write(json.dumps({**row, 'change_date': changed}, separators=(',', ':')) + '\n')
+                entry['rows'] += 1
+                entry['first_log_id'] = min(row['log_id'], entry['first_log_id'] or row['log_id'])
+                entry['last_log_id'] = max(row['log_id'], entry['last_log_id'] or row['log_id'])
+                entry['date_to'] = entry['date_to'] or changed  # first row is the newest
+                entry['date_from'] = changed
+                entry['tables'].add(row['table_name'])
+                entry['operations'].add(row['operation_type'])
+        entry['tables'] = sorted(entry['tables'])
+        entry['operations'] = sorted(entry['operations'])
+        entry['sha256'] = self._digest(file_name + '.tmp')
+        entry['bytes'] = os.path.getsize(self._path(file_name + '.tmp'))
+        return entry
+
+    def _digest(self, file_name):
+        digest = hashlib.sha256()
+        with open(self._path(file_name), 'rb') as file:
+            for chunk in iter(lambda: file.read(CHUNK), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _pending(self, entry):
+        # Uncommitted segments still carry the .tmp suffix
+        tmp = entry['file'] + '.tmp'
+        return tmp if os.path.exists(self._path(tmp)) else entry['file']
+
+    def check(self, entry):
+        """Raise RuntimeError unless the segment matches its checksum and row count"""
+        file_name = self._pending(entry)
+        if not os.path.exists(self._path(file_name)):
+            raise RuntimeError(f"{entry['partition']}: segment {entry['file']} is missing")
+        if self._digest(file_name) != entry['sha256']:
+            raise RuntimeError(f"{entry['partition']}: checksum mismatch in {entry['file']}")
+        with gzip.open(self._path(file_name), 'rt', encoding='utf-8') as file:
+            count = sum(1 for _ in file)
+        if count != entry['rows']:
+            raise RuntimeError(f"{entry['partition']}: {count} rows in {entry['file']}, manifest says {entry['rows']}")
+
+    def commit(self, entry):
+        """Publish a checked segment: fsync it, move it into place and append it to the manifest"""
+        if self.entry(entry['partition']) is not None:
+            return
+        tmp = self._path(entry['file'] + '.tmp')
+        with open(tmp, 'rb') as file:
+            os.fsync(file.fileno())
+        os.replace(tmp, self._path(entry['file']))
+        entry = {**entry, 'archived_at': _utcnow().isoformat(sep=' ', timespec='seconds')}
+        with open(self._path(MANIFEST), 'a', encoding='utf-8') as manifest:
+            manifest.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            manifest.flush()
+            os.fsync(manifest.fileno())
+
+    def discard(self, entry):
+        """Remove an uncommitted segment"""
+        tmp = self._path(entry['file'] + '.tmp')
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    def verify(self):
+        """``(entry, problem)`` for every listed segment; problem is None when intact"""
+        results = []
+        for entry in self.segments():
+            try:
+                self.check(entry)
+                results.append((entry, None))
+            except RuntimeError as e:
+                results.append((entry, str(e)))
+        return results
+
+    def read(self, filters=None, before=None):
+        """Archived rows, newest first, matching the audit browser filters
+
+        ``filters`` may hold ``table``, ``operation``, ``record_id`` and the
+        datetimes ``date_from`` (inclusive) / ``date_to`` (exclusive);
+        ``before`` is a ``(change_date, log_id)`` seek position. Segments
+        outside the range, or without the table / operation, are not opened.
+        """
+        filters = filters or {}
+        date_from, date_to = filters.get('date_from'), filters.get('date_to')
+        if before is not None:
+            before = (_as_datetime(before[0]), int(before[1]))
+
+        for entry in self.segments():
+            newest, oldest = _as_datetime(entry['date_to']), _as_datetime(entry['date_from'])
+            if (date_from and newest < date_from) or (date_to and oldest >= date_to):
+                continue
+            if before is not None and oldest > before[0]:
+                continue
+            if filters.get('table') and filters['table'] not in entry['tables']:
+                continue
+            if filters.get('operation') and filters['operation'] not in entry['operations']:
+                continue
+
+            with gzip.open(self._path(entry['file']), 'rt', encoding='utf-8') as file:
+                for line in file:
+                    row = json.loads(line)
+                    row['change_date'] = _as_datetime(row['change_date'])
+                    if before is not None and (row['change_date'], row['log_id']) >= before:
+                        continue
+                    if date_to and row['change_date'] >= date_to:
+                        continue
+                    if date_from and row['change_date'] < date_from:
+                        break  # the rest of the segment is older still
+                    if filters.get('table') and row['table_name'] != filters['table']:
+                        continue
+                    if filters.get('operation') and row['operation_type'] != filters['operation']:
+                        continue
+                    if filters.get('record_id') and row['record_id'] != filters['record_id']:
+                        continue
+                    yield row
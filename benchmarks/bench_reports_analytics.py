@@ -0,0 +1,86 @@
+"""Benchmark for the vectorised /reports analytics (analytics.py).
+
+Builds a synthetic organisation in memory and times build_reports_payload()
+on it, so no database is needed:
+
+    python benchmarks/bench_reports_analytics.py --members 50000 --skills 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import CATEGORIES, SkillMatrix, build_reports_payload  # noqa: E402
+
+
+def make_rows(n_members, n_skills, n_roles, skills_per_member, reqs_per_role, seed=13):
+    rnd = random.Random(seed)
+    roles = [{'role_id': r + 1, 'role_name': f'Role {r + 1}'} for r in range(n_roles)]
+    skills = [
+        {'skill_id': s + 1, 'skill_name': f'Skill {s + 1:05d}', 'category': CATEGORIES[s % len(CATEGORIES)]}
+        for s in range(n_skills)
+    ]
+    members = []
+    for m in range(n_members):
+        role = roles[m % n_roles] if m % 10 else None
+        members.append({
+            'mem_id': m + 1,
+            'first_name': f'First{m}',
+            'middle_name': '' if m % 3 else 'M.',
+            'last_name': f'Last{m}',
+            'email': f'user{m}@gmail.com',
+            'role_id': role['role_id'] if role else None,
+            'role_name': role['role_name'] if role else None,
+        })
+    assignments = []
+    for m in range(n_members):
+        for s in rnd.sample(range(n_skills), skills_per_member):
+            assignments.append({'mem_id': m + 1, 'skill_id': s + 1, 'proficiency_level': rnd.randint(1, 3)})
+    role_requirements = []
+    for role in roles:
+        for s in rnd.sample(range(n_skills), reqs_per_role):
+            role_requirements.append({
+                'role_id': role['role_id'],
+                'skill_id': s + 1,
+                'min_proficiency_required': rnd.randint(1, 3),
+                'skill_name': skills[s]['skill_name'],
+                'category': skills[s]['category'],
+            })
+    return members, skills, assignments, role_requirements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--members', type=int, default=50000)
+    parser.add_argument('--skills', type=int, default=2000)
+    parser.add_argument('--roles', type=int, default=20)
+    parser.add_argument('--skills-per-member', type=int, default=20)
+    parser.add_argument('--reqs-per-role', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rows = make_rows(args.members, args.skills, args.roles, args.skills_per_member, args.reqs_per_role)
+    print(f"generated {args.members} members x {args.skills} skills "
+          f"({len(rows[2])} assignments) in {time.perf_counter() - started:.2f}s")
+
+    matrix_times, payload_times = [], []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        matrix = SkillMatrix(*rows)
+        matrix_times.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        build_reports_payload(*rows)
+        payload_times.append(time.perf_counter() - t0)
+
+    print(f"matrix: {matrix.levels.shape} uint8, {matrix.levels.nbytes / 2**20:.1f} MiB")
+    print(f"SkillMatrix build      best {min(matrix_times):.3f}s")
+    print(f"build_reports_payload  best {min(payload_times):.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+"""Latency, query count and memory of every route, through the Flask test client.
+
+Runs against the database configured for the app (.env), typically one
+filled by generate_data.py:
+
+    python benchmarks/bench_routes.py --out baseline.json
+    python benchmarks/bench_routes.py --compare baseline.json --out current.json
+
+Each scenario requests one route ``--requests`` times after ``--warmup``
+requests, with ids drawn at random from the data (so one hot row doesn't
+flatter the numbers), and records p50 / p95 / p99 / max latency, SQL
+statements per request (from the Server-Timing header, fan-out queries
+included) and the peak Python memory of one more request under tracemalloc.
+Streamed responses are read to the end, so their latency includes the whole
+body. Routes that write are only run with ``--writes``; they save forms with
+the values already stored, so the data doesn't drift between runs. Their
+outcome includes the category of the flashed message, since a rejected save
+redirects just like one that committed.
+
+Every endpoint of the app must have a scenario or be listed in SKIPPED -
+a new route fails the run until it is added. ``--compare`` prints the change
+against an earlier result and exits with status 1 when a p95 grew by more
+than ``--tolerance``. Query tracing is turned on for the run unless
+QUERY_TRACING is set; scenarios for routes the app didn't register (the
+debug pages when their feature is off) are left out.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QUERY_TRACING', '1')  # query counts come from its Server-Timing header
+
+from app import app, get_db_connection  # noqa: E402
+from stats import percentile  # noqa: E402
+
+SAMPLE = 200
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+# Endpoints without a scenario, and why
+SKIPPED = {
+    'static': 'static files',
+    'delete_role': 'destructive',
+    'delete_member': 'destructive',
+    'delete_skill': 'destructive',
+    'delete_role_requirement': 'destructive',
+    'delete_member_skill': 'destructive',
+    'add_member_skill': 'adds rows on every run',
+    'add_role_requirement': 'adds rows on every run',
+    'api_import_members': 'adds rows on every run',
+}
+
+
+class Samples:
+    """Random ids and names from the database, for filling in URLs"""
+
+    def __init__(self, size=SAMPLE):
+        connection = get_db_connection()
+        if connection is None:
+            sys.exit('Database connection failed (check the DB_* settings)')
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute('SELECT mem_id, email FROM team_members ORDER BY RAND() LIMIT %s', (size,))
+            self.members = cursor.fetchall()
+            cursor.execute('SELECT skill_id, skill_name FROM skills ORDER BY RAND() LIMIT %s', (size,))
+            self.skills = cursor.fetchall()
+            cursor.execute('SELECT role_id FROM roles ORDER BY RAND() LIMIT %s', (size,))
+            self.roles = [row['role_id'] for row in cursor.fetchall()]
+            # Popular skills make expert / staffing searches with real result sets
+            cursor.execute("""
+                SELECT s.skill_name FROM mem_skills ms JOIN skills s ON s.skill_id = ms.skill_id
+                GROUP BY s.skill_id, s.skill_name ORDER BY COUNT(*) DESC LIMIT 20
+            """)
+            self.popular = [row['skill_name'] for row in cursor.fetchall()]
+            cursor.execute('SELECT mem_id, skill_id, proficiency_level FROM mem_skills ORDER BY RAND() LIMIT %s',
+                           (size,))
+            self.assignments = cursor.fetchall()
+            self.counts = {}
+            for table in ('team_members', 'skills', 'roles', 'role_requirements', 'mem_skills', 'audit_logs'):
+                cursor.execute(f'SELECT COUNT(*) AS n FROM {table}')
+                self.counts[table] = cursor.fetchone()['n']
+        finally:
+            cursor.close()
+            connection.close()
+        if not (self.members and self.skills and self.roles):
+            sys.exit('No members, skills or roles to benchmark with (run generate_data.py first)')
+
+    def member(self, rnd):
+        return rnd.choice(self.members)
+
+    def skill(self, rnd):
+        return rnd.choice(self.skills)
+
+    def role(self, rnd):
+        return rnd.choice(self.roles)
+
+    def popular_skills(self, rnd, count):
+        return rnd.sample(self.popular, min(count, len(self.popular)))
+
+
+def member_form(mem_id):
+    """The edit form of ``mem_id`` as stored, ready to post back"""
+    connection = get_db_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute('SELECT * FROM team_members WHERE mem_id = %s', (mem_id,))
+        member = cursor.fetchone()
+        cursor.execute('SELECT skill_id, proficiency_level FROM mem_skills WHERE mem_id = %s', (mem_id,))
+        skills = cursor.fetchall()
+    finally:
+        cursor.close()
+        connection.close()
+    form = {name: member[name] or '' for name in ('first_name', 'middle_name', 'last_name', 'email', 'phone_no')}
+    form['role_id'] = member['role_id'] or ''
+    form['skills'] = [str(row['skill_id']) for row in skills]
+    for row in skills:
+        form[f"proficiency_{row['skill_id']}"] = str(row['proficiency_level'])
+    return form
+
+
+def scenarios(samples, writes):
+    """``[(name, endpoint, request(rnd) -> (method, url, kwargs))]``"""
+    def get(url, **params):
+        return 'GET', url, {'query_string': params}
+
+    reads = [
+        ('dashboard', 'index', lambda r: get('/')),
+        ('roles list', 'list_roles', lambda r: get('/roles')),
+        ('roles list by id desc', 'list_roles', lambda r: get('/roles', sort='id', order='desc')),
+        ('role form', 'add_role', lambda r: get('/roles/add')),
+        ('role detail', 'view_role', lambda r: get(f'/roles/{samples.role(r)}')),
+        ('role edit form', 'edit_role', lambda r: get(f'/roles/{samples.role(r)}/edit')),
+        ('members list', 'list_members', lambda r: get('/members')),
+        ('members search', 'list_members', lambda r: get('/members', q=samples.member(r)['email'][:3])),
+        ('members by role', 'list_members', lambda r: get('/members', role_id=samples.role(r))),
+        ('member form', 'add_member', lambda r: get('/members/add')),
+        ('member detail', 'view_member', lambda r: get(f"/members/{samples.member(r)['mem_id']}")),
+        ('member edit form', 'edit_member', lambda r: get(f"/members/{samples.member(r)['mem_id']}/edit")),
+        ('member profile (procedure)', 'member_profile', lambda r: get(f"/profile/{samples.member(r)['email']}")),
+        ('eligible roles', 'eligible_roles', lambda r: get(f"/members/{samples.member(r)['mem_id']}/eligible-roles")),
+        ('skills list', 'list_skills', lambda r: get('/skills')),
+        ('skills by category', 'list_skills', lambda r: get('/skills', sort='category', category='Technical')),
+        ('skill form', 'add_skill', lambda r: get('/skills/add')),
+        ('skill detail', 'view_skill', lambda r: get(f"/skills/{samples.skill(r)['skill_id']}")),
+        ('skill edit form', 'edit_skill', lambda r: get(f"/skills/{samples.skill(r)['skill_id']}/edit")),
+        ('find experts, 2 skills', 'find_experts',
+         lambda r: get('/find-experts', skill=samples.popular_skills(r, 2))),
+        ('find experts, any of 3', 'find_experts',
+         lambda r: get('/find-experts', mode='any', skill=samples.popular_skills(r, 3))),
+        ('audit logs', 'audit_logs', lambda r: get('/audit-logs')),
+        ('audit logs, mem_skills updates', 'audit_logs', lambda r: get('/audit-logs', table='mem_skills', operation='UPDATE')),
+        ('reports', 'reports', lambda r: get('/reports')),
+        ('reports csv', 'export_reports', lambda r: get('/reports/export')),
+        ('report snapshots', 'api_report_snapshots', lambda r: get('/api/reports/snapshots')),
+        ('user skills report', 'user_skills_report', lambda r: get('/reports/user-skills')),
+        ('api skills', 'api_skills', lambda r: get('/api/skills')),
+        ('api members', 'api_members', lambda r: get('/api/members', limit=200)),
+        ('api roles', 'api_roles', lambda r: get('/api/roles')),
+        ('api audit logs', 'api_audit_logs', lambda r: get('/api/audit-logs')),
+        ('api eligibility', 'api_eligibility', lambda r: get('/api/eligibility', role_id=samples.role(r))),
+        ('api experts', 'api_experts',
+         lambda r: get('/api/experts', skill=[f'{s}:2' for s in samples.popular_skills(r, 2)])),
+        ('api staffing', 'api_staffing',
+         lambda r: get('/api/staffing', skill=samples.popular_skills(r, 4))),
+        ('api search', 'api_search', lambda r: get('/api/search', q=samples.skill(r)['skill_name'][:4])),
+        ('api pool stats', 'api_pool_stats', lambda r: get('/api/pool-stats')),
+        ('api cache stats', 'api_cache_stats', lambda r: get('/api/cache-stats')),
+        ('metrics', 'prometheus_metrics', lambda r: get('/metrics')),
+        ('debug queries', 'debug_queries', lambda r: get('/debug/queries')),
+        ('debug slow queries', 'debug_slow_queries', lambda r: get('/debug/slow-queries')),
+        ('api slow queries', 'api_slow_queries', lambda r: get('/api/slow-queries')),
+    ]
+    if not writes:
+        return reads
+
+    def save_member(r):
+        mem_id = samples.member(r)['mem_id']
+        return 'POST', f'/members/{mem_id}/edit', {'data': member_form(mem_id)}
+
+    def update_member_skill(r):
+        row = r.choice(samples.assignments)
+        return ('POST', f"/members/{row['mem_id']}/skills/{row['skill_id']}/update",
+                {'data': {'proficiency_level': row['proficiency_level']}})
+
+    def save_skill(r):
+        skill = samples.skill(r)
+        return 'POST', f"/skills/{skill['skill_id']}/edit", {'data': {
+            'skill_name': skill['skill_name'], 'category': skill_category(skill['skill_id'])}}
+
+    def save_role(r):
+        role_id = samples.role(r)
+        name, description = role_row(role_id)
+        return 'POST', f'/roles/{role_id}/edit', {'data': {'role_name': name, 'description': description or ''}}
+
+    return reads + [
+        ('save member (unchanged)', 'edit_member', save_member),
+        ('save member skill (unchanged)', 'update_member_skill', update_member_skill),
+        ('save skill (unchanged)', 'edit_skill', save_skill),
+        ('save role (unchanged)', 'edit_role', save_role),
+        ('staffing plan (POST)', 'api_staffing', lambda r: ('POST', '/api/staffing', {
+            'json': {'needs': [f'{s}:2' for s in samples.popular_skills(r, 4)]}})),
+        ('find experts (POST)', 'find_experts', lambda r: ('POST', '/find-experts', {
+            'data': {'skill': samples.popular_skills(r, 2)}})),
+    ]
+
+
+def _lookup(sql, params):
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def skill_category(skill_id):
+    return _lookup('SELECT category FROM skills WHERE skill_id = %s', (skill_id,))[0]
+
+
+def role_row(role_id):
+    return _lookup('SELECT role_name, description FROM roles WHERE role_id = %s', (role_id,))
+
+
+def issue(client, method, url, kwargs):
+    """Run one request; returns (seconds, outcome, statements)
+
+    The outcome is the status code, followed by the category of the flashed
+    message for redirects that flash one: form saves redirect the same way
+    whether they committed ('302 success') or were rejected ('302 danger').
+    """
+    started = time.perf_counter()
+    response = client.open(url, method=method, **kwargs)
+    for _ in response.response:  # drain streamed bodies
+        pass
+    seconds = time.perf_counter() - started
+    match = QUERIES_RE.search(response.headers.get('Server-Timing', ''))
+    response.close()
+    outcome = str(response.status_code)
+    if 300 <= response.status_code < 400:
+        # Redirects aren't followed, so take the flashes out of the session before they pile up
+        with client.session_transaction() as session:
+            flashes = session.pop('_flashes', [])
+        if flashes:
+            outcome += ' ' + flashes[-1][0]
+    return seconds, outcome, int(match.group(1)) if match else None
+
+
+def run_scenario(client, build, rnd, warmup, requests):
+    for _ in range(warmup):
+        issue(client, *build(rnd))
+    times, statuses, queries = [], {}, []
+    for _ in range(requests):
+        method, url, kwargs = build(rnd)
+        seconds, outcome, count = issue(client, method, url, kwargs)
+        times.append(seconds * 1000)
+        statuses[outcome] = statuses.get(outcome, 0) + 1
+        if count is not None:
+            queries.append(count)
+
+    # Memory separately: tracemalloc slows everything it watches
+    request = build(rnd)
+    tracemalloc.start()
+    try:
+        issue(client, *request)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    times.sort()
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(times, 50), 3),
+        'p95_ms': round(percentile(times, 95), 3),
+        'p99_ms': round(percentile(times, 99), 3),
+        'max_ms': round(times[-1], 3),
+        'mean_ms': round(sum(times) / len(times), 3),
+        'queries_avg': round(sum(queries) / len(queries), 2) if queries else None,
+        'queries_max': max(queries) if queries else None,
+        'peak_kib': round(peak / 1024, 1),
+        'statuses': statuses,
+    }
+
+
+def check_coverage(names):
+    covered = {endpoint for _, endpoint, _ in names}
+    missing = sorted(rule.endpoint for rule in app.url_map.iter_rules()
+                     if rule.endpoint not in covered and rule.endpoint not in SKIPPED)
+    return missing
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Print the change of every route against ``baseline``; returns the regressed scenario names"""
+    regressed = []
+    print(f"\n{'scenario':<34} {'p95 before':>11} {'p95 now':>9} {'change':>8} {'queries':>9}")
+    for name, now in results['routes'].items():
+        before = baseline['routes'].get(name)
+        if before is None:
+            print(f'{name:<34} {"-":>11} {now["p95_ms"]:>9.1f} {"new":>8}')
+            continue
+        change = now['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0.0
+        queries = f"{before['queries_avg']}->{now['queries_avg']}" if before['queries_avg'] != now['queries_avg'] else ''
+        flag = ''
+        if change > tolerance:
+            regressed.append(name)
+            flag = '  <-- slower'
+        print(f"{name:<34} {before['p95_ms']:>11.1f} {now['p95_ms']:>9.1f} {change:>+8.0%} {queries:>9}{flag}")
+    if baseline.get('dataset') != results['dataset']:
+        print(f"\nnote: dataset differs from the baseline's: {baseline.get('dataset')} vs {results['dataset']}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=50, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--only', help='run scenarios whose name contains this text')
+    parser.add_argument('--writes', action='store_true', help='include scenarios that save forms')
+    parser.add_argument('--out', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of an earlier run')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p95 growth for --compare')
+    parser.add_argument('--seed', type=int, default=13)
+    args = parser.parse_args()
+
+    app.config['TESTING'] = True
+    samples = Samples()
+    plan = [scenario for scenario in scenarios(samples, args.writes) if scenario[1] in app.view_functions]
+    missing = check_coverage(scenarios(samples, True))
+    if missing:
+        sys.exit(f"No benchmark scenario for: {', '.join(missing)} (add one, or list it in SKIPPED)")
+    if args.only:
+        plan = [scenario for scenario in plan if args.only in scenario[0]]
+
+    rnd = random.Random(args.seed)
+    client = app.test_client()
+    results = {
+        'when': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'dataset': samples.counts,
+        'settings': {'requests': args.requests, 'warmup': args.warmup, 'seed': args.seed},
+        'routes': {},
+    }
+    print(f"dataset: {', '.join(f'{table} {count:,}' for table, count in samples.counts.items())}")
+    print(f"{'scenario':<34} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'peak KiB':>9}  status")
+    for name, endpoint, build in plan:
+        stats = run_scenario(client, build, rnd, args.warmup, args.requests)
+        stats['endpoint'] = endpoint
+        results['routes'][name] = stats
+        print(f"{name:<34} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} "
+              f"{stats['queries_avg'] if stats['queries_avg'] is not None else '-':>8} {stats['peak_kib']:>9.0f}  "
+              f"{' '.join(f'{code}x{n}' for code, n in sorted(stats['statuses'].items()))}")
+        rejected = sum(n for outcome, n in stats['statuses'].items() if outcome.endswith(' danger'))
+        if rejected:
+            print(f"  warning: {rejected} of {args.requests} requests were rejected (see the flash outcome); "
+                  f"the timings describe the error path")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nresults written to {args.out}')
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(results, json.load(f), args.tolerance)
+        if regressed:
+            sys.exit(f"\n{len(regressed)} scenario(s) slower than the baseline by more than {args.tolerance:.0%}")
+
+
+if __name__ == '__main__':
+    main()
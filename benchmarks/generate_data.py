@@ -0,0 +1,378 @@
+"""Fill the database with a synthetic organisation for benchmarks and load tests.
+
+    python benchmarks/generate_data.py --members 100000 --skills 5000 --roles 250 --audit-rows 3000000
+
+Uses the DB_* settings of the app (.env). New rows get ids after the current
+maximum, so the seed data stays; ``--reset`` empties every table first.
+
+Distributions:
+
+- skill popularity is Zipf-like (``--zipf``): a few skills are held by most
+  members, most skills by a handful, as in a real skills inventory
+- one member in ten has no role; role sizes are Zipf-like as well
+- each role requires ``--reqs-per-role`` skills, drawn by popularity, with
+  minimum levels 1 / 2 / 3 at 30 / 45 / 25 %
+- skills per member are Poisson around ``--skills-per-member``, at least one;
+  proficiency 1 / 2 / 3 at 45 / 35 / 20 %. Members hold every skill their role
+  requires at or above its minimum (more skills if the role needs them), so
+  validate_role_eligibility accepts saves of their edit form as it would in
+  an organisation built through the app
+- ``--audit-rows`` rows of change history, shaped like the trigger output
+  (mostly proficiency changes), spread over the last ``--history-days`` days
+  with timestamps in log_id order
+
+Rows are written as multi-row INSERTs of ``--batch`` rows (executemany), one
+commit per batch, with unique and foreign key checks off for the session;
+``--load-data`` sends each batch with LOAD DATA LOCAL INFILE instead (the
+server needs ``local_infile=ON``). The audit triggers still fire for every
+member, skill, role, requirement and assignment, which adds one current
+audit row each on top of the history. The tables are analyzed at the end so
+that plans reflect the new sizes.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+import mysql.connector
+import numpy as np
+from dotenv import load_dotenv
+
+TABLES = ('audit_logs', 'mem_skills', 'role_requirements', 'team_members', 'skills', 'roles')
+
+FIRST_NAMES = (
+    'Aarav', 'Aditi', 'Amir', 'Ana', 'Ben', 'Chen', 'Daniel', 'Divya', 'Elena', 'Fatima', 'Gagan', 'Grace',
+    'Hana', 'Ivan', 'Jia', 'Karan', 'Lea', 'Luis', 'Maya', 'Mei', 'Nikhil', 'Nora', 'Omar', 'Priya',
+    'Rahul', 'Rosa', 'Sara', 'Sofia', 'Tariq', 'Tom', 'Uma', 'Vikram', 'Wei', 'Yusuf', 'Zara', 'Zoe',
+)
+LAST_NAMES = (
+    'Ahmed', 'Bauer', 'Chen', 'Costa', 'Das', 'Garcia', 'Gupta', 'Haddad', 'Ito', 'Iyer', 'Kim', 'Kumar',
+    'Lee', 'Lopez', 'Muller', 'Nair', 'Novak', 'Okafor', 'Patel', 'Reddy', 'Rossi', 'Sato', 'Sharma',
+    'Silva', 'Singh', 'Smith', 'Tanaka', 'Wang', 'Weber', 'Wilson', 'Yilmaz', 'Zhang',
+)
+MIDDLE_NAMES = ('A.', 'J.', 'K.', 'M.', 'R.', 'S.', 'V.')
+SKILL_STEMS = {
+    'Technical': ('Python', 'SQL Tuning', 'Kubernetes', 'React', 'Data Pipelines', 'Embedded C', 'Cloud Security',
+                  'REST API Design', 'Test Automation', 'Signal Processing'),
+    'Clinical': ('Clinical Data Analysis', 'GCP Monitoring', 'Patient Safety', 'Pharmacovigilance',
+                 'Clinical Trial Design', 'Medical Coding'),
+    'Soft Skill': ('Technical Writing', 'Mentoring', 'Stakeholder Management', 'Facilitation', 'Negotiation'),
+    'Regulatory': ('ISO 13485', 'IEC 62304', 'ISO 14971', 'FDA 21 CFR 820', 'EU MDR', 'HIPAA/GDPR Privacy'),
+}
+CATEGORY_SHARE = {'Technical': 0.45, 'Clinical': 0.2, 'Soft Skill': 0.15, 'Regulatory': 0.2}
+ROLE_LEVELS = ('Intern', 'Associate', 'Senior', 'Lead', 'Principal', 'Head of')
+ROLE_AREAS = ('Backend', 'Frontend', 'Data Science', 'QA', 'Regulatory Affairs', 'Clinical Operations',
+              'DevOps', 'Security', 'Product', 'Quality Systems')
+CHANGED_BY = ('app@localhost', 'hr_sync@localhost', 'admin@localhost', 'import@localhost')
+# (table, operation, share) of the generated history; close to what the app writes
+HISTORY_MIX = (
+    ('mem_skills', 'UPDATE', 0.55), ('mem_skills', 'INSERT', 0.17), ('mem_skills', 'DELETE', 0.05),
+    ('team_members', 'UPDATE', 0.12), ('team_members', 'INSERT', 0.03),
+    ('role_requirements', 'UPDATE', 0.04), ('role_requirements', 'INSERT', 0.01),
+    ('skills', 'UPDATE', 0.01), ('skills', 'INSERT', 0.01), ('roles', 'UPDATE', 0.01),
+)
+PROFICIENCY_P = (0.45, 0.35, 0.20)
+REQUIREMENT_P = (0.30, 0.45, 0.25)
+
+
+def zipf_weights(n, exponent, rng):
+    """Popularity weights of ``n`` items in random id order"""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Loader:
+    """Writes row batches with multi-row INSERTs (or LOAD DATA LOCAL INFILE)"""
+
+    def __init__(self, connection, batch, load_data=False):
+        self.connection = connection
+        self.batch = batch
+        self.load_data = load_data
+        cursor = connection.cursor()
+        cursor.execute('SET SESSION unique_checks = 0, foreign_key_checks = 0')
+        cursor.close()
+
+    def load(self, table, columns, rows, total=None):
+        started = time.perf_counter()
+        count = 0
+        cursor = self.connection.cursor()
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        for batch in batched(rows, self.batch):
+            if self.load_data:
+                self._load_file(cursor, table, columns, batch)
+            else:
+                cursor.executemany(sql, batch)
+            self.connection.commit()
+            count += len(batch)
+            if total:
+                elapsed = time.perf_counter() - started
+                print(f'\r  {table}: {count:,}/{total:,} ({count / elapsed:,.0f} rows/s)', end='', flush=True)
+        cursor.close()
+        elapsed = time.perf_counter() - started
+        print(f'\r  {table}: {count:,} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)' + ' ' * 10)
+        return count
+
+    @staticmethod
+    def _field(value):
+        if value is None:
+            return '\\N'
+        return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+    def _load_file(self, cursor, table, columns, batch):
+        with tempfile.NamedTemporaryFile('w', suffix='.tsv', encoding='utf-8', delete=False) as f:
+            for row in batch:
+                f.write('\t'.join(self._field(value) for value in row) + '\n')
+        try:
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({', '.join(columns)})",
+                (f.name,)
+            )
+        finally:
+            os.unlink(f.name)
+
+
+class Organisation:
+    """Id ranges and popularity weights shared by the generated tables"""
+
+    def __init__(self, args, first_ids, rng):
+        self.args = args
+        self.rng = rng
+        self.first_role, self.first_skill, self.first_member = first_ids
+        self.role_ids = np.arange(self.first_role, self.first_role + args.roles)
+        self.skill_ids = np.arange(self.first_skill, self.first_skill + args.skills)
+        self.member_ids = np.arange(self.first_member, self.first_member + args.members)
+        self.skill_p = zipf_weights(args.skills, args.zipf, rng)
+        self.role_p = zipf_weights(args.roles, args.zipf, rng)
+        self.categories = rng.choice(list(CATEGORY_SHARE), size=args.skills, p=list(CATEGORY_SHARE.values()))
+        self.requirements = self._requirements()
+        # 0 for members without a role (one in ten)
+        self.member_roles = rng.choice(self.role_ids, size=args.members, p=self.role_p)
+        self.member_roles[rng.random(args.members) < 0.1] = 0
+
+    def role_name(self, role_id):
+        i = role_id - self.first_role
+        level = ROLE_LEVELS[i % len(ROLE_LEVELS)]
+        area = ROLE_AREAS[(i // len(ROLE_LEVELS)) % len(ROLE_AREAS)]
+        return f'{level} {area} {role_id}'
+
+    def skill_name(self, skill_id):
+        stems = SKILL_STEMS[self.categories[skill_id - self.first_skill]]
+        return f'{stems[skill_id % len(stems)]} {skill_id}'
+
+    def roles(self):
+        for role_id in map(int, self.role_ids):
+            name = self.role_name(role_id)
+            yield (role_id, name, f"{name.rsplit(' ', 1)[0]} position.")
+
+    def skills(self):
+        for skill_id, category in zip(map(int, self.skill_ids), self.categories):
+            yield (skill_id, self.skill_name(skill_id), str(category))
+
+    def _requirements(self):
+        """``{role_id: [(skill_id, min_level)]}``"""
+        count = min(self.args.reqs_per_role, self.args.skills)
+        requirements = {}
+        for role_id in map(int, self.role_ids):
+            skills = self.rng.choice(self.skill_ids, size=count, replace=False, p=self.skill_p)
+            levels = self.rng.choice((1, 2, 3), size=count, p=REQUIREMENT_P)
+            requirements[role_id] = [(int(skill_id), int(level)) for skill_id, level in zip(skills, levels)]
+        return requirements
+
+    def role_requirements(self):
+        for role_id, requirements in self.requirements.items():
+            for skill_id, level in requirements:
+                yield (role_id, skill_id, level)
+
+    def members(self):
+        rng = self.rng
+        chunk = 10000
+        for start in range(0, len(self.member_ids), chunk):
+            ids = self.member_ids[start:start + chunk]
+            firsts = rng.integers(len(FIRST_NAMES), size=len(ids))
+            lasts = rng.integers(len(LAST_NAMES), size=len(ids))
+            middles = rng.integers(len(MIDDLE_NAMES) * 3, size=len(ids))  # two in three have none
+            roles = self.member_roles[start:start + chunk]
+            for i, mem_id in enumerate(ids):
+                first, last = FIRST_NAMES[firsts[i]], LAST_NAMES[lasts[i]]
+                yield (
+                    int(mem_id), first, MIDDLE_NAMES[middles[i]] if middles[i] < len(MIDDLE_NAMES) else '', last,
+                    f'{first}.{last}.{mem_id}'.lower() + '@gmail.com', f'{6000000000 + int(mem_id)}',
+                    int(roles[i]) or None,
+                )
+
+    def mem_skills(self):
+        rng = self.rng
+        cap = min(self.args.skills, max(3 * self.args.skills_per_member, 1))
+        chunk = 2000
+        for start in range(0, len(self.member_ids), chunk):
+            ids = self.member_ids[start:start + chunk]
+            roles = self.member_roles[start:start + chunk]
+            counts = np.clip(rng.poisson(self.args.skills_per_member, size=len(ids)), 1, cap)
+            # Oversample with replacement, then keep each member's first distinct draws
+            draws = rng.choice(self.skill_ids, size=(len(ids), cap + cap // 2), p=self.skill_p)
+            levels = rng.choice((1, 2, 3), size=(len(ids), cap + cap // 2), p=PROFICIENCY_P)
+            required_levels = rng.choice((1, 2, 3), size=(len(ids), self.args.reqs_per_role), p=PROFICIENCY_P)
+            for i, mem_id in enumerate(ids):
+                seen = set()
+                # The role's requirements first, each at or above its minimum level
+                for (skill_id, minimum), level in zip(self.requirements.get(int(roles[i]), ()), required_levels[i]):
+                    seen.add(skill_id)
+                    yield (int(mem_id), skill_id, max(minimum, int(level)))
+                if len(seen) >= counts[i]:
+                    continue
+                for skill_id, level in zip(draws[i], levels[i]):
+                    if skill_id in seen:
+                        continue
+                    seen.add(skill_id)
+                    yield (int(mem_id), int(skill_id), int(level))
+                    if len(seen) == counts[i]:
+                        break
+
+    def history(self):
+        """Trigger-shaped audit rows, oldest first"""
+        rng = self.rng
+        total = self.args.audit_rows
+        end = datetime.now() - timedelta(hours=1)
+        span = timedelta(days=self.args.history_days).total_seconds()
+        kinds = [(table, operation) for table, operation, _ in HISTORY_MIX]
+        shares = np.array([share for _, _, share in HISTORY_MIX])
+        chunk = 20000
+        for start in range(0, total, chunk):
+            size = min(chunk, total - start)
+            # Sorted offsets within this chunk's slice of the window keep change_date in log_id order
+            offsets = np.sort(rng.uniform(start, start + size, size)) / total * span
+            picks = rng.choice(len(kinds), size=size, p=shares / shares.sum())
+            members = rng.choice(self.member_ids, size=size)
+            skills = rng.choice(self.skill_ids, size=size, p=self.skill_p)
+            roles = rng.choice(self.role_ids, size=size, p=self.role_p)
+            old_levels = rng.integers(1, 4, size=size)
+            new_levels = rng.integers(1, 4, size=size)
+            users = rng.integers(len(CHANGED_BY), size=size)
+            for i in range(size):
+                table, operation = kinds[picks[i]]
+                mem_id, skill_id, role_id = int(members[i]), int(skills[i]), int(roles[i])
+                old = new = None
+                if table == 'mem_skills':
+                    record = f'{mem_id}-{skill_id}'
+                    if operation != 'INSERT':
+                        old = f'Proficiency: {old_levels[i]}'
+                    if operation != 'DELETE':
+                        level = new_levels[i] if new_levels[i] != old_levels[i] else old_levels[i] % 3 + 1
+                        new = f'Proficiency: {level}'
+                elif table == 'role_requirements':
+                    record = f'{role_id}-{skill_id}'
+                    if operation == 'UPDATE':
+                        old = f'Min Proficiency: {old_levels[i]}'
+                    new = f'Min Proficiency: {new_levels[i]}'
+                elif table == 'team_members':
+                    record = str(mem_id)
+                    name = f'Name: {FIRST_NAMES[mem_id % len(FIRST_NAMES)]} {LAST_NAMES[mem_id % len(LAST_NAMES)]}'
+                    if operation == 'UPDATE':
+                        old = f'{name}, RoleID: {role_id}'
+                        new = f'{name}, RoleID: {int(self.role_ids[(role_id + 1) % len(self.role_ids)])}'
+                    else:
+                        new = f'{name}, RoleID: {role_id}, Phone: {6000000000 + mem_id}'
+                elif table == 'skills':
+                    record = str(skill_id)
+                    new = f'Skill: {self.skill_name(skill_id)}'
+                    if operation == 'UPDATE':
+                        old = new
+                else:
+                    record = str(role_id)
+                    old = new = f'Role: {self.role_name(role_id)}'
+                changed = end - timedelta(seconds=span - float(offsets[i]))
+                yield (table, operation, record, old, new, CHANGED_BY[users[i]], changed.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def connect(load_data):
+    load_dotenv()
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        database=os.getenv("DB_NAME"),
+        allow_local_infile=load_data
+    )
+
+
+def next_ids(connection):
+    cursor = connection.cursor()
+    ids = []
+    for table, column in (('roles', 'role_id'), ('skills', 'skill_id'), ('team_members', 'mem_id')):
+        cursor.execute(f'SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}')
+        ids.append(int(cursor.fetchone()[0]))
+    cursor.close()
+    return ids
+
+
+def reset(connection):
+    cursor = connection.cursor()
+    cursor.execute('SET SESSION foreign_key_checks = 0')
+    for table in TABLES:
+        cursor.execute(f'TRUNCATE TABLE {table}')
+    cursor.execute('SET SESSION foreign_key_checks = 1')
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--members', type=int, default=100000)
+    parser.add_argument('--skills', type=int, default=5000)
+    parser.add_argument('--roles', type=int, default=250)
+    parser.add_argument('--reqs-per-role', type=int, default=8)
+    parser.add_argument('--skills-per-member', type=float, default=12)
+    parser.add_argument('--audit-rows', type=int, default=2000000)
+    parser.add_argument('--history-days', type=int, default=730)
+    parser.add_argument('--zipf', type=float, default=1.0, help='popularity skew of skills and roles')
+    parser.add_argument('--batch', type=int, default=5000, help='rows per INSERT / LOAD DATA and per commit')
+    parser.add_argument('--load-data', action='store_true', help='use LOAD DATA LOCAL INFILE')
+    parser.add_argument('--reset', action='store_true', help='empty every table first (seed data included)')
+    parser.add_argument('--seed', type=int, default=13)
+    args = parser.parse_args()
+
+    connection = connect(args.load_data)
+    if args.reset:
+        reset(connection)
+    rng = np.random.default_rng(args.seed)
+    org = Organisation(args, next_ids(connection), rng)
+    loader = Loader(connection, args.batch, args.load_data)
+    started = time.perf_counter()
+
+    # History first, so log_id order follows change_date; trigger rows for the new data come after it
+    loader.load('audit_logs', ('table_name', 'operation_type', 'record_id', 'old_value', 'new_value',
+                               'changed_by', 'change_date'), org.history(), args.audit_rows)
+    loader.load('roles', ('role_id', 'role_name', 'description'), org.roles(), args.roles)
+    loader.load('skills', ('skill_id', 'skill_name', 'category'), org.skills(), args.skills)
+    loader.load('role_requirements', ('role_id', 'skill_id', 'min_proficiency_required'),
+                org.role_requirements(), args.roles * args.reqs_per_role)
+    loader.load('team_members', ('mem_id', 'first_name', 'middle_name', 'last_name', 'email', 'phone_no', 'role_id'),
+                org.members(), args.members)
+    loader.load('mem_skills', ('mem_id', 'skill_id', 'proficiency_level'), org.mem_skills(),
+                int(args.members * args.skills_per_member))
+
+    cursor = connection.cursor()
+    cursor.execute(f"ANALYZE TABLE {', '.join(TABLES)}")
+    cursor.fetchall()
+    for table in TABLES:
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        print(f'{table:>18}: {cursor.fetchone()[0]:,} rows')
+    cursor.close()
+    connection.close()
+    print(f'done in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,573 @@
+"""Closed-loop load test: simulated users with think time against a running app.
+
+    gunicorn -w 4 --threads 8 app:app        (or: python app.py)
+    python benchmarks/load_test.py --url http://localhost:5000 --users planner=20,manager=5,dashboard=3 --duration 120
+
+Every virtual user is a thread running its scenario in a loop: one step, then
+a think time drawn from an exponential distribution around ``--think``
+seconds. The loop is closed - a user waits for each response before its next
+step - so a slow server slows its users down instead of piling up requests.
+
+Scenarios:
+
+- planner: searches /find-experts for one to three popular skills (all or
+  any of them), sometimes asks /api/staffing for a team, then opens one of
+  the members found
+- manager: opens a member's edit form, changes one proficiency by a level
+  (never below what the member's role requires) and saves it; one save in
+  ``--role-change`` also moves the member to another role, which
+  validate_role_eligibility accepts or rejects. Saves redirect either way, so
+  their outcome is read from the message flashed into the session cookie:
+  committed, ineligible (rejected by the trigger) or failed (any other
+  error - deadlocks and lock wait timeouts included)
+- dashboard: loads /reports, / and /api/cache-stats every
+  ``--dashboard-interval`` seconds
+
+Members, skills and roles are sampled from the database the app uses (DB_*
+settings); ``--hot-members N`` points every manager at the same N members to
+provoke lock contention.
+
+Reported, per step and overall: requests, throughput, p50 / p95 / p99 / max
+latency and errors (connection failures, 5xx, failed saves), with each save
+outcome as a step of its own. From the app's /metrics: the
+requests it rolled back after a database error, rejected role changes
+included. From InnoDB: row lock waits and their time, deadlocks and lock wait
+timeouts during the run, the most lock waits seen at once and the statements
+waiting and blocking (sampled every second from sys.innodb_lock_waits), and
+the latest deadlock if one was detected during the run.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from urllib.parse import urlencode, urlsplit
+
+from flask.json.tag import TaggedJSONSerializer
+from itsdangerous import base64_decode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_data import connect  # noqa: E402
+from query_stats import normalize  # noqa: E402
+from stats import percentile  # noqa: E402
+
+SAMPLE = 500
+TIMEOUT = 30.0
+LOCK_SAMPLE_INTERVAL = 1.0
+METRIC_RE = re.compile(r'^(\w+)\{([^}]*)\} ([0-9.e+-]+)$')
+SESSION_COOKIE_RE = re.compile(r'(?:^|[\s,;])session=([^;,]+)')
+INELIGIBLE_MESSAGE = 'Cannot assign this role'
+
+
+# ==================== DATA ====================
+
+class Samples:
+    """Ids and names to drive the scenarios with"""
+
+    def __init__(self, hot_members=0, size=SAMPLE):
+        connection = connect(False)
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute('SELECT mem_id FROM team_members ORDER BY RAND() LIMIT %s', (hot_members or size,))
+            self.members = [row['mem_id'] for row in cursor.fetchall()]
+            cursor.execute('SELECT role_id FROM roles')
+            self.roles = [row['role_id'] for row in cursor.fetchall()]
+            cursor.execute('SELECT role_id, skill_id, min_proficiency_required FROM role_requirements')
+            self.requirements = {}  # {role_id: {skill_id: minimum level}}
+            for row in cursor.fetchall():
+                self.requirements.setdefault(row['role_id'], {})[row['skill_id']] = row['min_proficiency_required']
+            cursor.execute("""
+                SELECT s.skill_name FROM mem_skills ms JOIN skills s ON s.skill_id = ms.skill_id
+                GROUP BY s.skill_id, s.skill_name ORDER BY COUNT(*) DESC LIMIT 30
+            """)
+            self.popular = [row['skill_name'] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            connection.close()
+        if not (self.members and self.roles and self.popular):
+            sys.exit('Not enough data to load test with (run generate_data.py first)')
+
+
+class MemberForms:
+    """Current edit-form values of a member, read on the load tester's own connection"""
+
+    def __init__(self):
+        self.connection = connect(False)
+        self.connection.autocommit = True
+
+    def read(self, mem_id):
+        cursor = self.connection.cursor(dictionary=True)
+        try:
+            cursor.execute('SELECT * FROM team_members WHERE mem_id = %s', (mem_id,))
+            member = cursor.fetchone()
+            cursor.execute('SELECT skill_id, proficiency_level FROM mem_skills WHERE mem_id = %s', (mem_id,))
+            skills = cursor.fetchall()
+        finally:
+            cursor.close()
+        if member is None:
+            return None
+        form = {name: member[name] or '' for name in ('first_name', 'middle_name', 'last_name', 'email', 'phone_no')}
+        form['role_id'] = member['role_id'] or ''
+        form['skills'] = [str(row['skill_id']) for row in skills]
+        for row in skills:
+            form[f"proficiency_{row['skill_id']}"] = row['proficiency_level']
+        return form
+
+    def close(self):
+        self.connection.close()
+
+
+# ==================== RECORDING ====================
+
+class Recorder:
+    """Latencies and outcomes per step, for the whole run and the current interval"""
+
+    def __init__(self):
+        self.steps = {}
+        self.interval = []
+        self._lock = threading.Lock()
+
+    def record(self, step, seconds, status, error=False):
+        error = error or status is None or status >= 500
+        with self._lock:
+            stat = self.steps.get(step)
+            if stat is None:
+                stat = self.steps[step] = {'times': [], 'errors': 0, 'statuses': Counter()}
+            stat['times'].append(seconds)
+            stat['statuses'][str(status) if status is not None else 'failed'] += 1
+            if error:
+                stat['errors'] += 1
+            self.interval.append((seconds, error))
+
+    def take_interval(self):
+        with self._lock:
+            interval, self.interval = self.interval, []
+        return interval
+
+    def summary(self, elapsed):
+        with self._lock:
+            steps = {name: dict(stat, times=sorted(stat['times'])) for name, stat in self.steps.items()}
+        rows = {}
+        everything = sorted(t for stat in steps.values() for t in stat['times'])
+        for name, stat in sorted(steps.items()) + [('total', {
+            'times': everything, 'errors': sum(s['errors'] for s in steps.values()),
+            'statuses': sum((s['statuses'] for s in steps.values()), Counter()),
+        })]:
+            times = stat['times']
+            if not times:
+                continue
+            rows[name] = {
+                'requests': len(times),
+                'per_second': round(len(times) / elapsed, 2),
+                'p50_ms': round(percentile(times, 50) * 1000, 1),
+                'p95_ms': round(percentile(times, 95) * 1000, 1),
+                'p99_ms': round(percentile(times, 99) * 1000, 1),
+                'max_ms': round(times[-1] * 1000, 1),
+                'errors': stat['errors'],
+                'statuses': dict(stat['statuses']),
+            }
+        return rows
+
+
+def flashed(set_cookie):
+    """``(category, message)`` last flashed into Flask's session cookie, or None
+
+    The cookie is signed, not encrypted: its payload reads without the key.
+    """
+    match = SESSION_COOKIE_RE.search(set_cookie or '')
+    if match is None:
+        return None
+    payload = match.group(1).rsplit('.', 2)[0]  # drop the timestamp and signature
+    try:
+        data = base64_decode(payload.lstrip('.'))
+        if payload.startswith('.'):
+            data = zlib.decompress(data)
+        flashes = TaggedJSONSerializer().loads(data.decode('utf-8')).get('_flashes') or []
+    except (ValueError, zlib.error):
+        return None
+    return tuple(flashes[-1]) if flashes else None
+
+
+def save_outcome(flash):
+    """committed / ineligible / failed, from the message a form save flashed"""
+    if flash is None:
+        return 'unknown'
+    category, message = flash
+    if category == 'success':
+        return 'committed'
+    return 'ineligible' if INELIGIBLE_MESSAGE in message else 'failed'
+
+
+class Client:
+    """One keep-alive HTTP connection per virtual user; redirects are not followed"""
+
+    def __init__(self, base_url, recorder):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.recorder = recorder
+        self.connection = None
+
+    def request(self, step, method, path, params=None, form=None, body=None, save=False):
+        """Issue and record one request; ``save`` records a form save under its outcome"""
+        if params:
+            path = f'{path}?{urlencode(params, doseq=True)}'
+        headers = {}
+        if form is not None:
+            body = urlencode(form, doseq=True)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        status, data, set_cookie = None, b'', None
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=TIMEOUT)
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+            set_cookie = response.getheader('Set-Cookie')
+            if response.will_close:
+                self.close()
+        except (OSError, http.client.HTTPException):
+            self.close()
+        seconds = time.perf_counter() - started
+        failed = False
+        if save and status is not None and status < 500:
+            outcome = save_outcome(flashed(set_cookie))
+            step, failed = f'{step} ({outcome})', outcome == 'failed'
+        self.recorder.record(step, seconds, status, failed)
+        return status, data
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+# ==================== SCENARIOS ====================
+
+class User(threading.Thread):
+    """A virtual user running ``scenario`` until ``stop`` is set"""
+
+    def __init__(self, name, scenario, args, samples, recorder, stop, seed):
+        super().__init__(name=name, daemon=True)
+        self.scenario = scenario
+        self.args = args
+        self.samples = samples
+        self.stop = stop
+        self.rnd = random.Random(seed)
+        self.client = Client(args.url, recorder)
+
+    def think(self, mean=None):
+        """Wait an exponentially distributed think time; False once the run is over"""
+        mean = self.args.think if mean is None else mean
+        return not self.stop.wait(self.rnd.expovariate(1 / mean) if mean > 0 else 0)
+
+    def run(self):
+        try:
+            while not self.stop.is_set():
+                self.scenario(self)
+        finally:
+            self.client.close()
+
+
+def planner(user):
+    rnd, samples = user.rnd, user.samples
+    skills = rnd.sample(samples.popular, rnd.randint(1, min(3, len(samples.popular))))
+    mode = rnd.choice(('all', 'all', 'any'))
+    user.client.request('planner: find experts', 'GET', '/find-experts', {'skill': skills, 'mode': mode})
+    if not user.think():
+        return
+    if rnd.random() < 0.3:
+        needs = [f'{skill}:{rnd.randint(1, 3)}' for skill in rnd.sample(samples.popular, min(4, len(samples.popular)))]
+        user.client.request('planner: staffing', 'POST', '/api/staffing', body={'needs': needs})
+        if not user.think():
+            return
+    user.client.request('planner: open member', 'GET', f'/members/{rnd.choice(samples.members)}')
+    user.think()
+
+
+def manager(user):
+    rnd, samples = user.rnd, user.samples
+    mem_id = rnd.choice(samples.members)
+    user.client.request('manager: edit form', 'GET', f'/members/{mem_id}/edit')
+    if not user.think():
+        return
+    form = user.forms.read(mem_id)
+    if form is None:
+        return
+    step = 'manager: save'
+    if not form['role_id'] or rnd.random() < 1 / user.args.role_change:
+        form['role_id'] = rnd.choice(samples.roles)
+        step = 'manager: save with role change'
+    # Only changes that keep the member eligible for the role, so later saves aren't rejected
+    required = samples.requirements.get(form['role_id'], {})
+    changeable = [skill_id for skill_id in form['skills']
+                  if shifted(form[f'proficiency_{skill_id}']) >= required.get(int(skill_id), 0)]
+    if changeable:
+        skill_id = rnd.choice(changeable)
+        form[f'proficiency_{skill_id}'] = shifted(form[f'proficiency_{skill_id}'])
+    user.client.request(step, 'POST', f'/members/{mem_id}/edit', form=form, save=True)
+    user.think()
+
+
+def shifted(level):
+    """A proficiency one level up, or down from 3"""
+    return level + 1 if level < 3 else level - 1
+
+
+def dashboard(user):
+    user.client.request('dashboard: reports', 'GET', '/reports')
+    user.client.request('dashboard: home', 'GET', '/')
+    user.client.request('dashboard: cache stats', 'GET', '/api/cache-stats')
+    user.think(user.args.dashboard_interval)
+
+
+SCENARIOS = {'planner': planner, 'manager': manager, 'dashboard': dashboard}
+
+
+# ==================== INNODB LOCKS ====================
+
+class LockMonitor:
+    """InnoDB lock counters before / after the run, and lock waits sampled during it"""
+
+    STATUS = ('Innodb_row_lock_waits', 'Innodb_row_lock_time', 'Innodb_row_lock_time_max')
+    METRICS = ('lock_deadlocks', 'lock_timeouts')
+
+    def __init__(self):
+        self.connection = connect(False)
+        self.connection.autocommit = True
+        self.waits = 0
+        self.max_waits = 0
+        self.pairs = Counter()  # (waiting statement, blocking statement) -> samples
+        self.unavailable = set()
+        self._thread = None
+
+    def _query(self, sql):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def counters(self):
+        values = {}
+        rows = self._query("SHOW GLOBAL STATUS WHERE Variable_name IN ('{}')".format("', '".join(self.STATUS)))
+        values.update({name: int(value) for name, value in rows})
+        try:
+            rows = self._query("SELECT NAME, COUNT, STATUS FROM information_schema.INNODB_METRICS "
+                               "WHERE NAME IN ('{}')".format("', '".join(self.METRICS)))
+        except Exception as e:
+            self.unavailable.add(f'INNODB_METRICS: {e}')
+            rows = []
+        for name, count, status in rows:
+            if status == 'enabled':
+                values[name] = int(count)
+            else:
+                self.unavailable.add(f'{name} counter is disabled (SET GLOBAL innodb_monitor_enable = {name!r})')
+        return values
+
+    def latest_deadlock(self):
+        """Text of the LATEST DETECTED DEADLOCK section, or None"""
+        try:
+            status = self._query('SHOW ENGINE INNODB STATUS')[0][2]
+        except Exception as e:
+            self.unavailable.add(f'SHOW ENGINE INNODB STATUS: {e}')
+            return None
+        match = re.search(r'LATEST DETECTED DEADLOCK\n-+\n(.*?)\n-+\nTRANSACTIONS', status, re.S)
+        return match.group(1).strip() if match else None
+
+    def sample(self):
+        try:
+            rows = self._query('SELECT waiting_query, blocking_query FROM sys.innodb_lock_waits')
+        except Exception as e:
+            self.unavailable.add(f'sys.innodb_lock_waits: {e}')
+            return False
+        self.waits = len(rows)
+        self.max_waits = max(self.max_waits, self.waits)
+        for waiting, blocking in rows:
+            self.pairs[(normalize(waiting or '?'), normalize(blocking or '(idle in transaction)'))] += 1
+        return True
+
+    def start(self, stop):
+        def run():
+            while not stop.wait(LOCK_SAMPLE_INTERVAL):
+                if not self.sample():
+                    return
+
+        self._thread = threading.Thread(target=run, name='lock-sampler', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if self._thread is not None:
+            self._thread.join(timeout=LOCK_SAMPLE_INTERVAL * 2)
+        self.connection.close()
+
+
+def app_rollbacks(base_url):
+    """``{route: n}`` of http_request_errors_total{kind="db"} from the app's /metrics, or None"""
+    client = Client(base_url, Recorder())
+    status, data = client.request('metrics', 'GET', '/metrics')
+    client.close()
+    if status != 200:
+        return None
+    counts = {}
+    for line in data.decode('utf-8', 'replace').splitlines():
+        match = METRIC_RE.match(line)
+        if match and match.group(1) == 'http_request_errors_total':
+            labels = dict(re.findall(r'(\w+)="([^"]*)"', match.group(2)))
+            if labels.get('kind') == 'db':
+                counts[labels['route']] = counts.get(labels['route'], 0) + float(match.group(3))
+    return counts
+
+
+# ==================== RUN ====================
+
+def parse_users(text):
+    users = {}
+    for part in text.split(','):
+        name, _, count = part.partition('=')
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}' (use {', '.join(SCENARIOS)})")
+        users[name.strip()] = int(count or 1)
+    return users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--users', type=parse_users, default='planner=10,manager=4,dashboard=2',
+                        help='virtual users per scenario, e.g. planner=20,manager=5,dashboard=3')
+    parser.add_argument('--duration', type=float, default=60, help='seconds of load after ramp-up')
+    parser.add_argument('--ramp-up', type=float, default=10, help='seconds over which users start')
+    parser.add_argument('--think', type=float, default=1.0, help='mean think time between steps (seconds)')
+    parser.add_argument('--dashboard-interval', type=float, default=10.0)
+    parser.add_argument('--role-change', type=int, default=5, help='one manager save in N changes the role')
+    parser.add_argument('--hot-members', type=int, default=0, help='managers and planners use only N members')
+    parser.add_argument('--report-interval', type=float, default=5.0)
+    parser.add_argument('--no-locks', action='store_true', help="don't read InnoDB lock statistics")
+    parser.add_argument('--out', help='write the results to this JSON file')
+    parser.add_argument('--seed', type=int, default=13)
+    args = parser.parse_args()
+
+    samples = Samples(args.hot_members)
+    recorder = Recorder()
+    stop = threading.Event()
+    monitor = None if args.no_locks else LockMonitor()
+    locks_before = monitor.counters() if monitor else {}
+    deadlock_before = monitor.latest_deadlock() if monitor else None
+    rollbacks_before = app_rollbacks(args.url) or {}
+
+    users, forms = [], []
+    for scenario, count in args.users.items():
+        for i in range(count):
+            user = User(f'{scenario}-{i}', SCENARIOS[scenario], args, samples, recorder, stop, args.seed * 10000 + len(users))
+            if scenario == 'manager':
+                user.forms = MemberForms()
+                forms.append(user.forms)
+            users.append(user)
+    random.Random(args.seed).shuffle(users)
+
+    print(f"{len(users)} users ({', '.join(f'{n} {s}' for s, n in args.users.items())}) against {args.url}, "
+          f"think {args.think}s, ramp-up {args.ramp_up}s, {args.duration}s of load")
+    if monitor:
+        monitor.start(stop)
+    started = time.perf_counter()
+    for user in users:
+        user.start()
+        if args.ramp_up:
+            time.sleep(args.ramp_up / len(users))
+    load_started = time.perf_counter()
+    deadline = load_started + args.duration
+    while time.perf_counter() < deadline:
+        time.sleep(min(args.report_interval, max(0.0, deadline - time.perf_counter())))
+        interval = recorder.take_interval()
+        times = sorted(t for t, _ in interval)
+        print(f"  {time.perf_counter() - started:6.0f}s  {len(interval) / args.report_interval:7.1f} req/s  "
+              f"p95 {percentile(times, 95) * 1000 if times else 0:7.1f} ms  "
+              f"errors {sum(1 for _, error in interval if error):4d}  "
+              f"lock waits now {monitor.waits if monitor else '-'}")
+    stop.set()
+    for user in users:
+        user.join(TIMEOUT)
+    elapsed = time.perf_counter() - load_started
+    for form in forms:
+        form.close()
+
+    results = {
+        'settings': {name: value for name, value in vars(args).items() if name != 'out'},
+        'seconds': round(elapsed, 1),
+        'steps': recorder.summary(time.perf_counter() - started),
+    }
+    saves = Counter()
+    for name, row in results['steps'].items():
+        match = re.match(r'manager: save.* \((\w+)\)$', name)
+        if match:
+            saves[match.group(1)] += row['requests']
+    results['saves'] = dict(saves.most_common())
+    rollbacks_after = app_rollbacks(args.url)
+    if rollbacks_after is not None:
+        results['app_rollbacks'] = {route: int(n - rollbacks_before.get(route, 0))
+                                    for route, n in rollbacks_after.items() if n > rollbacks_before.get(route, 0)}
+    if monitor:
+        locks_after = monitor.counters()
+        deadlock = monitor.latest_deadlock()
+        monitor.close()
+        results['innodb'] = {
+            'row_lock_waits': locks_after.get('Innodb_row_lock_waits', 0) - locks_before.get('Innodb_row_lock_waits', 0),
+            'row_lock_time_ms': locks_after.get('Innodb_row_lock_time', 0) - locks_before.get('Innodb_row_lock_time', 0),
+            'row_lock_time_max_ms': locks_after.get('Innodb_row_lock_time_max'),
+            'deadlocks': locks_after['lock_deadlocks'] - locks_before['lock_deadlocks']
+            if 'lock_deadlocks' in locks_after else None,
+            'lock_wait_timeouts': locks_after['lock_timeouts'] - locks_before['lock_timeouts']
+            if 'lock_timeouts' in locks_after else None,
+            'max_concurrent_waits': monitor.max_waits,
+            'waits': [{'waiting': waiting, 'blocking': blocking, 'samples': n}
+                      for (waiting, blocking), n in monitor.pairs.most_common(10)],
+            'latest_deadlock': deadlock if deadlock and deadlock != deadlock_before else None,
+            'unavailable': sorted(monitor.unavailable),
+        }
+    report(results)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nresults written to {args.out}')
+
+
+def report(results):
+    print(f"\n{'step':<44} {'requests':>9} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'errors':>7}  status")
+    for name, row in results['steps'].items():
+        print(f"{name:<44} {row['requests']:>9} {row['per_second']:>7.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['max_ms']:>8.1f} {row['errors']:>7}  "
+              f"{' '.join(f'{code}x{n}' for code, n in sorted(row['statuses'].items()))}")
+    if results['saves']:
+        print(f"\nmanager saves: {', '.join(f'{n} {outcome}' for outcome, n in results['saves'].items())}")
+    if 'app_rollbacks' in results:
+        rolled_back = ', '.join(f'{route} {n}' for route, n in sorted(results['app_rollbacks'].items())) or 'none'
+        print(f'\nrolled back by the app (DB errors, rejected role changes): {rolled_back}')
+    innodb = results.get('innodb')
+    if innodb:
+        print(f"InnoDB: {innodb['row_lock_waits']} row lock waits ({innodb['row_lock_time_ms']} ms in total, "
+              f"longest {innodb['row_lock_time_max_ms']} ms), {innodb['deadlocks']} deadlocks, "
+              f"{innodb['lock_wait_timeouts']} lock wait timeouts, up to {innodb['max_concurrent_waits']} waits at once")
+        for wait in innodb['waits']:
+            print(f"  {wait['samples']:>4}x waiting: {wait['waiting'][:100]}\n        blocked by: {wait['blocking'][:100]}")
+        if innodb['latest_deadlock']:
+            print(f"\nlatest deadlock:\n{innodb['latest_deadlock']}")
+        for note in innodb['unavailable']:
+            print(f'  (unavailable: {note})')
+
+
+if __name__ == '__main__':
+    main()
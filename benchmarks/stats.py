@@ -0,0 +1,7 @@
+"""Summary statistics shared by the benchmark scripts."""
+import math
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of a sorted list: the smallest value with ``pct`` % at or below it"""
+    return ordered[max(0, math.ceil(pct * len(ordered) / 100) - 1)]
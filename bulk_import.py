@@ -0,0 +1,290 @@
+"""Bulk import of team members and their skills from CSV or JSON.
+
+Rows are validated a column at a time with the same Gmail / 10-digit phone
+rules as the member form. Duplicate emails and phone numbers are found inside
+the file with NumPy, and against team_members with one query per
+``LOOKUP_CHUNK`` rows. Valid members and their skills are then written with
+multi-row ``executemany`` inserts, one transaction per ``CHUNK_ROWS`` members.
+The audit triggers still log every member and skill row.
+
+CSV columns: first_name, middle_name, last_name, email, phone_no, role
+(name or id; ``role_id`` / ``role_name`` also work) and skills, written as
+``Python:3; Phlebotomy:2`` (skill name or id, level 1-3, default 3). JSON is
+a list of the same objects (or ``{"members": [...]}``), where ``skills`` may
+also be the member form's ``[{"skill_id": 4, "proficiency": 2}, ...]``.
+"""
+import csv
+import io
+import json
+import re
+
+import numpy as np
+from mysql.connector import Error
+
+GMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@gmail\.com$')
+PHONE_RE = re.compile(r'^\d{10}$')
+
+CHUNK_ROWS = 1000
+LOOKUP_CHUNK = 5000
+NAME_MAX = 100
+DEFAULT_PROFICIENCY = 3
+FIELDS = ('first_name', 'middle_name', 'last_name', 'email', 'phone_no')
+
+
+def parse_members(data, fmt):
+    """List of member dicts from CSV or JSON text/bytes; ValueError if unreadable"""
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    if fmt == 'json':
+        try:
+            rows = json.loads(data)
+        except ValueError as e:
+            raise ValueError(f'Invalid JSON: {e}')
+        if isinstance(rows, dict):
+            rows = rows.get('members')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError('JSON must be a list of member objects')
+        return rows
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(data))
+        if not reader.fieldnames or 'email' not in reader.fieldnames:
+            raise ValueError('CSV needs a header row with at least an email column')
+        return list(reader)
+    raise ValueError(f'Unsupported import format: {fmt}')
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _column(rows, field):
+    return np.array([_text(row.get(field)) for row in rows], dtype=object)
+
+
+def _matches(pattern, values):
+    return np.fromiter((bool(pattern.match(v)) for v in values), dtype=bool, count=len(values))
+
+
+def _first_occurrence(keys):
+    """For each key, the index of the row where it first appears"""
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return first[inverse.ravel()]
+
+
+def _lookup(names, ids, value):
+    """Resolve a name or numeric id against ``{lower name: id}`` and the set of its ids"""
+    value = _text(value)
+    if value.isdigit() and int(value) in ids:
+        return int(value)
+    return names.get(value.lower())
+
+
+def _parse_skills(value, skills, skill_ids):
+    """``[(skill_id, level)]`` plus error messages for one row's skills"""
+    if value in (None, ''):
+        return [], []
+    if isinstance(value, str):
+        items = []
+        for part in filter(None, (p.strip() for p in value.split(';'))):
+            name, _, level = part.rpartition(':') if ':' in part else (part, '', '')
+            items.append((name, level or DEFAULT_PROFICIENCY))
+    elif isinstance(value, list):
+        items = [
+            (item.get('skill_id') or item.get('skill_name') or item.get('skill'),
+             item.get('proficiency', DEFAULT_PROFICIENCY))
+            if isinstance(item, dict) else (item, DEFAULT_PROFICIENCY)
+            for item in value
+        ]
+    else:
+        return [], ['skills must be a list or "Skill:level; ..." text']
+
+    parsed, errors, seen = [], [], set()
+    for name, level in items:
+        skill_id = _lookup(skills, skill_ids, name)
+        if skill_id is None:
+            errors.append(f"Unknown skill '{_text(name)}'")
+            continue
+        try:
+            level = int(level)
+        except (TypeError, ValueError):
+            level = 0
+        if not 1 <= level <= 3:
+            errors.append(f"Proficiency for '{_text(name)}' must be 1, 2 or 3")
+        elif skill_id in seen:
+            errors.append(f"Skill '{_text(name)}' is listed twice")
+        else:
+            seen.add(skill_id)
+            parsed.append((skill_id, level))
+    return parsed, errors
+
+
+def validate_members(rows, roles, skills):
+    """Split parsed rows into members to insert and ``{'row', 'email', 'message'}`` errors
+
+    ``roles`` and ``skills`` map lower-cased names to ids. Row numbers are
+    1-based positions in the file's data (not counting the CSV header).
+    """
+    count = len(rows)
+    columns = {field: _column(rows, field) for field in FIELDS}
+    emails, phones = columns['email'], columns['phone_no']
+    messages = [[] for _ in range(count)]
+
+    def flag(mask, message):
+        for index in np.flatnonzero(mask):
+            messages[index].append(message(index) if callable(message) else message)
+
+    if count:
+        flag(columns['first_name'] == '', 'First name is required')
+        flag(columns['last_name'] == '', 'Last name is required')
+        for field in ('first_name', 'middle_name', 'last_name'):
+            too_long = np.fromiter((len(v) > NAME_MAX for v in columns[field]), dtype=bool, count=count)
+            flag(too_long, f'{field} is longer than {NAME_MAX} characters')
+        valid_email = _matches(GMAIL_RE, emails)
+        valid_phone = _matches(PHONE_RE, phones)
+        flag(~valid_email, 'Only Gmail addresses (@gmail.com) are allowed')
+        flag(~valid_phone, 'Phone number must be exactly 10 digits')
+
+        # team_members.email / phone_no are UNIQUE (case-insensitive collation)
+        email_keys = np.array([e.lower() for e in emails], dtype=object)
+        first_email, first_phone = _first_occurrence(email_keys), _first_occurrence(phones)
+        positions = np.arange(count)
+        flag(valid_email & (first_email != positions),
+             lambda i: f'Duplicate email in file (first on row {first_email[i] + 1})')
+        flag(valid_phone & (first_phone != positions),
+             lambda i: f'Duplicate phone number in file (first on row {first_phone[i] + 1})')
+
+    role_ids, skill_ids = set(roles.values()), set(skills.values())
+    members = []
+    for index, row in enumerate(rows):
+        role = row.get('role_id') or row.get('role') or row.get('role_name')
+        role_id = _lookup(roles, role_ids, role)
+        if not _text(role):
+            messages[index].append('Role selection is required')
+        elif role_id is None:
+            messages[index].append(f"Unknown role '{_text(role)}'")
+        member_skills, skill_errors = _parse_skills(row.get('skills'), skills, skill_ids)
+        messages[index].extend(skill_errors)
+        if not messages[index]:
+            members.append({
+                'row': index + 1,
+                'values': tuple(columns[field][index] for field in FIELDS) + (role_id,),
+                'email': emails[index],
+                'phone_no': phones[index],
+                'skills': member_skills,
+            })
+
+    errors = [
+        {'row': index + 1, 'email': emails[index] if count else '', 'message': message}
+        for index in range(count) for message in messages[index]
+    ]
+    return members, errors
+
+
+def existing_conflicts(cursor, members):
+    """Drop members whose email or phone is already taken; return the errors for them"""
+    taken_emails, taken_phones = set(), set()
+    for start in range(0, len(members), LOOKUP_CHUNK):
+        chunk = members[start:start + LOOKUP_CHUNK]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(
+            f"SELECT email, phone_no FROM team_members WHERE email IN ({placeholders}) OR phone_no IN ({placeholders})",
+            [m['email'] for m in chunk] + [m['phone_no'] for m in chunk]
+        )
+        for row in cursor.fetchall():
+            taken_emails.add(row['email'].lower())
+            taken_phones.add(row['phone_no'])
+
+    kept, errors = [], []
+    for member in members:
+        if member['email'].lower() in taken_emails:
+            errors.append({'row': member['row'], 'email': member['email'], 'message': 'Email already exists'})
+        elif member['phone_no'] in taken_phones:
+            errors.append({'row': member['row'], 'email': member['email'], 'message': 'Phone number already exists'})
+        else:
+            kept.append(member)
+    return kept, errors
+
+
+def _insert_chunk(cursor, chunk):
+    """Multi-row INSERTs for a chunk of members and their skills; returns the skill row count"""
+    cursor.executemany("""
+        INSERT INTO team_members (first_name, middle_name, last_name, email, phone_no, role_id)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, [member['values'] for member in chunk])
+
+    # Auto-increment ids of a multi-row insert are not guaranteed to be consecutive
+    cursor.execute(
+        f"SELECT mem_id, email FROM team_members WHERE email IN ({', '.join(['%s'] * len(chunk))})",
+        [member['email'] for member in chunk]
+    )
+    mem_ids = {row['email'].lower(): row['mem_id'] for row in cursor.fetchall()}
+    skill_rows = [
+        (mem_ids[member['email'].lower()], skill_id, level)
+        for member in chunk for skill_id, level in member['skills']
+    ]
+    if skill_rows:
+        cursor.executemany("""
+            INSERT INTO mem_skills (mem_id, skill_id, proficiency_level)
+            VALUES (%s, %s, %s)
+        """, skill_rows)
+    return len(skill_rows)
+
+
+def write_members(connection, cursor, members, chunk_rows=CHUNK_ROWS):
+    """Insert members chunk by chunk, committing each; returns (members, skills, errors)
+
+    A chunk that fails (e.g. a member added elsewhere since the duplicate
+    check) is rolled back and retried one member at a time, so only the
+    offending rows are reported.
+    """
+    imported = skill_count = 0
+    errors = []
+    for start in range(0, len(members), chunk_rows):
+        chunk = members[start:start + chunk_rows]
+        try:
+            skill_count += _insert_chunk(cursor, chunk)
+            connection.commit()
+            imported += len(chunk)
+            continue
+        except Error:
+            connection.rollback()
+        for member in chunk:
+            try:
+                skill_count += _insert_chunk(cursor, [member])
+                connection.commit()
+                imported += 1
+            except Error as e:
+                connection.rollback()
+                errors.append({'row': member['row'], 'email': member['email'], 'message': f'Database error: {e.msg}'})
+    return imported, skill_count, errors
+
+
+def import_members(connection, rows, dry_run=False, chunk_rows=CHUNK_ROWS):
+    """Validate and insert parsed member rows; returns the import report"""
+    cursor = connection.cursor(dictionary=True, buffered=True)
+    try:
+        cursor.execute("SELECT role_id, role_name FROM roles")
+        roles = {row['role_name'].lower(): row['role_id'] for row in cursor.fetchall()}
+        cursor.execute("SELECT skill_id, skill_name FROM skills")
+        skills = {row['skill_name'].lower(): row['skill_id'] for row in cursor.fetchall()}
+
+        members, errors = validate_members(rows, roles, skills)
+        members, conflicts = existing_conflicts(cursor, members)
+        errors += conflicts
+
+        imported = skill_count = 0
+        if not dry_run:
+            imported, skill_count, write_errors = write_members(connection, cursor, members, chunk_rows)
+            errors += write_errors
+    finally:
+        cursor.close()
+
+    errors.sort(key=lambda e: e['row'])
+    return {
+        'total': len(rows),
+        'valid': len(members),
+        'imported': imported,
+        'skills': skill_count,
+        'dry_run': dry_run,
+        'errors': errors,
+    }
@@ -0,0 +1,103 @@
+"""Small in-process caches shared by the routes in app.py."""
+import threading
+import time
+
+# Every cache registers itself here so hit/miss counters can be reported together
+_registry = {}
+_registry_lock = threading.Lock()
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe key/value cache whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, name, ttl=10.0, max_entries=1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by invalidate()
+        self.hits = 0
+        self.misses = 0
+        with _registry_lock:
+            _registry[name] = self
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None, generation=None):
+        """Store ``value``; skipped when ``generation`` is given and invalidate() ran since"""
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key not in self._data and len(self._data) >= self.max_entries:
+                self._evict()
+            self._data[key] = (expires, value)
+
+    @property
+    def generation(self):
+        """Current invalidation count, for callers whose reads started earlier"""
+        return self._generation
+
+    def get_or_load(self, key, loader, ttl=None, generation=None):
+        """Return the cached value, calling ``loader()`` to fill it on a miss
+
+        A loader result of None is returned but not cached, and neither is one
+        loaded across an invalidate() - it may predate the write that caused it.
+        Pass the ``generation`` read when the loader's snapshot began if that
+        was before the call (a transaction already open).
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            if generation is None:
+                generation = self._generation
+            value = loader()
+            if value is not None:
+                self.set(key, value, ttl, generation)
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when no key is given"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def _evict(self):
+        # Drop expired entries first, then the entry closest to expiry
+        now = time.monotonic()
+        expired = [k for k, (exp, _) in self._data.items() if exp <= now]
+        for k in expired:
+            del self._data[k]
+        if len(self._data) >= self.max_entries:
+            oldest = min(self._data, key=lambda k: self._data[k][0])
+            del self._data[oldest]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+def cache_stats():
+    """Hit/miss counters for every registered cache, keyed by cache name"""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}
@@ -0,0 +1,228 @@
+"""Connection pool used by get_db_connection() in app.py.
+
+mysql.connector ships a pool of its own, but it has no overflow, no waiting
+and no telemetry, so the app keeps this small pool instead:
+
+- ``size`` connections are kept open and reused between requests
+- up to ``max_overflow`` extra connections are opened under bursts and closed
+  again when they are returned
+- connections older than ``recycle`` seconds are replaced on checkout
+- ``pre_ping`` checks a connection is still alive before handing it out
+- when everything is checked out, callers wait up to ``timeout`` seconds and
+  then fall back to a direct, unpooled connection
+"""
+import threading
+import time
+
+
+class PooledConnection:
+    """Wraps a raw connection so that close() hands it back to the pool"""
+
+    def __init__(self, pool, raw, pooled=True):
+        self._pool = pool
+        self._raw = raw
+        self._pooled = pooled
+        self._closed = False
+        self._invalid = False
+        self.created_at = time.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def invalidate(self):
+        """Close the raw connection on release instead of pooling it again"""
+        self._invalid = True
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._pool._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Thread-safe pool of MySQL connections with checkout statistics"""
+
+    def __init__(self, connect, size=5, max_overflow=10, recycle=3600,
+                 pre_ping=True, timeout=5.0, on_wait=None):
+        self._connect = connect
+        self._on_wait = on_wait  # called with every connect()'s wait in seconds
+        self.size = size
+        self.max_overflow = max_overflow
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.timeout = timeout
+
+        self._idle = []
+        self._open = 0  # pooled connections currently open (idle + checked out)
+        self._cond = threading.Condition()
+
+        self._checked_out = 0
+        self._waiting = 0
+        self._checkouts = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+        self._fallbacks = 0
+        self._reconnects = 0
+        self._recycled = 0
+
+    def connect(self):
+        """Check a connection out of the pool, waiting or falling back if needed"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        conn = None
+        create = False
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    create = True
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            waited = time.monotonic() - started
+            self._wait_time += waited
+            self._max_wait = max(self._max_wait, waited)
+            if conn is None and not create:
+                # Pool exhausted - hand out a direct connection instead of failing
+                self._fallbacks += 1
+            else:
+                self._checked_out += 1
+                self._checkouts += 1
+
+        if self._on_wait is not None:
+            self._on_wait(waited)
+        if conn is None and not create:
+            return PooledConnection(self, self._connect(), pooled=False)
+        return self._checkout(conn, create)
+
+    def try_connect(self):
+        """Check out an idle connection, or open one within ``size``; None rather than wait
+
+        Never uses overflow or the unpooled fallback, so optional extra work
+        (see fanout.py) cannot crowd out requests under load.
+        """
+        with self._cond:
+            if self._idle:
+                conn, create = self._idle.pop(), False
+            elif self._open < self.size:
+                self._open += 1
+                conn, create = None, True
+            else:
+                return None
+            self._checked_out += 1
+            self._checkouts += 1
+        try:
+            return self._checkout(conn, create)
+        except Exception:
+            return None
+
+    def _checkout(self, conn, create):
+        try:
+            if create:
+                return PooledConnection(self, self._connect())
+            return self._prepare(conn)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+
+    def _prepare(self, conn):
+        """Recycle or revive an idle connection before handing it out"""
+        if self.recycle and time.monotonic() - conn.created_at > self.recycle:
+            self._discard(conn.raw)
+            with self._cond:
+                self._recycled += 1
+            return PooledConnection(self, self._connect())
+
+        if self.pre_ping:
+            try:
+                conn.raw.ping(reconnect=False)
+            except Exception:
+                self._discard(conn.raw)
+                with self._cond:
+                    self._reconnects += 1
+                return PooledConnection(self, self._connect())
+
+        conn._closed = False
+        return conn
+
+    def _release(self, conn):
+        if not conn._pooled:
+            self._discard(conn.raw)
+            return
+
+        # Never let an unfinished transaction leak into the next checkout
+        healthy = not conn._invalid
+        try:
+            if healthy and conn.raw.in_transaction:
+                conn.raw.rollback()
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            self._checked_out -= 1
+            if healthy and len(self._idle) < self.size:
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+            self._open -= 1
+            self._cond.notify()
+        self._discard(conn.raw)
+
+    @staticmethod
+    def _discard(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def dispose(self):
+        """Close every idle connection (checked-out ones close on release)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn in idle:
+            self._discard(conn.raw)
+
+    def stats(self):
+        """Snapshot of pool usage counters"""
+        with self._cond:
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': len(self._idle),
+                'checked_out': self._checked_out,
+                'overflow': max(0, self._open - self.size),
+                'waiting': self._waiting,
+                'checkouts': self._checkouts,
+                'wait_time_total': round(self._wait_time, 6),
+                'wait_time_max': round(self._max_wait, 6),
+                'fallbacks': self._fallbacks,
+                'reconnects': self._reconnects,
+                'recycled': self._recycled,
+            }
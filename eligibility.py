@@ -0,0 +1,279 @@
+"""Role eligibility from per-level skill bitsets.
+
+Every skill gets a bit position. A member is stored as three bitmasks, one
+per proficiency threshold (skills held at level >= 1, >= 2, >= 3), and a role
+as three masks of the skills it requires at exactly level 1, 2 and 3. The
+member meets the role when no required bit is missing at its level:
+
+    (req[1] & ~held[1]) | (req[2] & ~held[2]) | (req[3] & ~held[3]) == 0
+
+which is the NOT EXISTS test of Get_Eligible_Roles_For_Member. The masks are
+kept current from AnalyticsState's deltas, so nothing is re-read per request.
+
+For the whole organisation at once, ``matrix()`` copies the masks into NumPy
+uint64 word arrays and ``EligibilityMatrix.chunks()`` computes missing-skill
+counts for a block of members against every role in a few array operations.
+"""
+import csv
+import io
+import json
+import threading
+
+import numpy as np
+
+from analytics import format_full_name
+
+LEVELS = (1, 2, 3)
+_EMPTY = (0, 0, 0)
+MATRIX_CHUNK = 4096
+
+
+def _words(masks, width):
+    """Python int bitsets as a (len(masks), width) uint64 array"""
+    data = b''.join(mask.to_bytes(width * 8, 'little') for mask in masks)
+    return np.frombuffer(data, dtype='<u8').reshape(len(masks), width)
+
+
+class EligibilityMatrix:
+    """Frozen member x role requirements for one bulk eligibility request
+
+    Only skills that some selected role requires matter. ``held`` keeps just
+    the bitset words containing them; per block of members their levels are
+    decoded into a (members x required skills) array, and every role's
+    requirements are compared in one gather against padded
+    ``columns`` / ``needed`` arrays (padding needs level 0, always met).
+    """
+
+    def __init__(self, members, roles, held, bits, columns, needed):
+        self.members = members    # [(mem_id, full name)], by mem_id
+        self.roles = roles        # [{'role_id', 'role_name'}], by role_id
+        self.held = held          # (3, members, words) - only words holding required bits
+        self.bits = bits          # per required skill: its bit position within ``held`` rows
+        self.columns = columns    # (roles, max requirements) indexes into the required skills
+        self.needed = needed      # (roles, max requirements) minimum levels
+
+    def chunks(self, size=MATRIX_CHUNK):
+        """Yield ``(members, missing)`` blocks; missing is members x roles, 0 = eligible"""
+        for start in range(0, len(self.members), size):
+            levels = np.zeros((len(self.members[start:start + size]), len(self.bits)), dtype=np.uint8)
+            for held in self.held[:, start:start + size]:
+                levels += np.unpackbits(held.view(np.uint8), axis=1, bitorder='little')[:, self.bits]
+            missing = (levels[:, self.columns] < self.needed).sum(axis=2, dtype=np.int32)
+            yield self.members[start:start + size], missing
+
+    def stream_ndjson(self, with_missing=False):
+        """Header line, then ``[mem_id, cells]`` per member
+
+        ``cells`` is the missing-skill count per role (0 = eligible) with
+        ``with_missing``, otherwise a hex bitmask: bit i (byte i // 8, least
+        significant bit first) is set when the member is eligible for roles[i].
+        """
+        yield json.dumps({
+            'roles': self.roles,
+            'members': len(self.members),
+            'encoding': 'missing' if with_missing else 'hex',
+        }) + '\n'
+        for members, missing in self.chunks():
+            if with_missing:
+                rows = (f'[{mem_id},{json.dumps(cells.tolist())}]'
+                        for (mem_id, _), cells in zip(members, missing))
+            else:
+                packed = np.packbits(missing == 0, axis=1, bitorder='little')
+                rows = (f'[{mem_id},"{bits.tobytes().hex()}"]' for (mem_id, _), bits in zip(members, packed))
+            yield '\n'.join(rows) + '\n'
+
+    def stream_csv(self, with_missing=False):
+        """One row per member: id, name, then 1/0 (or missing-skill counts) per role"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['mem_id', 'member', *[role['role_name'] for role in self.roles]])
+        for members, missing in self.chunks():
+            cells = missing if with_missing else (missing == 0).astype(np.int8)
+            for (mem_id, name), row in zip(members, cells.tolist()):
+                writer.writerow([mem_id, name, *row])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+
+class EligibilityEngine:
+    """Member x role eligibility kept current from an AnalyticsState"""
+
+    def __init__(self, state):
+        self.state = state
+        self._lock = threading.RLock()
+        self._reset()
+        state.subscribe(self._on_event)
+        if state.loaded:
+            self._rebuild()
+
+    def _reset(self):
+        self._bits = {}      # skill_id -> bit position
+        self._free = []      # positions of deleted skills, reused first
+        self._next_bit = 0
+        self._held = {}      # mem_id -> [skills at >= 1, >= 2, >= 3]
+        self._required = {}  # role_id -> [skills required at 1, 2, 3]
+        # Names and categories are copied from the deltas, so reads never touch the state
+        self._members = {}   # mem_id -> full name
+        self._roles = {}     # role_id -> role name
+        self._categories = {}  # skill_id -> category
+
+    def _bit(self, skill_id):
+        bit = self._bits.get(skill_id)
+        if bit is None:
+            if self._free:
+                bit = self._free.pop()
+            else:
+                bit, self._next_bit = self._next_bit, self._next_bit + 1
+            self._bits[skill_id] = bit
+        return 1 << bit
+
+    # ----------------------------------------------------------------- deltas
+
+    def _rebuild(self):
+        state = self.state
+        with self._lock:
+            self._reset()
+            for role_id, role in state.roles.items():
+                self._put_role(role_id, role)
+            for skill_id, skill in state.skills.items():
+                self._categories[skill_id] = skill['category']
+            for mem_id, member in state.members.items():
+                self._put_member(mem_id, member)
+            for role_id, reqs in state.role_requirements.items():
+                for skill_id, level in reqs.items():
+                    self._set_requirement(role_id, skill_id, level or 1)
+            for mem_id, levels in state.member_skills_map.items():
+                for skill_id, level in levels.items():
+                    self._set_level(mem_id, skill_id, level)
+
+    def _put_role(self, role_id, role):
+        self._roles[role_id] = role['role_name']
+        self._required.setdefault(role_id, [0, 0, 0])
+
+    def _put_member(self, mem_id, member):
+        self._members[mem_id] = format_full_name(member)
+        self._held.setdefault(mem_id, [0, 0, 0])
+
+    def _set_level(self, mem_id, skill_id, level):
+        held = self._held.setdefault(mem_id, [0, 0, 0])
+        bit = self._bit(skill_id)
+        for i, threshold in enumerate(LEVELS):
+            if level >= threshold:
+                held[i] |= bit
+            else:
+                held[i] &= ~bit
+
+    def _set_requirement(self, role_id, skill_id, level):
+        required = self._required.setdefault(role_id, [0, 0, 0])
+        bit = self._bit(skill_id)
+        for i, threshold in enumerate(LEVELS):
+            if level == threshold:
+                required[i] |= bit
+            else:
+                required[i] &= ~bit
+
+    def _on_event(self, event, *args):
+        with self._lock:
+            if event == 'reload':
+                self._rebuild()
+            elif event == 'mem_skill':
+                mem_id, skill_id, _, level = args
+                self._set_level(mem_id, skill_id, level)
+            elif event == 'requirement':
+                role_id, skill_id, _, level = args
+                self._set_requirement(role_id, skill_id, level)
+            elif event == 'role':
+                self._put_role(*args)
+            elif event == 'member':
+                self._put_member(*args)
+            elif event == 'skill':
+                self._categories[args[0]] = args[1]['category']
+            elif event == 'member_deleted':
+                self._held.pop(args[0], None)
+                self._members.pop(args[0], None)
+            elif event == 'role_deleted':
+                self._required.pop(args[0], None)
+                self._roles.pop(args[0], None)
+            elif event == 'skill_deleted':
+                # Holders and requirements were cleared by the deltas before this one
+                self._categories.pop(args[0], None)
+                bit = self._bits.pop(args[0], None)
+                if bit is not None:
+                    self._free.append(bit)
+
+    # ------------------------------------------------------------------ reads
+
+    @staticmethod
+    def _missing(held, required):
+        return (required[0] & ~held[0]) | (required[1] & ~held[1]) | (required[2] & ~held[2])
+
+    def is_eligible(self, mem_id, role_id):
+        with self._lock:
+            return not self._missing(self._held.get(mem_id, _EMPTY), self._required.get(role_id, _EMPTY))
+
+    def missing_count(self, mem_id, role_id):
+        """Number of required skills the member lacks (or holds below the minimum)"""
+        with self._lock:
+            return bin(self._missing(self._held.get(mem_id, _EMPTY), self._required.get(role_id, _EMPTY))).count('1')
+
+    def matrix(self, role_ids=None, category=None):
+        """Snapshot every member against the selected roles (all by default)
+
+        With ``category``, only requirements on skills of that category count.
+        """
+        with self._lock:
+            roles = [
+                {'role_id': role_id, 'role_name': self._roles[role_id]}
+                for role_id in sorted(self._roles)
+                if role_ids is None or role_id in role_ids
+            ]
+            keep = -1
+            if category is not None:
+                keep = 0
+                for skill_id, bit in self._bits.items():
+                    if self._categories.get(skill_id) == category:
+                        keep |= 1 << bit
+
+            # (bit, level) pairs each role requires
+            requirements = []
+            for role in roles:
+                pairs = []
+                for level, mask in zip(LEVELS, self._required[role['role_id']]):
+                    mask &= keep
+                    while mask:
+                        low = mask & -mask
+                        pairs.append((low.bit_length() - 1, level))
+                        mask ^= low
+                requirements.append(pairs)
+            bits = np.array(sorted({bit for pairs in requirements for bit, _ in pairs}), dtype=np.int64)
+            words = np.unique(bits // 64)
+
+            members = sorted(self._members.items())
+            width = max(1, (self._next_bit + 63) // 64)
+            held = np.ascontiguousarray(np.stack([
+                _words([self._held.get(mem_id, _EMPTY)[i] for mem_id, _ in members], width)[:, words]
+                for i in range(len(LEVELS))
+            ]))
+
+        column = {bit: i for i, bit in enumerate(bits.tolist())}
+        depth = max((len(pairs) for pairs in requirements), default=0)
+        columns = np.zeros((len(roles), depth), dtype=np.intp)
+        needed = np.zeros((len(roles), depth), dtype=np.uint8)
+        for r, pairs in enumerate(requirements):
+            for k, (bit, level) in enumerate(pairs):
+                columns[r, k] = column[bit]
+                needed[r, k] = level
+        # Word positions relative to the kept words
+        bits = np.searchsorted(words, bits // 64) * 64 + bits % 64
+        return EligibilityMatrix(members, roles, held, bits, columns, needed)
+
+    def eligible_roles(self, mem_id):
+        """``[{'role_id', 'role_name'}]`` like Get_Eligible_Roles_For_Member, by role_id"""
+        with self._lock:
+            held = self._held.get(mem_id, _EMPTY)
+            return [
+                {'role_id': role_id, 'role_name': self._roles[role_id]}
+                for role_id in sorted(self._roles)
+                if not self._missing(held, self._required[role_id])
+            ]
@@ -0,0 +1,276 @@
+"""Inverted skill -> members index behind Find Experts.
+
+Each skill keeps a posting list of ``(-level, mem_id)`` sorted ascending, so
+the strongest holders come first and everyone at or above a minimum level is
+a prefix found by bisection. Members also keep their best skill in a posting
+of its own, which answers the "all skills" view the same way.
+
+- one skill: the page is a slice of the posting list and the total is the
+  prefix length, independent of how many members hold the skill
+- several skills: each skill also keeps a set of members per level. Every
+  qualifying set adds its weight into a NumPy score array indexed by mem_id,
+  so AND / OR is a threshold on the score and no member is visited in Python
+
+Multi-skill matches are ranked by skills matched, then summed proficiency,
+then mem_id, and only ``offset + limit`` of them are ordered. Like
+EligibilityEngine, the index is kept current from AnalyticsState's deltas.
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+import numpy as np
+
+from analytics import format_full_name
+from staffing import ALTERNATIVES, NODE_LIMIT, plan
+
+MODES = ('all', 'any')
+EXPERTS_PAGE = 50
+EXPERTS_PAGE_MAX = 200
+
+
+def _remove(posting, entry):
+    index = bisect_left(posting, entry)
+    if index < len(posting) and posting[index] == entry:
+        del posting[index]
+
+
+def _prefix(posting, min_level):
+    """Number of entries with level >= min_level"""
+    return bisect_right(posting, (-min_level, float('inf')))
+
+
+class ExpertIndex:
+    """Members by skill and proficiency, kept current from an AnalyticsState"""
+
+    def __init__(self, state):
+        self.state = state
+        self._lock = threading.RLock()
+        self._reset()
+        state.subscribe(self._on_event)
+        if state.loaded:
+            self._rebuild()
+
+    def _reset(self):
+        self._postings = {}   # skill_id -> [(-level, mem_id)] strongest first
+        self._holders = {}    # skill_id -> {level: set(mem_id)}
+        self._levels = {}     # mem_id -> {skill_id: level}
+        self._best = []       # [(-level, mem_id, skill_id)] each member's best skill
+        self._best_of = {}    # mem_id -> its entry in _best
+        self._members = {}    # mem_id -> (full name, role_id, email)
+        self._roles = {}      # role_id -> role name
+        self._skills = {}     # skill_id -> skill name
+        self._skill_ids = {}  # lower-cased skill name -> skill_id
+        self._width = 1       # above the largest mem_id seen, for score arrays
+
+    # ----------------------------------------------------------------- deltas
+
+    def _rebuild(self):
+        state = self.state
+        with self._lock:
+            self._reset()
+            for role_id, role in state.roles.items():
+                self._roles[role_id] = role['role_name']
+            for skill_id, skill in state.skills.items():
+                self._put_skill(skill_id, skill)
+            for mem_id, member in state.members.items():
+                self._put_member(mem_id, member)
+            # Bulk load: append everything, then sort each posting once
+            for mem_id, levels in state.member_skills_map.items():
+                if not levels:
+                    continue
+                self._levels[mem_id] = dict(levels)
+                for skill_id, level in levels.items():
+                    self._postings.setdefault(skill_id, []).append((-level, mem_id))
+                    self._holders_of(skill_id)[level].add(mem_id)
+                skill_id, level = min(levels.items(), key=lambda item: (-item[1], item[0]))
+                self._best_of[mem_id] = (-level, mem_id, skill_id)
+            for posting in self._postings.values():
+                posting.sort()
+            self._best = sorted(self._best_of.values())
+            self._width = max(self._levels, default=0) + 1
+
+    def _holders_of(self, skill_id):
+        holders = self._holders.get(skill_id)
+        if holders is None:
+            holders = self._holders[skill_id] = {1: set(), 2: set(), 3: set()}
+        return holders
+
+    def _put_skill(self, skill_id, skill):
+        old = self._skills.get(skill_id)
+        if old is not None and self._skill_ids.get(old.lower()) == skill_id:
+            del self._skill_ids[old.lower()]
+        self._skills[skill_id] = skill['skill_name']
+        self._skill_ids[skill['skill_name'].lower()] = skill_id
+        self._postings.setdefault(skill_id, [])
+        self._holders_of(skill_id)
+
+    def _put_member(self, mem_id, member):
+        self._members[mem_id] = (format_full_name(member), member['role_id'], member['email'])
+
+    def _set_level(self, mem_id, skill_id, level):
+        self._width = max(self._width, mem_id + 1)
+        levels = self._levels.setdefault(mem_id, {})
+        posting = self._postings.setdefault(skill_id, [])
+        holders = self._holders_of(skill_id)
+        old = levels.get(skill_id, 0)
+        if old:
+            _remove(posting, (-old, mem_id))
+            holders[old].discard(mem_id)
+        if level:
+            levels[skill_id] = level
+            insort(posting, (-level, mem_id))
+            holders[level].add(mem_id)
+        else:
+            levels.pop(skill_id, None)
+        self._update_best(mem_id)
+
+    def _update_best(self, mem_id):
+        old = self._best_of.pop(mem_id, None)
+        if old is not None:
+            _remove(self._best, old)
+        levels = self._levels.get(mem_id)
+        if levels:
+            # Highest level, then the lowest skill_id for a stable pick
+            skill_id, level = min(levels.items(), key=lambda item: (-item[1], item[0]))
+            entry = (-level, mem_id, skill_id)
+            insort(self._best, entry)
+            self._best_of[mem_id] = entry
+
+    def _on_event(self, event, *args):
+        with self._lock:
+            if event == 'reload':
+                self._rebuild()
+            elif event == 'mem_skill':
+                mem_id, skill_id, _, level = args
+                self._set_level(mem_id, skill_id, level)
+            elif event == 'member':
+                self._put_member(*args)
+            elif event == 'skill':
+                self._put_skill(*args)
+            elif event == 'role':
+                self._roles[args[0]] = args[1]['role_name']
+            elif event == 'member_deleted':
+                # Skills were removed by the deltas before this one
+                self._members.pop(args[0], None)
+                self._levels.pop(args[0], None)
+            elif event == 'skill_deleted':
+                self._postings.pop(args[0], None)
+                self._holders.pop(args[0], None)
+                name = self._skills.pop(args[0], None)
+                if name is not None and self._skill_ids.get(name.lower()) == args[0]:
+                    del self._skill_ids[name.lower()]
+            elif event == 'role_deleted':
+                self._roles.pop(args[0], None)
+
+    # ------------------------------------------------------------------ reads
+
+    def skill_id(self, value):
+        """Resolve a skill id or (case-insensitive) name; None if unknown"""
+        with self._lock:
+            value = str(value).strip()
+            if value.isdigit() and int(value) in self._skills:
+                return int(value)
+            return self._skill_ids.get(value.lower())
+
+    def _matched(self, mem_id, terms):
+        levels = self._levels.get(mem_id, {})
+        return [
+            (skill_id, levels[skill_id]) for skill_id, min_level in terms
+            if levels.get(skill_id, 0) >= min_level
+        ]
+
+    def _row(self, mem_id, matched):
+        name, role_id, email = self._members[mem_id]
+        return {
+            'mem_id': mem_id,
+            'Team Member': name,
+            'Job Role': self._roles.get(role_id),
+            'Contact Email': email,
+            'Skill': ', '.join(self._skills[skill_id] for skill_id, _ in matched),
+            'Proficiency': max(level for _, level in matched),
+            'skills': [
+                {'skill_id': skill_id, 'skill_name': self._skills[skill_id], 'proficiency': level}
+                for skill_id, level in matched
+            ],
+        }
+
+    def search(self, terms, mode='all', limit=EXPERTS_PAGE, offset=0, min_level=1):
+        """``(total, rows)`` for ``terms`` = [(skill_id, min level)], best first
+
+        Without terms, every member whose best skill is at ``min_level`` or
+        above is listed once with that skill. ``mode`` is 'all' or 'any'.
+        """
+        end = offset + limit
+        with self._lock:
+            if not terms:
+                total = _prefix(self._best, min_level)
+                return total, [
+                    self._row(mem_id, [(skill_id, -level)])
+                    for level, mem_id, skill_id in self._best[offset:min(end, total)]
+                ]
+
+            if len(terms) == 1:
+                (skill_id, min_level), = terms
+                posting = self._postings.get(skill_id, [])
+                total = _prefix(posting, min_level)
+                return total, [
+                    self._row(mem_id, [(skill_id, -level)])
+                    for level, mem_id in posting[offset:min(end, total)]
+                ]
+
+            # One weight per skill matched outranks any proficiency sum
+            width = self._width
+            weight = 3 * len(terms) + 1
+            score = np.zeros(width, dtype=np.int64)
+            for skill_id, min_level in terms:
+                for level, holders in self._holders.get(skill_id, {}).items():
+                    if level >= min_level and holders:
+                        score[np.fromiter(holders, dtype=np.int64, count=len(holders))] += weight + level
+            hits = np.flatnonzero(score >= (weight * len(terms) if mode == 'all' else 1))
+
+            # Highest score first, then mem_id; only offset + limit are ordered
+            keys = hits - score[hits] * width
+            if len(keys) > end:
+                keys = keys[np.argpartition(keys, end - 1)[:end]]
+            page = (np.sort(keys)[offset:] % width).tolist()
+            return len(hits), [self._row(mem_id, self._matched(mem_id, terms)) for mem_id in page]
+
+    def staffing(self, terms, objective='size', alternatives=ALTERNATIVES, exclude=(), loads=None,
+                 node_limit=NODE_LIMIT):
+        """Smallest (or least loaded) teams meeting every ``(skill_id, min level)`` need
+
+        Returns ``{'teams', 'exact', 'uncovered'}``; each team is
+        ``{'size', 'load', 'members'}`` with expert rows plus ``load``,
+        ``covers`` (need indexes) and ``alternates`` (same coverage, next
+        least loaded). ``loads`` maps mem_id to current load (default 0).
+        """
+        with self._lock:
+            width = self._width
+            masks = np.zeros(width, dtype=np.uint64)
+            for bit, (skill_id, min_level) in enumerate(terms):
+                for level, holders in self._holders.get(skill_id, {}).items():
+                    if level >= min_level and holders:
+                        masks[np.fromiter(holders, dtype=np.int64, count=len(holders))] |= np.uint64(1 << bit)
+            excluded = [mem_id for mem_id in exclude if 0 <= mem_id < width]
+            masks[excluded] = 0
+            load = np.zeros(width, dtype=np.float64)
+            for mem_id, value in (loads or {}).items():
+                if 0 <= mem_id < width:
+                    load[mem_id] = value
+
+            result = plan(np.arange(width), masks, load, (1 << len(terms)) - 1, objective, alternatives, node_limit)
+            teams = []
+            for team in result['teams']:
+                members = []
+                for member in team:
+                    row = self._row(member['mem_id'], self._matched(member['mem_id'], terms))
+                    row['load'] = member['load']
+                    row['covers'] = [bit for bit in range(len(terms)) if member['mask'] >> bit & 1]
+                    row['alternates'] = [
+                        {'mem_id': mem_id, 'Team Member': self._members[mem_id][0]}
+                        for mem_id in member['alternates']
+                    ]
+                    members.append(row)
+                teams.append({'size': len(members), 'load': sum(m['load'] for m in members), 'members': members})
+            uncovered = [bit for bit in range(len(terms)) if result['uncovered'] >> bit & 1]
+            return {'teams': teams, 'exact': result['exact'], 'uncovered': uncovered}
@@ -0,0 +1,139 @@
+"""Independent read queries of one page, run side by side.
+
+Detail pages issue several queries that don't depend on each other (the
+member, their skills, the analytics sync ...). Run one after another, the page
+waits for the sum of their round trips. ``FanOut.run`` gives each query after
+the first its own pooled connection on a shared thread pool, so the page waits
+for roughly the slowest one:
+
+- the first query runs in the calling thread on the request's own cursor
+- the others need a free worker (the executor is shared by every request)
+  and a connection from ``ConnectionPool.try_connect()``, neither of which is
+  waited for. Without both they run in the calling thread as well, so under
+  load a page degrades to sequential instead of queueing behind other pages
+  while holding idle connections
+- side connections are read-only and are rolled back when they go back to
+  the pool
+
+Side connections don't see the request's uncommitted writes, so only fan out
+reads that happen before a route writes anything.
+"""
+import contextvars
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+FANOUT_WORKERS = 4
+
+# Where the running side task was created - a worker thread's own stack can't tell
+task_site = contextvars.ContextVar('fanout_task_site', default=None)
+
+
+def _creator():
+    frame = sys._getframe(2)
+    return f'{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}'
+
+
+def fetchone(sql, params=()):
+    """Task returning the first row of ``sql``"""
+    def task(cursor):
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+    task.site = _creator()
+    return task
+
+
+def fetchall(sql, params=()):
+    """Task returning every row of ``sql``"""
+    def task(cursor):
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    task.site = _creator()
+    return task
+
+
+class FanOut:
+    """Runs ``{name: task(cursor)}`` concurrently on pooled connections
+
+    ``pool()`` returns the ConnectionPool (called per run, so it may be
+    created lazily). ``workers=0`` runs everything in the calling thread.
+    """
+
+    def __init__(self, pool, workers=FANOUT_WORKERS):
+        self._pool = pool
+        self.workers = workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # One slot per worker thread: a task is only submitted when a worker is free
+        self._slots = threading.BoundedSemaphore(workers) if workers else None
+
+    def executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='fanout')
+        return self._executor
+
+    def _run_on(self, connection, task):
+        try:
+            task_site.set(getattr(task, 'site', None))  # runs in a copied context
+            cursor = connection.cursor(dictionary=True, buffered=True)
+            try:
+                return task(cursor)
+            finally:
+                try:
+                    cursor.close()
+                finally:
+                    connection.close()
+        finally:
+            self._slots.release()
+
+    def _side_connection(self, pool):
+        """A worker slot and a pooled connection, or None when either is taken"""
+        if not self._slots.acquire(blocking=False):
+            return None
+        connection = pool.try_connect()
+        if connection is None:
+            self._slots.release()
+        return connection
+
+    def run(self, cursor, tasks):
+        """``{name: result}`` for ``tasks``; the first error is raised once all have finished"""
+        names = list(tasks)
+        local, futures = names[:1], {}
+        if len(names) > 1 and self.workers:
+            pool = self._pool()
+            for name in names[1:]:
+                connection = self._side_connection(pool)
+                if connection is None:
+                    local.append(name)
+                    continue
+                try:
+                    # Context variables (the request's query trace) follow the task
+                    futures[name] = self.executor().submit(
+                        contextvars.copy_context().run, self._run_on, connection, tasks[name]
+                    )
+                except RuntimeError:  # interpreter shutting down
+                    connection.close()
+                    self._slots.release()
+                    local.append(name)
+        else:
+            local = names
+
+        results, errors = {}, []
+        for name in local:
+            try:
+                results[name] = tasks[name](cursor)
+            except Exception as e:
+                errors.append(e)
+                break
+        # Always wait: a side query must not outlive the request that started it
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        return results
@@ -0,0 +1,260 @@
+"""Prometheus text-format metrics, aggregated across worker processes.
+
+Recording is lock-free on the hot path: every thread updates its own shard
+(plain dicts), and shards are only merged when metrics are collected. Threads
+that have exited are folded into a retired shard at collection, so a
+thread-per-request server does not grow the shard list.
+
+Counters and histograms are cumulative per process. With several worker
+processes, give them a shared ``directory``: each process writes its totals
+to ``metrics-<pid>-<start>.json`` every ``flush_interval`` seconds (and right
+before it serves a scrape), and ``render()`` sums every file in it. Files of
+exited processes are kept, so totals never go backwards; their gauges are
+dropped once the file is older than three flush intervals.
+
+Gauges and totals owned by other components (pool, caches) are read by
+collector callbacks at flush / scrape time instead of being updated inline.
+Ratios (cache hit ratio) are derived from the summed counters, never summed.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FLUSH_INTERVAL = 5.0
+
+COUNTER, GAUGE, HISTOGRAM = 'counter', 'gauge', 'histogram'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class _Shard:
+    def __init__(self):
+        self.counters = {}    # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [count per bucket..., +Inf count, sum]
+
+
+class Metrics:
+    """Registry of counters, histograms and collector callbacks"""
+
+    def __init__(self, directory=None, flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._help = {}        # name -> (type, help text, buckets)
+        self._collectors = []
+        self._ratios = []      # (name, hits counter, misses counter)
+        self._local = threading.local()
+        self._shards = []      # (thread, shard)
+        self._retired = _Shard()
+        self._lock = threading.Lock()
+        self._started = int(time.time())
+        self._flusher = None
+
+    # ------------------------------------------------------------ declaring
+
+    def counter(self, name, help_text):
+        self._help[name] = (COUNTER, help_text, None)
+
+    def gauge(self, name, help_text):
+        self._help[name] = (GAUGE, help_text, None)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self._help[name] = (HISTOGRAM, help_text, tuple(buckets))
+
+    def ratio(self, name, help_text, hits, misses):
+        """Gauge ``hits / (hits + misses)`` per label set, computed after processes are summed"""
+        self._help[name] = (GAUGE, help_text, None)
+        self._ratios.append((name, hits, misses))
+
+    def collector(self, fn):
+        """Register ``fn() -> [(name, labels, value)]`` for counters/gauges read at collection"""
+        self._collectors.append(fn)
+        return fn
+
+    # ------------------------------------------------------------ recording
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def inc(self, name, labels=(), value=1):
+        """Add ``value`` to counter ``name``; ``labels`` is a tuple of (label, value) pairs"""
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        """Record one observation of histogram ``name``"""
+        histograms = self._shard().histograms
+        key = (name, labels)
+        counts = histograms.get(key)
+        buckets = self._help[name][2]
+        if counts is None:
+            counts = histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+        counts[bisect_left(buckets, value)] += 1
+        counts[-1] += value
+
+    # ------------------------------------------------------------ collecting
+
+    def _merge_shards(self):
+        """This process's counters and histograms, folding exited threads into the retired shard"""
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append(shard)
+                else:
+                    _fold(self._retired, shard)
+            self._shards = [(thread, shard) for thread, shard in self._shards if thread.is_alive()]
+            total = _Shard()
+            _fold(total, self._retired)
+        for shard in live:
+            _fold(total, shard)
+        return total
+
+    def _collect_process(self):
+        total = self._merge_shards()
+        gauges = {}
+        for fn in self._collectors:
+            for name, labels, value in fn():
+                key = (name, tuple(labels))
+                if self._help.get(name, (GAUGE,))[0] == COUNTER:
+                    total.counters[key] = total.counters.get(key, 0) + value
+                else:
+                    gauges[key] = value
+        return {
+            'counters': [[name, list(labels), value] for (name, labels), value in total.counters.items()],
+            'histograms': [[name, list(labels), counts] for (name, labels), counts in total.histograms.items()],
+            'gauges': [[name, list(labels), value] for (name, labels), value in gauges.items()],
+        }
+
+    def flush(self):
+        """Write this process's totals to the shared directory (atomic rename)"""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'metrics-{os.getpid()}-{self._started}.json')
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._collect_process(), f)
+        os.replace(tmp, path)
+
+    def start_flusher(self):
+        """Flush every ``flush_interval`` seconds from a daemon thread (multi-process mode only)"""
+        if not self.directory or self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+
+            def run():
+                while True:
+                    time.sleep(self.flush_interval)
+                    try:
+                        self.flush()
+                    except OSError as e:
+                        print("Metrics flush failed:", e)
+
+            self._flusher = threading.Thread(target=run, name='metrics-flush', daemon=True)
+            self._flusher.start()
+
+    def _snapshots(self):
+        if not self.directory:
+            return [self._collect_process()]
+        self.flush()
+        now = time.time()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+                age = now - os.path.getmtime(path)
+            except (OSError, ValueError):
+                continue  # being replaced right now, or removed
+            if age > 3 * self.flush_interval:
+                snapshot['gauges'] = []  # the process is gone; only its totals still count
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render(self):
+        """Prometheus text exposition of every process's metrics, summed"""
+        counters, gauges, histograms = {}, {}, {}
+        for snapshot in self._snapshots():
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, value in snapshot['gauges']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                gauges[key] = gauges.get(key, 0) + value
+            for name, labels, counts in snapshot['histograms']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                total = histograms.get(key)
+                if total is None:
+                    histograms[key] = list(counts)
+                else:
+                    for i, count in enumerate(counts):
+                        total[i] += count
+
+        for name, hits, misses in self._ratios:
+            for (counter, labels), value in list(counters.items()):
+                if counter == hits:
+                    total = value + counters.get((misses, labels), 0)
+                    gauges[(name, labels)] = round(value / total, 4) if total else 0.0
+
+        series = {}  # name -> {labels: lines}, so each name's series print sorted and together
+        for (name, labels), value in list(counters.items()) + list(gauges.items()):
+            series.setdefault(name, {})[labels] = [f'{name}{_labels(labels)} {_number(value)}']
+        for (name, labels), counts in histograms.items():
+            buckets = self._help[name][2]
+            lines = series.setdefault(name, {})[labels] = []
+            cumulative = 0
+            for bound, count in zip(buckets + (float('inf'),), counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels, [("le", _number(float(bound)))])} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(counts[-1])}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+
+        out = []
+        for name in sorted(series):
+            kind, help_text, _ = self._help.get(name, (GAUGE, name, None))
+            out.append(f'# HELP {name} {help_text}')
+            out.append(f'# TYPE {name} {kind}')
+            for labels in sorted(series[name]):
+                out.extend(series[name][labels])
+        return '\n'.join(out) + '\n'
+
+
+def _fold(into, shard):
+    for key, value in list(shard.counters.items()):
+        into.counters[key] = into.counters.get(key, 0) + value
+    for key, counts in list(shard.histograms.items()):
+        total = into.histograms.get(key)
+        if total is None:
+            into.histograms[key] = list(counts)
+        else:
+            for i, count in enumerate(counts):
+                total[i] += count
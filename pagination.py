@@ -0,0 +1,123 @@
+"""Keyset (seek) pagination for the member, skill and role lists.
+
+OFFSET pagination makes MySQL walk and throw away every skipped row. Instead,
+each page ends with an opaque cursor holding the sort key of its last row, and
+the next page starts with ``WHERE (sort key) > (cursor)`` on an index in the
+same order (see MySQL/DDL.sql). Every sort ends with the primary key, so keys
+are unique and no row is skipped or repeated between pages.
+"""
+import base64
+import binascii
+import json
+
+
+class PageRequest:
+    """Sort, direction, page size and seek position parsed from the query string"""
+
+    def __init__(self, sort, order, limit, after):
+        self.sort = sort
+        self.order = order
+        self.limit = limit
+        self.after = after  # sort key values of the previous page's last row, or None
+
+
+class Keyset:
+    """Whitelisted sort keys for one list and the SQL to seek through them
+
+    ``sorts`` maps a sort name to ``[(sql_column, row_field), ...]``; the last
+    column must be the primary key. ``params`` optionally maps a row field to a
+    function turning the cursor value into the SQL parameter (e.g. ENUM
+    index), since the comparison must follow the index order. ``orders``
+    limits the directions a list can be paged in.
+    """
+
+    def __init__(self, sorts, default_sort, default_order='asc', params=None,
+                 default_limit=50, max_limit=200, orders=('asc', 'desc')):
+        self.sorts = sorts
+        self.default_sort = default_sort
+        self.default_order = default_order
+        self.orders = orders
+        self.params = params or {}
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+
+    def parse(self, args):
+        """Read sort/order/limit/cursor from request.args; ValueError on bad input"""
+        sort = args.get('sort') or self.default_sort
+        if sort not in self.sorts:
+            raise ValueError(f"Unknown sort '{sort}' (use one of: {', '.join(self.sorts)})")
+        order = (args.get('order') or self.default_order).lower()
+        if order not in self.orders:
+            raise ValueError(f"order must be {' or '.join(repr(o) for o in self.orders)}")
+        try:
+            limit = int(args.get('limit', self.default_limit))
+        except ValueError:
+            raise ValueError('limit must be a number')
+        limit = max(1, min(limit, self.max_limit))
+
+        after = None
+        token = args.get('cursor')
+        if token:
+            after = decode_cursor(token, sort, order, len(self.sorts[sort]))
+        return PageRequest(sort, order, limit, after)
+
+    def seek(self, page):
+        """``(where_sql, params, order_by_sql)`` for the requested page
+
+        The seek is spelled out as ``a > x OR (a = x AND b > y) ...`` rather
+        than a row constructor, which MySQL does not turn into an index range.
+        """
+        columns = self.sorts[page.sort]
+        direction = 'DESC' if page.order == 'desc' else 'ASC'
+        order_by = ', '.join(f'{column} {direction}' for column, _ in columns)
+        if page.after is None:
+            return '', [], order_by
+
+        op = '<' if page.order == 'desc' else '>'
+        values = [
+            self.params[field](value) if field in self.params else value
+            for (_, field), value in zip(columns, page.after)
+        ]
+        terms, params = [], []
+        for i, (column, _) in enumerate(columns):
+            parts = [f'{prev} = %s' for prev, _ in columns[:i]] + [f'{column} {op} %s']
+            terms.append('(' + ' AND '.join(parts) + ')')
+            params.extend(values[:i + 1])
+        return '(' + ' OR '.join(terms) + ')', params, order_by
+
+    def page(self, rows, page):
+        """Trim the look-ahead row and build the cursor for the next page
+
+        Queries fetch ``limit + 1`` rows; a row past the limit means there is
+        another page.
+        """
+        items = rows[:page.limit]
+        next_cursor = None
+        if len(rows) > page.limit and items:
+            last = items[-1]
+            values = [last[field] for _, field in self.sorts[page.sort]]
+            next_cursor = encode_cursor(page.sort, page.order, values)
+        return {
+            'items': items,
+            'next_cursor': next_cursor,
+            'sort': page.sort,
+            'order': page.order,
+            'limit': page.limit,
+        }
+
+
+def encode_cursor(sort, order, values):
+    raw = json.dumps([sort, order, values], separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort, order, size):
+    """Values stored in a cursor; it must come from a page with the same sort"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        cursor_sort, cursor_order, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if cursor_sort != sort or cursor_order != order or not isinstance(values, list) or len(values) != size:
+        raise ValueError('Cursor does not match the requested sort')
+    return values
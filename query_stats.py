@@ -0,0 +1,260 @@
+"""Per-request query tracing and a rolling per-route summary.
+
+Connections from the pool are wrapped in ``TracedConnection``, whose cursors
+time every execute / executemany / callproc. Statements are recorded into the
+``RequestTrace`` of the current request, found through a context variable
+(FanOut copies the context into its worker threads, so side queries land in
+the same trace). Outside a request - the snapshot thread, CLI commands -
+nothing is recorded and a traced cursor costs one context variable lookup.
+
+Each statement is recorded with:
+
+- its normalized SQL: literals and placeholders become ``?``, IN / VALUES
+  lists collapse to ``(...)``, whitespace is squeezed
+- duration, rows (``rowcount``; None when the cursor is unbuffered)
+- call site: the first frame in this project outside the tracing helpers
+  (for fan-out side queries, the line that created the task)
+
+A cursor given a ``SlowQueryLog`` (slow_queries.py) also times statements
+outside a request, and hands the slow ones over with their parameters.
+
+A statement repeated ``repeat_threshold`` times in one request is reported
+as an N+1 pattern. ``QueryStats`` keeps the last ``window`` request summaries
+per route and aggregates them on read for the debug endpoint.
+"""
+import contextvars
+import functools
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+
+from fanout import task_site
+
+REPEAT_THRESHOLD = 5
+WINDOW = 200
+TOP_STATEMENTS = 10
+
+current = contextvars.ContextVar('query_trace', default=None)
+
+_HERE = os.path.dirname(os.path.realpath(__file__))
+# Generic helpers whose frames never identify the caller
+_SKIP = {os.path.join(_HERE, name) for name in ('query_stats.py', 'fanout.py', 'db_pool.py')}
+
+
+@functools.lru_cache(maxsize=512)
+def _is_site(filename):
+    filename = os.path.realpath(filename)
+    return filename not in _SKIP and filename.startswith(_HERE + os.sep)
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_RE = re.compile(r'%\(\w+\)s|%s')
+_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*')
+_SPACE_RE = re.compile(r'\s+')
+
+
+@functools.lru_cache(maxsize=2048)
+def normalize(sql):
+    """SQL text with literals replaced, so executions of one statement compare equal"""
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    sql = _STRING_RE.sub('?', sql)
+    sql = _PLACEHOLDER_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _LIST_RE.sub('(...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def call_site():
+    """``file:line function`` of the first project frame outside the tracing helpers
+
+    Fan-out side queries have no such frame; they report where their task was made.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if _is_site(code.co_filename):
+            return f'{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}'
+        frame = frame.f_back
+    return task_site.get()
+
+
+class RequestTrace:
+    """Statements run while serving one request"""
+
+    def __init__(self, route=None):
+        self.route = route
+        self.started = time.perf_counter()
+        self.entries = []  # (normalized sql, seconds, rows, call site)
+        self._lock = threading.Lock()  # fan-out threads record concurrently
+
+    def record(self, sql, seconds, rows, site):
+        with self._lock:
+            self.entries.append((normalize(sql), seconds, rows, site))
+
+    @property
+    def db_time(self):
+        return sum(entry[1] for entry in self.entries)
+
+    def statements(self):
+        """``{sql: {'count', 'seconds', 'max_seconds', 'rows', 'sites'}}`` for this request"""
+        grouped = {}
+        with self._lock:
+            entries = list(self.entries)
+        for sql, seconds, rows, site in entries:
+            stat = grouped.get(sql)
+            if stat is None:
+                stat = grouped[sql] = {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'rows': 0, 'sites': set()}
+            stat['count'] += 1
+            stat['seconds'] += seconds
+            stat['max_seconds'] = max(stat['max_seconds'], seconds)
+            stat['rows'] += rows or 0
+            if site:
+                stat['sites'].add(site)
+        return grouped
+
+    def server_timing(self):
+        """``Server-Timing`` header value: DB time with the query count, and the whole request"""
+        total = (time.perf_counter() - self.started) * 1000
+        return f'db;dur={self.db_time * 1000:.1f};desc="{len(self.entries)} queries", app;dur={total:.1f}'
+
+
+class TracedCursor:
+    """Times statements into the current RequestTrace; everything else is passed through"""
+
+    def __init__(self, cursor, slow_log=None):
+        self._cursor = cursor
+        self._slow_log = slow_log
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _traced(self, method, sql, args, kind):
+        trace = current.get()
+        slow_log = self._slow_log
+        if trace is None and slow_log is None:
+            return method(sql, *args)
+        started = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            seconds = time.perf_counter() - started
+            slow = slow_log is not None and seconds >= slow_log.threshold
+            site = call_site() if trace is not None or slow else None
+            if trace is not None:
+                rows = self._cursor.rowcount
+                trace.record(sql, seconds, rows if rows is not None and rows >= 0 else None, site)
+            if slow:
+                slow_log.capture(sql, args[0] if args else None, seconds, site,
+                                 trace.route if trace is not None else None, kind)
+
+    def execute(self, sql, *args, **kwargs):
+        return self._traced(functools.partial(self._cursor.execute, **kwargs), sql, args, 'execute')
+
+    def executemany(self, sql, *args, **kwargs):
+        return self._traced(functools.partial(self._cursor.executemany, **kwargs), sql, args, 'executemany')
+
+    def callproc(self, name, *args):
+        return self._traced(self._cursor.callproc, name, args, 'callproc')
+
+
+class TracedConnection:
+    """Wraps a raw DB-API connection so that its cursors are TracedCursors"""
+
+    def __init__(self, raw, slow_log=None):
+        self._raw = raw
+        self._slow_log = slow_log
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return TracedCursor(self._raw.cursor(*args, **kwargs), self._slow_log)
+
+
+class QueryStats:
+    """Rolling window of request summaries per route"""
+
+    def __init__(self, window=WINDOW, repeat_threshold=REPEAT_THRESHOLD):
+        self.window = window
+        self.repeat_threshold = repeat_threshold
+        self._routes = {}  # route -> deque of request summaries
+        self._lock = threading.Lock()
+
+    def add(self, route, trace, status):
+        """File one finished request; returns its N+1 statements"""
+        statements = trace.statements()
+        summary = {
+            'at': time.time(),
+            'status': status,
+            'queries': len(trace.entries),
+            'db_seconds': sum(stat['seconds'] for stat in statements.values()),
+            'statements': statements,
+        }
+        with self._lock:
+            requests = self._routes.get(route)
+            if requests is None:
+                requests = self._routes[route] = deque(maxlen=self.window)
+            requests.append(summary)
+        return {sql: stat for sql, stat in statements.items() if stat['count'] >= self.repeat_threshold}
+
+    def summary(self, route=None, top=TOP_STATEMENTS):
+        """Per-route aggregates over the window, busiest statements first"""
+        with self._lock:
+            routes = {name: list(requests) for name, requests in self._routes.items()
+                      if route is None or name == route}
+        result = {}
+        for name, requests in sorted(routes.items()):
+            queries = sorted(summary['queries'] for summary in requests)
+            statements = {}
+            for summary in requests:
+                for sql, stat in summary['statements'].items():
+                    total = statements.get(sql)
+                    if total is None:
+                        total = statements[sql] = {
+                            'count': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'rows': 0,
+                            'max_per_request': 0, 'n_plus_one': 0, 'sites': set(),
+                        }
+                    total['count'] += stat['count']
+                    total['seconds'] += stat['seconds']
+                    total['max_seconds'] = max(total['max_seconds'], stat['max_seconds'])
+                    total['rows'] += stat['rows']
+                    total['max_per_request'] = max(total['max_per_request'], stat['count'])
+                    if stat['count'] >= self.repeat_threshold:
+                        total['n_plus_one'] += 1
+                    total['sites'] |= stat['sites']
+            busiest = sorted(statements.items(), key=lambda item: -item[1]['seconds'])[:top]
+            result[name] = {
+                'requests': len(requests),
+                'avg_queries': round(sum(queries) / len(queries), 2),
+                'max_queries': queries[-1],
+                'p95_queries': queries[min(len(queries) - 1, int(len(queries) * 0.95))],
+                'avg_db_ms': round(sum(s['db_seconds'] for s in requests) / len(requests) * 1000, 3),
+                'n_plus_one': sorted(sql for sql, stat in statements.items() if stat['n_plus_one']),
+                'statements': [
+                    {
+                        'sql': sql,
+                        'count': stat['count'],
+                        'per_request': round(stat['count'] / len(requests), 2),
+                        'max_per_request': stat['max_per_request'],
+                        'total_ms': round(stat['seconds'] * 1000, 3),
+                        'avg_ms': round(stat['seconds'] / stat['count'] * 1000, 3),
+                        'max_ms': round(stat['max_seconds'] * 1000, 3),
+                        'rows': stat['rows'],
+                        'n_plus_one_requests': stat['n_plus_one'],
+                        'sites': sorted(stat['sites']),
+                    }
+                    for sql, stat in busiest
+                ],
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
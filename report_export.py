@@ -0,0 +1,169 @@
+"""Streaming CSV / XLSX export of the reports page.
+
+The small sections (KPIs, risks, category distribution, top skills) come from
+the current report snapshot. Member statistics and the competency matrix grow
+with the team, so they are read from an unbuffered cursor in ``FETCH_SIZE``
+batches and written out as they arrive. Memory use does not depend on the
+number of members.
+"""
+import csv
+import io
+import tempfile
+
+from analytics import format_full_name
+
+try:
+    import openpyxl
+except ImportError:  # XLSX export is optional
+    openpyxl = None
+
+FETCH_SIZE = 1000
+FLUSH_ROWS = 500
+XLSX_CHUNK = 64 * 1024
+
+
+def _stream(cursor, sql, params=()):
+    cursor.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            return
+        yield from rows
+
+
+def member_stat_rows(cursor):
+    """Team member, role, skill count and average proficiency, most skilled first"""
+    rows = _stream(cursor, """
+        SELECT tm.first_name, tm.middle_name, tm.last_name, r.role_name,
+               COALESCE(ms.skill_count, 0) AS skill_count,
+               COALESCE(ms.level_total, 0) AS level_total
+        FROM team_members tm
+        LEFT JOIN roles r ON tm.role_id = r.role_id
+        LEFT JOIN (
+            SELECT mem_id, COUNT(*) AS skill_count, SUM(proficiency_level) AS level_total
+            FROM mem_skills
+            GROUP BY mem_id
+        ) ms ON ms.mem_id = tm.mem_id
+        ORDER BY skill_count DESC, tm.mem_id
+    """)
+    for row in rows:
+        count = int(row['skill_count'])
+        avg = '%.1f' % round(int(row['level_total']) / count, 1) if count else 0
+        yield [format_full_name(row), row['role_name'] or 'Unassigned', count, avg]
+
+
+def heatmap_rows(cursor, heatmap_skills):
+    """One row per member with their level (0 = not held) in each heatmap skill"""
+    skill_ids = [s['skill_id'] for s in heatmap_skills]
+    if skill_ids:
+        join = f"LEFT JOIN mem_skills ms ON ms.mem_id = tm.mem_id AND ms.skill_id IN ({','.join(['%s'] * len(skill_ids))})"
+        columns = 'ms.skill_id, ms.proficiency_level'
+    else:
+        join, columns = '', 'NULL AS skill_id, NULL AS proficiency_level'
+    rows = _stream(cursor, f"""
+        SELECT tm.mem_id, tm.first_name, tm.middle_name, tm.last_name, r.role_name, {columns}
+        FROM team_members tm
+        LEFT JOIN roles r ON tm.role_id = r.role_id
+        {join}
+        ORDER BY tm.mem_id
+    """, skill_ids)
+
+    # Rows arrive grouped by member, so only one member is held at a time
+    current_id, current, levels = None, None, None
+    for row in rows:
+        if row['mem_id'] != current_id:
+            if current is not None:
+                yield current + list(levels.values())
+            current_id = row['mem_id']
+            current = [format_full_name(row), row['role_name'] or 'Unassigned']
+            levels = dict.fromkeys(skill_ids, 0)
+        if row['skill_id'] is not None:
+            levels[row['skill_id']] = row['proficiency_level']
+    if current is not None:
+        yield current + list(levels.values())
+
+
+def report_sections(snapshot, cursor):
+    """Yield ``(sheet, title, header, rows)`` for every exported section"""
+    payload = snapshot.payload
+    yield 'KPIs', 'KEY PERFORMANCE INDICATORS', ['Metric', 'Value'], [
+        ['Total Staff', payload['total_staff']],
+        ['Compliance Rate', f"{payload['compliance_rate']}%"],
+        ['Critical Gaps', payload['critical_gaps']],
+        ['Skills at Risk', payload['skills_at_risk']],
+    ]
+
+    if payload['risk_report']:
+        yield 'Risks', 'BUSINESS CONTINUITY RISKS', ['Category', 'Skill Name', 'Current Holders', 'Bus Factor'], [
+            [risk['category'], risk['skill_name'], ', '.join(risk['holders']), risk['count']]
+            for risk in payload['risk_report']
+        ]
+
+    total_skills = sum(stat['skill_count'] for stat in payload['category_stats'])
+    yield 'Categories', 'SKILLS DISTRIBUTION BY CATEGORY', [
+        'Category', 'Total Skills', 'Members with Skills', 'Level 1', 'Level 2', 'Level 3', 'Distribution %'
+    ], [
+        [stat['category'], stat['skill_count'], stat['members_with_skills'],
+         stat['level_1'], stat['level_2'], stat['level_3'],
+         round(stat['skill_count'] / total_skills * 100) if total_skills else 0]
+        for stat in payload['category_stats']
+    ]
+
+    yield 'Top Skills', 'TOP 10 MOST COMMON SKILLS', ['Rank', 'Skill Name', 'Category', 'Team Members', 'Avg Proficiency'], [
+        [rank, skill['skill_name'], skill['category'], skill['member_count'], '%.1f' % skill['avg_proficiency']]
+        for rank, skill in enumerate(payload['top_skills'], 1)
+    ]
+
+    yield 'Members', 'TEAM MEMBER SKILLS STATISTICS', [
+        'Team Member', 'Role', 'Total Skills', 'Average Proficiency'
+    ], member_stat_rows(cursor)
+
+    heatmap_skills = payload['heatmap_skills']
+    yield 'Competency Matrix', 'MASTER COMPETENCY MATRIX', [
+        'Employee', 'Role', *[s['skill_name'] for s in heatmap_skills]
+    ], heatmap_rows(cursor, heatmap_skills)
+
+
+def stream_csv(sections, generated):
+    """Encode sections as CSV text chunks, flushing every ``FLUSH_ROWS`` rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(['Team Skills Management Report'])
+    writer.writerow([f'Generated on: {generated}'])
+    writer.writerow([])
+    for _, title, header, rows in sections:
+        writer.writerow([title])
+        writer.writerow(header)
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if count % FLUSH_ROWS == 0:
+                yield drain()
+        writer.writerow([])
+        yield drain()
+
+
+def stream_xlsx(sections):
+    """Write sections to a write-only workbook (one sheet each) and stream the file"""
+    workbook = openpyxl.Workbook(write_only=True)
+    for sheet, _, header, rows in sections:
+        worksheet = workbook.create_sheet(sheet)
+        worksheet.append(header)
+        for row in rows:
+            worksheet.append(row)
+
+    # The zip container can only be written once every sheet is complete
+    with tempfile.TemporaryFile() as file:
+        workbook.save(file)
+        file.seek(0)
+        while True:
+            chunk = file.read(XLSX_CHUNK)
+            if not chunk:
+                return
+            yield chunk
@@ -0,0 +1,117 @@
+"""Precomputed /reports payloads, rebuilt in the background.
+
+The reports page is served from the latest snapshot instead of recomputing
+everything per view. A background thread checks a cheap change marker (the
+newest audit_logs.log_id - every write to the tracked tables goes through a
+trigger) and rebuilds when it moves, or when the snapshot gets older than the
+rebuild interval.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class ReportSnapshot:
+    """One immutable, versioned report payload"""
+
+    def __init__(self, version, payload, marker, built_in):
+        self.version = version
+        self.payload = payload
+        self.marker = marker
+        self.built_in = built_in
+        self.as_of = datetime.now()
+        self.created = time.monotonic()
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'as_of': self.as_of.isoformat(timespec='seconds'),
+            'marker': self.marker,
+            'build_seconds': round(self.built_in, 3),
+        }
+
+
+class ReportSnapshotService:
+    """Keeps the latest report snapshot and rebuilds it when data changes
+
+    ``build()`` returns the report payload; ``current_marker()`` returns a
+    value that changes whenever the underlying data does.
+    """
+
+    def __init__(self, build, current_marker, interval=300, poll=10, history=5):
+        self._build = build
+        self._current_marker = current_marker
+        self.interval = interval
+        self.poll = poll
+
+        self._latest = None
+        self._history = deque(maxlen=history)
+        self._version = 0
+        self._build_lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def get(self):
+        """Latest snapshot; the first call builds one synchronously"""
+        self.ensure_started()
+        snapshot = self._latest
+        if snapshot is None:
+            snapshot = self.rebuild()
+        return snapshot
+
+    def invalidate(self):
+        """Ask the background thread for a rebuild on its next wake-up"""
+        self._dirty.set()
+
+    def rebuild(self):
+        """Build a new snapshot now (concurrent callers share one build)"""
+        version_before = self._version
+        with self._build_lock:
+            if self._version != version_before and self._latest is not None:
+                return self._latest
+
+            # Read the marker first so changes made during the build trigger another one
+            marker = self._current_marker()
+            started = time.monotonic()
+            payload = self._build()
+            snapshot = ReportSnapshot(self._version + 1, payload, marker, time.monotonic() - started)
+
+            self._version = snapshot.version
+            self._latest = snapshot
+            self._history.append(snapshot.describe())
+            return snapshot
+
+    def history(self):
+        return list(self._history)
+
+    def ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='report-snapshots', daemon=True)
+                self._thread.start()
+
+    def _stale(self):
+        snapshot = self._latest
+        if snapshot is None:
+            # Nobody has asked for a report yet - the first get() builds it
+            self._dirty.clear()
+            return False
+        if self._dirty.is_set():
+            return True
+        if time.monotonic() - snapshot.created >= self.interval:
+            return True
+        return self._current_marker() != snapshot.marker
+
+    def _run(self):
+        while True:
+            self._dirty.wait(self.poll)
+            try:
+                if self._stale():
+                    self._dirty.clear()
+                    self.rebuild()
+            except Exception as e:
+                print("Report snapshot rebuild failed:", e)
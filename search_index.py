@@ -0,0 +1,270 @@
+"""Search-as-you-type over members, skills and roles.
+
+Every searchable field (member name, email local part and phone, skill name,
+role name) is lower-cased and split into alphanumeric tokens. The index keeps
+
+- ``_postings``: token -> documents containing it, and ``_heads`` for the
+  tokens a field starts with ("rao" in "Rao Asha", "python" in "Python")
+- ``_vocab``: the distinct tokens in sorted order, so every token starting
+  with a query word is one bisected range
+- ``_grams``: trigram -> distinct tokens, so tokens merely containing a word
+  (a phone number fragment, a typo) are found without scanning the vocabulary
+
+Working on distinct tokens keeps the trigram index small: names repeat, and
+only emails and phone numbers grow with the member count.
+
+A query word matches a document at the best of these tiers: a field starting
+with the word, the word as a whole token, a field starting with it as a prefix,
+any token starting with it, a token containing it, and (for single-word
+queries) a token sharing most of its padded trigrams. Documents must match
+every word and are ranked by summed tier, then skills, roles, members, then
+id. Multi-word queries start from the word with the fewest prefix matches.
+Like the other indexes, it is kept current from AnalyticsState's deltas.
+"""
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+
+from analytics import format_full_name
+
+# Document kinds, in ranking order for equal scores
+SKILL, ROLE, MEMBER = 0, 1, 2
+KINDS = {'skill': SKILL, 'role': ROLE, 'member': MEMBER}
+KIND_NAMES = {rank: name for name, rank in KINDS.items()}
+
+SEARCH_LIMIT = 10
+SEARCH_LIMIT_MAX = 50
+# Vocabulary tokens expanded per prefix (bounds one-letter queries)
+PREFIX_TOKENS = 2000
+# Trigrams shared with the query word for a fuzzy match
+FUZZY_SHARE = 0.5
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokens(text):
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+def trigrams(token, padded=False):
+    """Trigrams of ``token``; ``padded`` adds the word-boundary ones ("  a", " as", "ha ")"""
+    if padded:
+        token = f'  {token} '
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class SearchIndex:
+    """Typed, ranked prefix/trigram search kept current from an AnalyticsState"""
+
+    def __init__(self, state):
+        self.state = state
+        self._lock = threading.RLock()
+        self._reset()
+        state.subscribe(self._on_event)
+        if state.loaded:
+            self._rebuild()
+
+    def _reset(self):
+        self._docs = {}       # (kind, id) -> (label, detail)
+        self._fields = {}     # (kind, id) -> [(token, head)] as indexed
+        self._postings = {}   # token -> {(kind, id)}
+        self._heads = {}      # token -> {(kind, id)} whose field starts with it
+        self._vocab = []      # distinct tokens, sorted
+        self._grams = {}      # trigram -> {token}
+
+    # ----------------------------------------------------------------- deltas
+
+    def _rebuild(self):
+        state = self.state
+        with self._lock:
+            self._reset()
+            for skill_id, skill in state.skills.items():
+                self._put_skill(skill_id, skill)
+            for role_id, role in state.roles.items():
+                self._put_role(role_id, role)
+            for mem_id, member in state.members.items():
+                self._put_member(mem_id, member)
+
+    def _put(self, key, label, detail, fields):
+        self._drop(key)
+        self._docs[key] = (label, detail)
+        indexed = []
+        for field in fields:
+            for position, token in enumerate(tokens(field)):
+                indexed.append((token, position == 0))
+        for token, head in indexed:
+            docs = self._postings.get(token)
+            if docs is None:
+                docs = self._postings[token] = set()
+                insort(self._vocab, token)
+                for gram in trigrams(token, padded=True):
+                    self._grams.setdefault(gram, set()).add(token)
+            docs.add(key)
+            if head:
+                self._heads.setdefault(token, set()).add(key)
+        self._fields[key] = indexed
+
+    def _drop(self, key):
+        self._docs.pop(key, None)
+        for token, head in self._fields.pop(key, ()):
+            if head and token in self._heads:
+                self._heads[token].discard(key)
+                if not self._heads[token]:
+                    del self._heads[token]
+            docs = self._postings.get(token)
+            if docs is None:
+                continue
+            docs.discard(key)
+            if not docs:
+                del self._postings[token]
+                del self._vocab[bisect_left(self._vocab, token)]
+                for gram in trigrams(token, padded=True):
+                    self._grams[gram].discard(token)
+                    if not self._grams[gram]:
+                        del self._grams[gram]
+
+    def _put_skill(self, skill_id, skill):
+        self._put((SKILL, skill_id), skill['skill_name'], skill['category'], [skill['skill_name']])
+
+    def _put_role(self, role_id, role):
+        self._put((ROLE, role_id), role['role_name'], '', [role['role_name']])
+
+    def _put_member(self, mem_id, member):
+        name = format_full_name(member)
+        # Only the local part: every address is @gmail.com, so the domain matches everyone
+        fields = [name, member['last_name'], member['email'].partition('@')[0], member['phone_no']]
+        self._put((MEMBER, mem_id), name, member['email'], fields)
+
+    def _on_event(self, event, *args):
+        with self._lock:
+            if event == 'reload':
+                self._rebuild()
+            elif event == 'member':
+                self._put_member(*args)
+            elif event == 'skill':
+                self._put_skill(*args)
+            elif event == 'role':
+                self._put_role(*args)
+            elif event == 'member_deleted':
+                self._drop((MEMBER, args[0]))
+            elif event == 'skill_deleted':
+                self._drop((SKILL, args[0]))
+            elif event == 'role_deleted':
+                self._drop((ROLE, args[0]))
+
+    # ------------------------------------------------------------------ reads
+
+    def _prefixed(self, word):
+        start = bisect_left(self._vocab, word)
+        found = []
+        for token in self._vocab[start:start + PREFIX_TOKENS]:
+            if not token.startswith(word):
+                break
+            found.append(token)
+        return found
+
+    def _containing(self, word):
+        grams = sorted((self._grams.get(gram, ()) for gram in trigrams(word)), key=len)
+        if not grams or not grams[0]:
+            return []
+        return [token for token in grams[0].intersection(*grams[1:]) if word in token]
+
+    def _similar(self, word):
+        grams = trigrams(word, padded=True)
+        shared = {}
+        for gram in grams:
+            for token in self._grams.get(gram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        needed = int(len(grams) * FUZZY_SHARE + 0.999)
+        return [
+            token for token, count in shared.items()
+            if count >= needed and abs(len(token) - len(word)) <= 2
+        ]
+
+    def _tiers(self, word, fuzzy):
+        """Sets of documents matching ``word`` at each tier (best first); computed lazily"""
+        yield self._heads.get(word, set())
+        yield self._postings.get(word, set())
+        prefixed = self._prefixed(word)
+        yield set().union(*(self._heads.get(token, ()) for token in prefixed))
+        yield set().union(*(self._postings[token] for token in prefixed))
+        if len(word) >= 3:
+            yield set().union(*(self._postings[token] for token in self._containing(word)))
+            if fuzzy:
+                yield set().union(*(self._postings[token] for token in self._similar(word)))
+
+    def _estimate(self, word):
+        """Documents a word can match by prefix (an upper bound), to pick the anchor word"""
+        return sum(len(self._postings[token]) for token in self._prefixed(word))
+
+    def _doc_tier(self, key, word):
+        """Best tier at which one document matches ``word``, or None"""
+        best = None
+        for token, head in self._fields[key]:
+            if token == word:
+                tier = 0 if head else 1
+            elif token.startswith(word):
+                tier = 2 if head else 3
+            elif len(word) >= 3 and word in token:
+                tier = 4
+            else:
+                continue
+            if best is None or tier < best:
+                best = tier
+        return best
+
+    def search(self, query, limit=SEARCH_LIMIT, kinds=None):
+        """Ranked ``[{'type', 'id', 'label', 'detail', 'score'}]`` for ``query``
+
+        ``kinds`` restricts the document types ('member', 'skill', 'role').
+        Lower scores are better; 0 is a field starting with the only word.
+        """
+        words = tokens(query)
+        if not words:
+            return []
+        allowed = None if kinds is None else {KINDS[kind] for kind in kinds}
+        with self._lock:
+            if len(words) == 1:
+                # Best tier first; later tiers only fill up the remaining slots
+                ranked, seen = [], set()
+                for tier, docs in enumerate(self._tiers(words[0], fuzzy=True)):
+                    fresh = docs - seen if seen else docs
+                    if allowed is not None:
+                        fresh = [key for key in fresh if key[0] in allowed]
+                    seen |= docs
+                    ranked += [(tier, key) for key in heapq.nsmallest(limit - len(ranked), fresh)]
+                    if len(ranked) >= limit:
+                        break
+            else:
+                # Collect the most selective word's matches, then check the
+                # other words against each candidate's own tokens
+                anchor = min(range(len(words)), key=lambda i: self._estimate(words[i]))
+                others = words[:anchor] + words[anchor + 1:]
+                candidates = {}
+                for tier, docs in enumerate(self._tiers(words[anchor], fuzzy=False)):
+                    for key in docs:
+                        candidates.setdefault(key, tier)
+                scored = []
+                for key, score in candidates.items():
+                    if allowed is not None and key[0] not in allowed:
+                        continue
+                    for word in others:
+                        tier = self._doc_tier(key, word)
+                        if tier is None:
+                            break
+                        score += tier
+                    else:
+                        scored.append((score, key))
+                ranked = heapq.nsmallest(limit, scored)
+
+            return [
+                {
+                    'type': KIND_NAMES[key[0]],
+                    'id': key[1],
+                    'label': self._docs[key][0],
+                    'detail': self._docs[key][1],
+                    'score': score,
+                }
+                for score, key in ranked
+            ]
@@ -0,0 +1,438 @@
+"""Slow statements with their EXPLAIN plans, and plan changes between releases.
+
+Traced cursors (query_stats.py) hand every statement that takes at least
+``threshold`` seconds to ``SlowQueryLog.capture``, inside a request or not.
+Capturing only copies the statement and its bound parameters into the ring
+buffer and onto a bounded queue; the request never waits for a plan:
+
+- a daemon thread runs ``EXPLAIN FORMAT=JSON`` with the original parameters
+  on its own unpooled, untraced connection
+- one normalized statement is explained at most once per ``explain_interval``;
+  captures in between share that plan
+- CALLs and executemany batches are recorded but not explained (MySQL cannot
+  EXPLAIN a CALL - its inner statements show up on their own when slow)
+- when the queue is full a capture keeps its entry but gets no plan; a
+  failed EXPLAIN is not retried before ``explain_interval`` is over
+
+Each plan is reduced to its shape - per table: access type, key and whether
+it sorts or builds a temporary table - and a short fingerprint of it. The
+first plan seen for a statement becomes its baseline, kept in a JSON file
+with the release (``APP_RELEASE``) that recorded it, so baselines outlive
+deploys. A later plan is flagged when its fingerprint differs from the
+baseline or its estimated cost grew by ``cost_factor`` or more; the flag stays
+until the statement is re-baselined (``flask slow-query-rebaseline``).
+A statement first seen slow in this release while older baselines exist is
+flagged as new.
+
+Bound parameters (emails, phone numbers...) only stay in memory unless
+``baseline_params`` is set. Without them a re-baseline can't EXPLAIN the
+statement again, so it clears the baseline and the next plan explained takes
+its place.
+"""
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from decimal import Decimal
+
+from query_stats import normalize
+
+SLOW_QUERY_MS = 200
+RING_SIZE = 100
+QUEUE_SIZE = 256
+EXPLAIN_INTERVAL = 300.0
+COST_FACTOR = 2.0
+MAX_PARAM_CHARS = 200
+
+_EXPLAINABLE_RE = re.compile(r'^\s*(?:\(\s*)*(?:SELECT|WITH|UPDATE|DELETE)\b', re.IGNORECASE)
+# Plan node attributes that change the shape of a plan
+_SHAPE_FLAGS = ('using_filesort', 'using_temporary_table', 'using_join_buffer')
+
+
+def _param(value):
+    """JSON-safe copy of one bound parameter, long values shortened"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return f'<{len(value)} bytes>'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    text = str(value)
+    return text if len(text) <= MAX_PARAM_CHARS else text[:MAX_PARAM_CHARS] + '...'
+
+
+def bound_params(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {name: _param(value) for name, value in params.items()}
+    return [_param(value) for value in params]
+
+
+def plan_shape(plan):
+    """``[{'table', 'access_type', 'key', flags...}]`` from an EXPLAIN FORMAT=JSON document"""
+    steps = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if 'table_name' in node:
+                step = {
+                    'table': node['table_name'],
+                    'access_type': node.get('access_type'),
+                    'key': node.get('key'),
+                    'rows': node.get('rows_examined_per_scan'),
+                }
+                for flag in _SHAPE_FLAGS:
+                    if node.get(flag):
+                        step[flag] = node[flag]
+                steps.append(step)
+            else:
+                # Ordering / grouping / duplicate removal above the tables
+                for flag in _SHAPE_FLAGS:
+                    if node.get(flag):
+                        steps.append({'table': None, flag: node[flag]})
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(plan)
+    return steps
+
+
+def plan_cost(plan):
+    try:
+        return float(plan['query_block']['cost_info']['query_cost'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def fingerprint(shape):
+    """Short hash of a plan shape; row estimates are left out, they move with the data"""
+    stable = [{name: value for name, value in step.items() if name != 'rows'} for step in shape]
+    return hashlib.sha1(json.dumps(stable, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class PlanBaselines:
+    """Baseline plan per normalized statement, persisted to a JSON file
+
+    Worker processes share the file; each reloads it when it changed on disk,
+    so a re-baseline reaches every process.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._plans = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        if not self.path:
+            return
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        version = (stat.st_ino, stat.st_mtime_ns)  # every write is a rename: a new inode
+        if version != self._version:
+            try:
+                with open(self.path) as f:
+                    self._plans = json.load(f)
+                self._version = version
+            except (OSError, ValueError):
+                pass  # being replaced right now; keep what we have
+
+    def _write(self):
+        if not self.path:
+            return
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(self._plans, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+            stat = os.stat(self.path)
+            self._version = (stat.st_ino, stat.st_mtime_ns)
+        except OSError as e:
+            print("Slow query baseline write failed:", e)
+
+    def get(self, sql):
+        with self._lock:
+            self._refresh()
+            return self._plans.get(sql)
+
+    def all(self):
+        with self._lock:
+            self._refresh()
+            return dict(self._plans)
+
+    def releases(self):
+        return {baseline['release'] for baseline in self.all().values()}
+
+    def record(self, sql, baseline, replace=False):
+        """Store ``baseline`` for ``sql``; an existing one is kept unless ``replace``"""
+        with self._lock:
+            self._refresh()  # don't drop what other processes recorded meanwhile
+            if sql in self._plans and not replace:
+                return self._plans[sql]
+            self._plans[sql] = baseline
+            self._write()
+            return baseline
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._plans)
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements, explained in the background
+
+    ``connect()`` opens a raw (untraced) DB-API connection for EXPLAIN.
+    ``baseline_params`` writes each baseline's parameters to the baselines
+    file, so ``rebaseline()`` can explain it again.
+    """
+
+    def __init__(self, connect, threshold=SLOW_QUERY_MS / 1000, size=RING_SIZE, baselines=None,
+                 release='dev', explain_interval=EXPLAIN_INTERVAL, cost_factor=COST_FACTOR,
+                 queue_size=QUEUE_SIZE, baseline_params=False):
+        self._connect = connect
+        self.threshold = threshold
+        self.release = release
+        self.baseline_params = baseline_params
+        self.explain_interval = explain_interval
+        self.cost_factor = cost_factor
+        self.baselines = baselines if baselines is not None else PlanBaselines()
+        self._entries = deque(maxlen=size)
+        self._plans = {}  # normalized sql -> latest explained plan
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._connection = None
+        self.captured = 0
+        self.explained = 0
+        self.dropped = 0
+
+    # ------------------------------------------------------------ capturing
+
+    def capture(self, sql, params, seconds, site=None, route=None, kind='execute'):
+        """Record one slow statement and queue it for EXPLAIN; returns the entry"""
+        if isinstance(sql, bytes):
+            sql = sql.decode('utf-8', 'replace')
+        if kind == 'callproc':
+            count = len(params) if params else 0
+            sql = f"CALL {sql}({', '.join(['%s'] * count)})"
+        normalized = normalize(sql)
+        entry = {
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'ms': round(seconds * 1000, 3),
+            'sql': sql,
+            'normalized': normalized,
+            'params': bound_params(params) if kind != 'executemany' else f'<{len(params or ())} rows>',
+            'site': site,
+            'route': route,
+            'plan': None,
+        }
+        with self._lock:
+            self.captured += 1
+            self._entries.append(entry)
+            latest = self._plans.get(normalized)
+        if kind != 'execute' or not _EXPLAINABLE_RE.match(sql):
+            entry['plan'] = {'status': 'not explainable'}
+        elif latest is not None and time.time() - latest['explained'] < self.explain_interval:
+            entry['plan'] = latest
+        else:
+            try:
+                self._queue.put_nowait((entry, sql, params))
+                entry['plan'] = {'status': 'pending'}
+            except queue.Full:
+                entry['plan'] = {'status': 'dropped'}
+                with self._lock:
+                    self.dropped += 1
+            self._start_worker()
+        return entry
+
+    def _start_worker(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._run, name='slow-query-explain', daemon=True)
+            self._worker.start()
+
+    # ------------------------------------------------------------ explaining
+
+    def _run(self):
+        while True:
+            entry, sql, params = self._queue.get()
+            try:
+                entry['plan'] = self.explain(sql, params)
+            except Exception as e:
+                self._close()
+                # Not retried before the interval is over, like a successful plan
+                entry['plan'] = {'status': 'failed', 'error': str(e), 'explained': time.time()}
+                with self._lock:
+                    self._plans[normalize(sql)] = entry['plan']
+                print("Slow query EXPLAIN failed:", e)
+
+    def _close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def explain(self, sql, params=None):
+        """EXPLAIN one statement now and compare its plan with the baseline"""
+        normalized = normalize(sql)
+        with self._lock:
+            latest = self._plans.get(normalized)
+        if latest is not None and time.time() - latest['explained'] < self.explain_interval:
+            return latest  # queued twice before the first EXPLAIN finished
+        if self._connection is None:
+            self._connection = self._connect()
+        document = self._explain_json(sql, params)
+        plan = self._assess(normalized, document, sql, params)
+        with self._lock:
+            self._plans[normalized] = plan
+            self.explained += 1
+        return plan
+
+    def _explain_json(self, sql, params):
+        cursor = self._connection.cursor()
+        try:
+            cursor.execute('EXPLAIN FORMAT=JSON ' + sql, params)
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+            self._connection.rollback()  # don't hold a read view between EXPLAINs
+        return json.loads(row[0])
+
+    def _assess(self, normalized, document, sql, params):
+        shape = plan_shape(document)
+        plan = {
+            'sql': sql,
+            'params': bound_params(params),
+            'status': 'explained',
+            'explained': time.time(),
+            'explained_at': datetime.now().isoformat(timespec='seconds'),
+            'release': self.release,
+            'fingerprint': fingerprint(shape),
+            'cost': plan_cost(document),
+            'shape': shape,
+            'json': document,
+            'regression': None,
+        }
+        baseline = self.baselines.get(normalized)
+        if baseline is None:
+            older = self.baselines.releases() - {self.release}
+            self.baselines.record(normalized, self._baseline(plan))
+            if older:
+                plan['regression'] = {'kind': 'new', 'since': self.release}
+            return plan
+        if 'fingerprint' not in baseline:
+            # Cleared by a re-baseline: this plan is the accepted one
+            self.baselines.record(normalized, dict(self._baseline(plan), rebaselined=baseline['rebaselined']),
+                                  replace=True)
+            return plan
+        reasons = []
+        if baseline['fingerprint'] != plan['fingerprint']:
+            reasons.append('plan')
+        if baseline.get('cost') and plan['cost'] and plan['cost'] >= baseline['cost'] * self.cost_factor:
+            reasons.append('cost')
+        if reasons:
+            plan['regression'] = {
+                'kind': '+'.join(reasons),
+                'baseline_release': baseline['release'],
+                'baseline_fingerprint': baseline['fingerprint'],
+                'baseline_cost': baseline.get('cost'),
+                'baseline_shape': baseline['shape'],
+            }
+        return plan
+
+    def _baseline(self, plan):
+        baseline = {
+            'release': plan['release'],
+            'fingerprint': plan['fingerprint'],
+            'cost': plan['cost'],
+            'shape': plan['shape'],
+            'recorded': plan['explained_at'],
+            'sql': plan['sql'],
+        }
+        if self.baseline_params:
+            baseline['params'] = plan['params']  # lets rebaseline() explain the statement again
+        return baseline
+
+    def _flagged(self, sql, plan):
+        """Whether ``plan`` is still flagged - a later re-baseline (maybe by another process) clears it"""
+        if not plan or not plan.get('regression'):
+            return False
+        baseline = self.baselines.get(sql)
+        return not (baseline and baseline.get('rebaselined', 0) >= plan['explained'])
+
+    def rebaseline(self):
+        """EXPLAIN every baseline statement again and keep the new plans as baselines
+
+        For after a deliberate plan change (new index, schema change) - the
+        flags raised by it clear in every process. Baselines stored without
+        parameters are cleared instead. Returns ``(updated, cleared, failed)``.
+        """
+        updated, cleared, failed = 0, 0, []
+        for normalized, baseline in self.baselines.all().items():
+            if 'params' not in baseline:
+                self.baselines.record(normalized, {'release': self.release, 'sql': baseline['sql'],
+                                                   'rebaselined': time.time()}, replace=True)
+                cleared += 1
+                continue
+            try:
+                if self._connection is None:
+                    self._connection = self._connect()
+                document = self._explain_json(baseline['sql'], baseline['params'])
+            except Exception as e:
+                self._close()
+                failed.append((normalized, str(e)))
+                continue
+            plan = self._assess(normalized, document, baseline['sql'], baseline['params'])
+            self.baselines.record(normalized, dict(self._baseline(plan), rebaselined=time.time()), replace=True)
+            updated += 1
+        with self._lock:
+            self._plans.clear()
+        return updated, cleared, failed
+
+    # ------------------------------------------------------------ reading
+
+    def entries(self):
+        """Captured statements, newest first, each with whether its plan is flagged"""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return [dict(entry, flagged=self._flagged(entry['normalized'], entry['plan'])) for entry in entries]
+
+    def regressions(self):
+        """Latest plan of every statement currently flagged, by normalized SQL"""
+        with self._lock:
+            plans = dict(self._plans)
+        return {sql: plan for sql, plan in plans.items() if self._flagged(sql, plan)}
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'threshold_ms': round(self.threshold * 1000, 3),
+                'release': self.release,
+                'captured': self.captured,
+                'explained': self.explained,
+                'dropped': self.dropped,
+                'queued': self._queue.qsize(),
+                'buffered': len(self._entries),
+            }
+        stats['baselines'] = len(self.baselines)
+        stats['regressions'] = len(self.regressions())
+        return stats
@@ -0,0 +1,211 @@
+"""Smallest (or least loaded) team covering a set of skill needs.
+
+Every candidate is reduced to a bitmask over the needs: bit i is set when the
+member holds need i's skill at its minimum level or above. Members with the
+same mask are interchangeable, so only the least loaded one per mask is a
+candidate (the rest are returned as alternates), and a mask is dropped when a
+superset mask is no more expensive. What is left is a set cover instance:
+
+- ``greedy_cover`` picks the mask covering the most open needs (cheapest per
+  need for ``objective='load'``) and seeds the search with a good bound
+- ``best_covers`` is a branch and bound that always branches on the open need
+  with the fewest candidates and prunes with a ceil(open / widest mask)
+  lower bound, keeping the best ``alternatives`` distinct teams
+
+The search stops after ``node_limit`` nodes; the answer is then the best found
+so far and is reported as not exact. Teams are ranked by (size, load) or, for
+``objective='load'``, by (load, size).
+"""
+import heapq
+
+import numpy as np
+
+OBJECTIVES = ('size', 'load')
+NODE_LIMIT = 50_000
+ALTERNATIVES = 3
+ALTERNATIVES_MAX = 10
+ALTERNATES = 3
+MAX_NEEDS = 64
+
+
+def _popcount(mask):
+    return bin(mask).count('1')
+
+
+def candidate_groups(mem_ids, masks, loads):
+    """``[(mask, [(load, mem_id), ...])]`` per distinct non-empty mask, least loaded first"""
+    keep = masks != 0
+    mem_ids, masks, loads = mem_ids[keep], masks[keep], loads[keep]
+    if not len(masks):
+        return []
+    order = np.lexsort((mem_ids, loads, masks))
+    mem_ids, masks, loads = mem_ids[order], masks[order], loads[order]
+    starts = np.flatnonzero(np.r_[True, masks[1:] != masks[:-1]])
+    ends = np.r_[starts[1:], len(masks)]
+    return [
+        (int(masks[start]), list(zip(loads[start:end].tolist(), mem_ids[start:end].tolist())))
+        for start, end in zip(starts, ends)
+    ]
+
+
+def prune_dominated(masks, costs):
+    """Indexes of masks not dominated by a superset mask that costs no more"""
+    masks = np.asarray(masks, dtype=np.uint64)
+    costs = np.asarray(costs, dtype=np.float64)
+    kept = []
+    for i in range(len(masks)):
+        covers = (masks & masks[i]) == masks[i]
+        # Equal masks were merged already, so a superset here is a strict one
+        covers[i] = False
+        if not (covers & (costs <= costs[i])).any():
+            kept.append(i)
+    return kept
+
+
+class _Search:
+    def __init__(self, masks, costs, objective, alternatives, node_limit):
+        self.masks = masks
+        self.costs = costs
+        self.objective = objective
+        self.alternatives = alternatives
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.truncated = False
+        self.widest = max(map(_popcount, masks), default=1)
+        self.best = []       # heap of (-key..., team) - worst kept team on top
+        self.seen = set()
+
+    def key(self, size, cost):
+        return (size, cost) if self.objective == 'size' else (cost, size)
+
+    def add(self, team, universe):
+        team = frozenset(team)
+        if team in self.seen:
+            return
+        # Teams with a member who adds nothing are never ranked as alternatives
+        for j in team:
+            rest = 0
+            for k in team:
+                if k != j:
+                    rest |= self.masks[k]
+            if rest & universe == universe:
+                return
+        key = self.key(len(team), sum(self.costs[j] for j in team))
+        if len(self.best) == self.alternatives:
+            if key >= self.worst():
+                return
+            _, dropped = heapq.heappop(self.best)
+            self.seen.discard(dropped)
+        self.seen.add(team)
+        heapq.heappush(self.best, (tuple(-k for k in key), team))
+
+    def worst(self):
+        return tuple(-k for k in self.best[0][0])
+
+    def run(self, universe, by_need):
+        self.universe = universe
+        self.by_need = by_need
+        self._branch(universe, [], 0.0)
+
+    def _branch(self, open_needs, team, cost):
+        if not open_needs:
+            self.add(team, self.universe)
+            return
+        self.nodes += 1
+        if self.nodes > self.node_limit:
+            self.truncated = True
+            return
+        bound = self.key(len(team) + -(-_popcount(open_needs) // self.widest), cost)
+        if len(self.best) == self.alternatives and bound >= self.worst():
+            return
+
+        # Some member of any cover holds the need with the fewest candidates
+        need = min(
+            (bit for bit in self.by_need if open_needs >> bit & 1),
+            key=lambda bit: len(self.by_need[bit])
+        )
+        choices = sorted(
+            (j for j in self.by_need[need] if j not in team),
+            key=lambda j: (-_popcount(self.masks[j] & open_needs), self.costs[j])
+        )
+        for j in choices:
+            team.append(j)
+            self._branch(open_needs & ~self.masks[j], team, cost + self.costs[j])
+            team.pop()
+            if self.truncated:
+                return
+
+
+def greedy_cover(masks, costs, universe, objective='size'):
+    """One cover of ``universe`` (as much of it as the masks can cover) by greedy choice"""
+    team, open_needs = [], universe
+    while open_needs:
+        best = None
+        for j, mask in enumerate(masks):
+            gain = _popcount(mask & open_needs)
+            if not gain:
+                continue
+            rank = (-gain, costs[j]) if objective == 'size' else (costs[j] / gain, -gain)
+            if best is None or rank < best[0]:
+                best = (rank, j)
+        if best is None:
+            break
+        team.append(best[1])
+        open_needs &= ~masks[best[1]]
+    return team
+
+
+def best_covers(masks, costs, universe, objective='size', alternatives=ALTERNATIVES, node_limit=NODE_LIMIT):
+    """``(teams, exact)``: up to ``alternatives`` covers of ``universe``, best first
+
+    Each team is a list of indexes into ``masks``. ``universe`` must be
+    coverable by the union of ``masks``.
+    """
+    by_need = {
+        bit: [j for j, mask in enumerate(masks) if mask >> bit & 1]
+        for bit in range(universe.bit_length()) if universe >> bit & 1
+    }
+    search = _Search(masks, costs, objective, alternatives, node_limit)
+    search.add(greedy_cover(masks, costs, universe, objective), universe)
+    search.run(universe, by_need)
+    teams = sorted(search.best, key=lambda entry: tuple(-k for k in entry[0]))
+    return [sorted(team) for _, team in teams], not search.truncated
+
+
+def plan(mem_ids, masks, loads, universe, objective='size', alternatives=ALTERNATIVES, node_limit=NODE_LIMIT):
+    """Cover ``universe`` with members; returns a dict of plain Python values
+
+    ``mem_ids`` / ``masks`` / ``loads`` are parallel arrays. The result holds
+    ``teams`` (each ``[{'mem_id', 'load', 'mask', 'alternates'}]``), ``exact``
+    and the ``uncovered`` mask of needs nobody can meet.
+    """
+    groups = candidate_groups(mem_ids, masks, loads)
+    coverable = 0
+    for mask, _ in groups:
+        coverable |= mask
+    group_masks = [mask for mask, _ in groups]
+    costs = [members[0][0] for _, members in groups]
+    kept = prune_dominated(group_masks, costs)
+
+    teams, exact = [], True
+    if coverable & universe:
+        teams, exact = best_covers(
+            [group_masks[i] for i in kept], [costs[i] for i in kept], coverable & universe,
+            objective, alternatives, node_limit
+        )
+    return {
+        'teams': [
+            [
+                {
+                    'mem_id': groups[kept[j]][1][0][1],
+                    'load': groups[kept[j]][1][0][0],
+                    'mask': groups[kept[j]][0],
+                    'alternates': [mem_id for _, mem_id in groups[kept[j]][1][1:1 + ALTERNATES]],
+                }
+                for j in team
+            ]
+            for team in teams
+        ],
+        'exact': exact,
+        'uncovered': universe & ~coverable,
+    }
@@ -0,0 +1,53 @@
+from ISO_Standard_DB.analytics import build_reports_payload
+
+MEMBERS = [
+    {'mem_id': 1, 'first_name': 'Praneeth', 'middle_name': '', 'last_name': 'Kumar', 'role_id': 1, 'role_name': 'Software Intern'},
+    {'mem_id': 2, 'first_name': 'Gagan', 'middle_name': 'S.', 'last_name': 'Reddy', 'role_id': 1, 'role_name': 'Software Intern'},
+    {'mem_id': 3, 'first_name': 'Kashyap', 'middle_name': None, 'last_name': 'Sharma', 'role_id': None, 'role_name': None},
+]
+SKILLS = [
+    {'skill_id': 1, 'skill_name': 'Python (Data Science)', 'category': 'Technical'},
+    {'skill_id': 2, 'skill_name': 'MySQL Database Design', 'category': 'Technical'},
+    {'skill_id': 9, 'skill_name': 'Clinical Data Analysis', 'category': 'Clinical'},
+]
+ASSIGNMENTS = [
+    {'mem_id': 1, 'skill_id': 1, 'proficiency_level': 3},
+    {'mem_id': 1, 'skill_id': 2, 'proficiency_level': 3},
+    {'mem_id': 2, 'skill_id': 1, 'proficiency_level': 3},
+    {'mem_id': 2, 'skill_id': 9, 'proficiency_level': 2},
+]
+REQUIREMENTS = [
+    {'role_id': 1, 'skill_id': 1, 'min_proficiency_required': 1, 'skill_name': 'Python (Data Science)', 'category': 'Technical'},
+    {'role_id': 1, 'skill_id': 2, 'min_proficiency_required': 1, 'skill_name': 'MySQL Database Design', 'category': 'Technical'},
+]
+
+
+def test_role_compliance_and_missing_skills():
+    """Compliance % and missing skills per member match the role requirements"""
+    report = build_reports_payload(MEMBERS, SKILLS, ASSIGNMENTS, REQUIREMENTS)
+
+    members = {m['mem_id']: m for m in report['roles_data'][1]['members']}
+    assert members[1]['match_pct'] == 100
+    assert members[1]['missing'] == []
+    assert members[2]['match_pct'] == 50
+    assert members[2]['missing'] == ['MySQL Database Design']
+    assert report['compliance_rate'] == 50
+    assert report['critical_gaps'] == 1
+
+
+def test_risk_heatmap_and_member_stats():
+    """Bus-factor risks, heatmap rows and member stats come from the same matrix"""
+    report = build_reports_payload(MEMBERS, SKILLS, ASSIGNMENTS, REQUIREMENTS)
+
+    risks = {r['skill_id']: r for r in report['risk_report']}
+    assert set(risks) == {2, 9}
+    assert risks[9]['holders'] == ['Gagan S. Reddy']
+
+    assert report['heatmap_skills'][0]['skill_id'] == 1
+    assert report['heatmap_data'][2]['skills'] == {1: 0, 2: 0, 9: 0}
+
+    assert report['member_stats'][0] == {
+        'full_name': 'Praneeth Kumar', 'role': 'Software Intern', 'skill_count': 2, 'avg_proficiency': 3.0
+    }
+    assert report['category_data']['Technical']['levels'] == {1: 0, 2: 0, 3: 3}
+    assert report['top_skills'][0]['skill_name'] == 'Python (Data Science)'
@@ -0,0 +1,224 @@
+import threading
+import time
+from datetime import datetime
+
+from ISO_Standard_DB.analytics_state import AnalyticsState
+
+
+class FakeCursor:
+    """Answers the handful of queries AnalyticsState issues from plain lists"""
+
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        if sql.startswith('SELECT * FROM audit_logs ORDER BY log_id DESC'):
+            self.rows = sorted(self.db['audit_logs'], key=lambda r: -r['log_id'])[:params[0]]
+        elif sql.startswith('SELECT * FROM audit_logs WHERE log_id >'):
+            last_id, limit = params
+            self.rows = [r for r in self.db['audit_logs'] if r['log_id'] > last_id][:limit]
+        elif sql.startswith('SELECT log_id FROM audit_logs WHERE log_id >'):
+            low, high = params
+            self.rows = [{'log_id': r['log_id']} for r in self.db['audit_logs'] if low < r['log_id'] <= high]
+        elif sql.startswith('SELECT * FROM audit_logs WHERE log_id IN'):
+            self.rows = [r for r in self.db['audit_logs'] if r['log_id'] in params]
+        elif sql.startswith('(SELECT table_name, log_id, change_date FROM audit_logs'):
+            self.rows = []
+            for table, last_id in zip(params[::2], params[1::2]):
+                self.rows += sorted(
+                    (r for r in self.db['audit_logs'] if r['table_name'] == table and r['log_id'] <= last_id),
+                    key=lambda r: -r['log_id']
+                )[:1]
+        else:
+            table = sql.split(' FROM ')[1].split()[0]
+            key = {'roles': 'role_id', 'skills': 'skill_id', 'team_members': 'mem_id'}.get(table)
+            rows = self.db[table]
+            if ' IN (' in sql:
+                rows = [r for r in rows if r[key] in params]
+            self.rows = [dict(r) for r in rows]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.db)
+
+    def close(self):
+        pass
+
+
+def make_db():
+    return {
+        'roles': [{'role_id': 1, 'role_name': 'Software Intern'}],
+        'skills': [
+            {'skill_id': 1, 'skill_name': 'Python (Data Science)', 'category': 'Technical'},
+            {'skill_id': 2, 'skill_name': 'MySQL Database Design', 'category': 'Technical'},
+        ],
+        'team_members': [
+            {'mem_id': 1, 'first_name': 'Praneeth', 'middle_name': '', 'last_name': 'Kumar',
+             'email': 'p@example.com', 'phone_no': '1', 'role_id': 1},
+        ],
+        'mem_skills': [{'mem_id': 1, 'skill_id': 1, 'proficiency_level': 2}],
+        'role_requirements': [
+            {'role_id': 1, 'skill_id': 1, 'min_proficiency_required': 1},
+            {'role_id': 1, 'skill_id': 2, 'min_proficiency_required': 2},
+        ],
+        'audit_logs': [],
+    }
+
+
+def log(db, table, op, record_id, new_value=None):
+    db['audit_logs'].append({
+        'log_id': len(db['audit_logs']) + 1, 'table_name': table, 'operation_type': op,
+        'record_id': record_id, 'old_value': None, 'new_value': new_value,
+        'change_date': datetime(2026, 1, 1, 9, len(db['audit_logs'])),
+    })
+
+
+def test_skill_deltas_update_counters_and_compliance():
+    """mem_skills and role_requirements log rows are applied without rescanning"""
+    db = make_db()
+    state = AnalyticsState(connect=None)
+    state.load(FakeCursor(db))
+    assert state.match_pct(1) == 50
+    assert state.counters()['total_assignments'] == 1
+
+    log(db, 'mem_skills', 'INSERT', '1-2', 'Proficiency: 3')
+    log(db, 'mem_skills', 'UPDATE', '1-1', 'Proficiency: 1')
+    state.sync(FakeCursor(db))
+    assert state.match_pct(1) == 100
+    assert state.counters()['total_assignments'] == 2
+    assert state.category_levels['Technical'] == {1: 1, 2: 0, 3: 1}
+
+    log(db, 'role_requirements', 'UPDATE', '1-1', 'Min Proficiency: 2')
+    state.sync(FakeCursor(db))
+    assert state.match_pct(1) == 50
+    assert state.compliance_summary() == {'compliance_rate': 0, 'critical_gaps': 1}
+    assert [row['log_id'] for row in state.latest_logs()] == [3, 2, 1]
+
+
+def test_deleting_a_skill_drops_cascaded_rows():
+    """FK cascades fire no triggers, so dependent rows go with the skill"""
+    db = make_db()
+    state = AnalyticsState(connect=None)
+    state.load(FakeCursor(db))
+
+    db['skills'] = [s for s in db['skills'] if s['skill_id'] != 1]
+    log(db, 'skills', 'DELETE', '1')
+    state.sync(FakeCursor(db))
+
+    assert state.counters() == {'total_members': 1, 'total_roles': 1, 'total_skills': 1, 'total_assignments': 0}
+    assert state.role_requirements[1] == {2: 2}
+    assert state.match_pct(1) == 0
+    assert state.category_levels['Technical'] == {1: 0, 2: 0, 3: 0}
+
+
+def test_table_versions_follow_deltas_and_cascades():
+    """Each table's version is its newest log_id; cascaded deletes move the children too"""
+    db = make_db()
+    log(db, 'skills', 'INSERT', '2')
+    log(db, 'mem_skills', 'INSERT', '1-1', 'Proficiency: 2')
+    state = AnalyticsState(connect=None)
+    state.load(FakeCursor(db))
+    assert state.version(['skills']) == ('1', datetime(2026, 1, 1, 9, 0))
+    assert state.version(['skills', 'mem_skills', 'roles'])[0] == '1-2-0'
+
+    log(db, 'role_requirements', 'UPDATE', '1-2', 'Min Proficiency: 3')
+    state.sync(FakeCursor(db))
+    assert state.version(['skills', 'mem_skills'])[0] == '1-2'
+    assert state.version(['role_requirements']) == ('3', datetime(2026, 1, 1, 9, 2))
+
+    db['skills'] = [s for s in db['skills'] if s['skill_id'] != 1]
+    log(db, 'skills', 'DELETE', '1')
+    state.sync(FakeCursor(db))
+    assert state.version(['skills', 'mem_skills', 'role_requirements', 'team_members'])[0] == '4-4-4-0'
+
+
+def test_a_gap_given_up_on_reloads_the_state():
+    """A transaction that commits after the gap timeout is picked up by a full reload"""
+    db = make_db()
+    state = AnalyticsState(connect=lambda: FakeConnection(db))
+    state.load(FakeCursor(db))
+
+    log(db, 'mem_skills', 'INSERT', '1-2', 'Proficiency: 3')   # log_id 1, still uncommitted
+    log(db, 'mem_skills', 'UPDATE', '1-1', 'Proficiency: 3')   # log_id 2
+    slow = db['audit_logs'].pop(0)
+    db['mem_skills'][0]['proficiency_level'] = 3
+    state.sync(FakeCursor(db))
+    assert state.member_skills_map[1] == {1: 3}
+    assert state.tail.gaps().keys() == {1}
+
+    # The slow transaction commits only after the tail stopped looking for log_id 1
+    state.tail.gap_timeout = -1
+    db['audit_logs'].insert(0, slow)
+    db['mem_skills'].append({'mem_id': 1, 'skill_id': 2, 'proficiency_level': 3})
+    state.sync(FakeCursor(db))
+    state._reload_thread.join(5)
+
+    assert state.reloads == 2
+    assert state.member_skills_map[1] == {1: 3, 2: 3}
+    assert state.match_pct(1) == 100
+    assert state.tail.last_id == 2 and state.tail.gaps() == {}
+
+
+def test_periodic_reconcile_catches_changes_the_tail_missed():
+    db = make_db()
+    state = AnalyticsState(connect=lambda: FakeConnection(db), reconcile_interval=3600)
+    state.load(FakeCursor(db))
+
+    db['skills'][1]['skill_name'] = 'MySQL Query Tuning'  # no audit row (restored backup, manual fix ...)
+    state.sync(FakeCursor(db))
+    assert state._reload_thread is None
+
+    state._reconcile_at = time.monotonic()
+    state.sync(FakeCursor(db))
+    state._reload_thread.join(5)
+    assert state.skills[2]['skill_name'] == 'MySQL Query Tuning'
+
+
+class SlowAuditCursor(FakeCursor):
+    """Holds the tail's audit_logs read until ``release`` is set"""
+
+    def __init__(self, db, reading, release):
+        super().__init__(db)
+        self.reading, self.release = reading, release
+
+    def execute(self, sql, params=()):
+        if ' '.join(sql.split()).startswith('SELECT * FROM audit_logs WHERE log_id >'):
+            self.reading.set()
+            self.release.wait(5)
+        super().execute(sql, params)
+
+
+def test_sync_reads_without_the_lock_and_drops_stale_batches():
+    db = make_db()
+    state = AnalyticsState(connect=None)
+    state.load(FakeCursor(db))
+    log(db, 'mem_skills', 'INSERT', '1-2', 'Proficiency: 3')
+
+    reading, release = threading.Event(), threading.Event()
+    slow = threading.Thread(target=state.sync, args=(SlowAuditCursor(db, reading, release),))
+    slow.start()
+    assert reading.wait(5)
+    # Other requests neither wait for the slow read nor see a half-applied state
+    started = time.monotonic()
+    assert state.counters()['total_assignments'] == 1
+    state.sync(FakeCursor(db))
+    assert time.monotonic() - started < 1
+    assert state.counters()['total_assignments'] == 2
+
+    # The slow sync's batch is now stale: it reads again instead of applying it twice
+    release.set()
+    slow.join(5)
+    assert state.applied == 1
+    assert state.member_skills_map[1] == {1: 2, 2: 3}
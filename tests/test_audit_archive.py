@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from ISO_Standard_DB.audit_archive import AuditArchive, Partition, closed_partitions, ensure_partitions
+
+
+def log(log_id, day, table='skills', operation='INSERT'):
+    return dict(log_id=log_id, table_name=table, operation_type=operation, record_id=str(log_id),
+                old_value=None, new_value='x', changed_by='root@localhost',
+                change_date=datetime(2025, 1, 1) + timedelta(days=day))
+
+
+def archive_month(archive, name, rows):
+    entry = archive.write_segment(name, sorted(rows, key=lambda r: (r['change_date'], r['log_id']), reverse=True))
+    archive.check(entry)
+    archive.commit(entry)
+    return entry
+
+
+def test_archive_reads_newest_first_across_segments(tmp_path):
+    """Segments read back in (change_date, log_id) DESC order with filters and a seek position"""
+    archive = AuditArchive(str(tmp_path))
+    archive_month(archive, 'p202501', [log(i, i) for i in range(1, 11)])
+    archive_month(archive, 'p202502', [log(i, i, table='roles') for i in range(40, 45)])
+
+    assert [r['log_id'] for r in archive.read()] == [44, 43, 42, 41, 40] + list(range(10, 0, -1))
+    assert [r['log_id'] for r in archive.read({'table': 'skills'}, before=('2025-01-06 00:00:00', 6))] == [5, 4, 3, 2, 1]
+    assert [r['log_id'] for r in archive.read({'date_from': datetime(2025, 1, 10), 'date_to': datetime(2025, 2, 10)})] == [10, 9]
+    assert archive.facets() == ({'roles', 'skills'}, {'INSERT'})
+
+
+def test_verify_detects_damaged_segment(tmp_path):
+    archive = AuditArchive(str(tmp_path))
+    entry = archive_month(archive, 'p202501', [log(1, 0), log(2, 1)])
+    assert archive.verify() == [(archive.entry('p202501'), None)]
+
+    with open(tmp_path / entry['file'], 'ab') as file:
+        file.write(b'tampered')
+    (_, problem), = archive.verify()
+    assert 'checksum mismatch' in problem
+
+
+def test_partition_maintenance_plan():
+    """p_future is split month by month, and only months before the hot window are closed"""
+    class Cursor:
+        executed = []
+
+        def execute(self, sql, params=()):
+            self.executed.append(sql)
+
+        def fetchall(self):
+            return [{'name': 'p202606', 'bound': '1782864000', 'row_estimate': 3},
+                    {'name': 'p_future', 'bound': 'MAXVALUE', 'row_estimate': 0}]
+
+    added = ensure_partitions(Cursor(), months_ahead=1, now=datetime(2026, 7, 15))
+    assert added == ['p202607', 'p202608']
+    assert 'REORGANIZE PARTITION p_future INTO' in Cursor.executed[-1]
+
+    partitions = [Partition('p202604', 1777593600), Partition('p202605', 1780272000), Partition('p_future', None)]
+    assert [p.name for p in closed_partitions(partitions, hot_months=2, now=datetime(2026, 7, 15))] == ['p202604']
+
+
+class LiveAuditCursor:
+    """audit_logs as a list: applies the (change_date, log_id) seek and LIMIT of a newest-first page"""
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda r: (r['change_date'], r['log_id']), reverse=True)
+
+    def execute(self, sql, params=()):
+        *seek, limit = params
+        rows = self.rows
+        if seek:
+            before = (datetime.fromisoformat(str(seek[0])), seek[2])
+            rows = [r for r in rows if (r['change_date'], r['log_id']) < before]
+        self.result = [dict(r) for r in rows[:limit]]
+
+    def fetchall(self):
+        return self.result
+
+
+def test_audit_page_runs_on_from_live_rows_into_the_archive(tmp_path, monkeypatch):
+    from werkzeug.datastructures import MultiDict
+    from ISO_Standard_DB import app as audit_app
+
+    archive = AuditArchive(str(tmp_path))
+    archive_month(archive, 'p202501', [log(i, i) for i in range(1, 11)])
+    monkeypatch.setattr(audit_app, 'audit_archive', archive)
+    cursor = LiveAuditCursor([log(i, i) for i in range(48, 51)])
+
+    first = audit_app.fetch_audit_page(cursor, MultiDict({'limit': '5'}))
+    assert [r['log_id'] for r in first['items']] == [50, 49, 48, 10, 9]
+    second = audit_app.fetch_audit_page(cursor, MultiDict({'limit': '5', 'cursor': first['next_cursor']}))
+    assert [r['log_id'] for r in second['items']] == [8, 7, 6, 5, 4]
+
+    with pytest.raises(ValueError, match="order must be 'desc'"):
+        audit_app.fetch_audit_page(cursor, MultiDict({'order': 'asc'}))
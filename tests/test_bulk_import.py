@@ -0,0 +1,44 @@
+import pytest
+
+from ISO_Standard_DB.bulk_import import parse_members, validate_members
+
+ROLES = {'intern': 1, 'nurse': 2}
+SKILLS = {'python': 10, 'phlebotomy': 11}
+
+
+def test_validate_members_reports_every_row_error():
+    """Form rules, in-file duplicates, unknown roles/skills and bad levels are reported per row"""
+    rows = parse_members(
+        "first_name,middle_name,last_name,email,phone_no,role,skills\n"
+        "Asha,,Rao,asha@gmail.com,1234567890,Intern,Python:3; 11:2\n"
+        "Ravi,,Iyer,ravi@yahoo.com,123,Nurse,\n"
+        "Mina,,Das,ASHA@gmail.com,1234567891,Nurse,\n"
+        ",,Nope,nope@gmail.com,1234567899,Pilot,Cooking;Python:4\n",
+        'csv'
+    )
+    members, errors = validate_members(rows, ROLES, SKILLS)
+
+    assert [m['row'] for m in members] == [1]
+    assert members[0]['values'] == ('Asha', '', 'Rao', 'asha@gmail.com', '1234567890', 1)
+    assert members[0]['skills'] == [(10, 3), (11, 2)]
+    assert [(e['row'], e['message']) for e in errors] == [
+        (2, 'Only Gmail addresses (@gmail.com) are allowed'),
+        (2, 'Phone number must be exactly 10 digits'),
+        (3, 'Duplicate email in file (first on row 1)'),
+        (4, 'First name is required'),
+        (4, "Unknown role 'Pilot'"),
+        (4, "Unknown skill 'Cooking'"),
+        (4, "Proficiency for 'Python' must be 1, 2 or 3"),
+    ]
+
+
+def test_json_import_accepts_member_form_shape():
+    rows = parse_members('{"members": [{"first_name": "Lee", "last_name": "Wu", "email": "lee@gmail.com", '
+                         '"phone_no": "2222222222", "role_id": 2, "skills": [{"skill_id": 11, "proficiency": 1}]}]}',
+                         'json')
+    members, errors = validate_members(rows, ROLES, SKILLS)
+    assert errors == []
+    assert members[0]['skills'] == [(11, 1)]
+
+    with pytest.raises(ValueError):
+        parse_members('[1, 2]', 'json')
@@ -0,0 +1,81 @@
+from ISO_Standard_DB.cache import TTLCache, cache_stats
+
+
+def test_get_or_load_counts_hits_and_misses():
+    cache = TTLCache('test_counters', ttl=60)
+    calls = []
+
+    def load():
+        calls.append(1)
+        return {'rows': [1, 2]}
+
+    assert cache.get_or_load('k', load) == {'rows': [1, 2]}
+    assert cache.get_or_load('k', load) == {'rows': [1, 2]}
+    assert len(calls) == 1
+    assert cache_stats()['test_counters'] == {'entries': 1, 'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+    cache.invalidate()
+    cache.get_or_load('k', load)
+    assert len(calls) == 2
+
+
+def test_value_loaded_across_an_invalidation_is_not_stored():
+    """A load that started before a write commits must not outlive the invalidation"""
+    cache = TTLCache('test_race', ttl=60)
+
+    def load():
+        cache.invalidate()  # a write route commits while the catalog is being read
+        return 'stale'
+
+    assert cache.get_or_load('k', load) == 'stale'
+    assert cache.get('k') is None
+    assert cache.get_or_load('k', lambda: 'fresh') == 'fresh'
+    assert cache.get('k') == 'fresh'
+
+
+def test_generation_from_an_earlier_snapshot_rejects_the_load():
+    """The request's transaction began before a write that invalidated the cache"""
+    cache = TTLCache('test_snapshot', ttl=60)
+    generation = cache.generation  # request opens its connection and reads
+    cache.invalidate()             # another request commits a skill rename
+    assert cache.get_or_load('k', lambda: 'old snapshot', generation=generation) == 'old snapshot'
+    assert cache.get('k') is None
+    assert cache.get_or_load('k', lambda: 'fresh', generation=cache.generation) == 'fresh'
+    assert cache.get('k') == 'fresh'
+
+
+def test_catalog_reloads_when_another_worker_writes(monkeypatch):
+    """The catalog key follows the audit-log version, which every worker sees"""
+    from ISO_Standard_DB import app as catalog_app
+
+    class State:
+        tag = '10-4-7'
+
+        def sync(self, cursor=None):
+            return self
+
+        def version(self, tables):
+            assert tables == ('skills', 'roles', 'role_requirements')
+            return self.tag, None
+
+    class Cursor:
+        loads = 0
+
+        def execute(self, sql, params=()):
+            if 'FROM skills' in sql:
+                Cursor.loads += 1
+
+        def fetchall(self):
+            return []
+
+    state = State()
+    monkeypatch.setattr(catalog_app, 'analytics_state', state)
+    catalog_app.catalog_cache.invalidate()
+    with catalog_app.app.test_request_context():
+        catalog_app.get_catalog(Cursor())
+        catalog_app.get_catalog(Cursor())
+        assert Cursor.loads == 1
+
+        state.tag = '11-4-7'  # a skill renamed through another process
+        catalog_app.get_catalog(Cursor())
+        assert Cursor.loads == 2
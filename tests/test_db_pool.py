@@ -0,0 +1,105 @@
+from ISO_Standard_DB.db_pool import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.in_transaction = False
+        self.alive = True
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise RuntimeError('gone away')
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_reuses_connections():
+    """Returned connections are handed out again instead of reconnecting"""
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    pool = ConnectionPool(connect, size=2, max_overflow=0, timeout=0)
+    conn = pool.connect()
+    conn.close()
+    conn = pool.connect()
+    conn.close()
+
+    assert len(opened) == 1
+    stats = pool.stats()
+    assert stats['checkouts'] == 2
+    assert stats['checked_out'] == 0
+    assert stats['idle'] == 1
+
+
+def test_pool_overflow_and_fallback():
+    """Overflow connections are closed on release; an exhausted pool falls back to a direct connection"""
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    pool = ConnectionPool(connect, size=1, max_overflow=1, timeout=0)
+    first = pool.connect()
+    second = pool.connect()
+    assert pool.stats()['overflow'] == 1
+
+    third = pool.connect()
+    assert pool.stats()['fallbacks'] == 1
+    third.close()
+    assert opened[2].closed
+
+    second.close()
+    first.close()
+    stats = pool.stats()
+    assert stats['open'] == 1
+    assert stats['idle'] == 1
+
+
+def test_pool_pre_ping_reconnects_and_rolls_back():
+    """Dead idle connections are replaced, open transactions are rolled back on release"""
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    pool = ConnectionPool(connect, size=1, max_overflow=0, timeout=0)
+    conn = pool.connect()
+    conn.raw.in_transaction = True
+    conn.close()
+    assert opened[0].in_transaction is False
+
+    opened[0].alive = False
+    conn = pool.connect()
+    assert conn.raw is opened[1]
+    assert pool.stats()['reconnects'] == 1
+    conn.close()
+
+
+def test_invalidated_connection_is_not_reused():
+    """invalidate() closes the raw connection on release and frees its slot"""
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    pool = ConnectionPool(connect, size=1, max_overflow=0, timeout=0)
+    conn = pool.connect()
+    conn.invalidate()
+    conn.close()
+    assert opened[0].closed
+    assert pool.stats()['open'] == 0
+
+    conn = pool.connect()
+    assert conn.raw is opened[1]
+    conn.close()
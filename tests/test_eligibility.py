@@ -0,0 +1,65 @@
+from ISO_Standard_DB.eligibility import EligibilityEngine
+
+
+class FakeState:
+    """Just the parts of AnalyticsState the engine reads"""
+
+    loaded = True
+
+    def __init__(self):
+        self.roles = {1: {'role_name': 'Intern'}, 2: {'role_name': 'Lead'}, 3: {'role_name': 'Open'}}
+        self.role_requirements = {1: {10: 1}, 2: {10: 3, 11: 2}, 3: {}}
+        self.skills = {10: {'category': 'Technical'}, 11: {'category': 'Clinical'}, 12: {'category': 'Clinical'}}
+        self.members = {7: {'first_name': 'Asha', 'middle_name': '', 'last_name': 'Rao'},
+                        8: {'first_name': 'Ravi', 'middle_name': None, 'last_name': 'Iyer'}}
+        self.member_skills_map = {7: {10: 2, 11: 3}}
+        self.listeners = []
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def emit(self, *event):
+        for listener in self.listeners:
+            listener(*event)
+
+
+def names(engine, mem_id):
+    return [role['role_name'] for role in engine.eligible_roles(mem_id)]
+
+
+def test_eligibility_follows_skill_and_requirement_deltas():
+    state = FakeState()
+    engine = EligibilityEngine(state)
+    assert names(engine, 7) == ['Intern', 'Open']
+    assert engine.missing_count(7, 2) == 1
+    assert names(engine, 99) == ['Open']  # unknown member: only roles without requirements
+
+    state.emit('mem_skill', 7, 10, 2, 3)
+    assert names(engine, 7) == ['Intern', 'Lead', 'Open']
+
+    state.emit('requirement', 3, 12, 0, 1)
+    state.emit('mem_skill', 7, 11, 3, 1)
+    assert names(engine, 7) == ['Intern']
+    assert engine.missing_count(7, 2) == 1 and engine.missing_count(7, 3) == 1
+
+    state.emit('requirement', 3, 12, 1, 0)
+    state.emit('skill_deleted', 12)
+    assert names(engine, 7) == ['Intern', 'Open']
+
+
+def test_matrix_matches_single_member_answers():
+    """The vectorised matrix agrees with the per-member check, with role and category filters"""
+    state = FakeState()
+    engine = EligibilityEngine(state)
+    matrix = engine.matrix()
+    (members, missing), = matrix.chunks()
+    assert members == [(7, 'Asha Rao'), (8, 'Ravi Iyer')]
+    assert missing.tolist() == [[0, 1, 0], [1, 2, 0]]
+
+    # Only Clinical requirements: Lead needs skill 11 at 2, which Asha holds at 3
+    (_, missing), = engine.matrix(role_ids={2, 3}, category='Clinical').chunks()
+    assert missing.tolist() == [[0, 0], [1, 0]]
+
+    lines = list(matrix.stream_ndjson())
+    assert lines[1] == '[7,"05"]\n[8,"04"]\n'
+    assert list(matrix.stream_csv(with_missing=True))[-1].splitlines()[-1] == '8,Ravi Iyer,1,2,0'
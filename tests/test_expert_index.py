@@ -0,0 +1,63 @@
+from ISO_Standard_DB.expert_index import ExpertIndex
+
+
+class FakeState:
+    """Just the parts of AnalyticsState the index reads"""
+
+    loaded = True
+
+    def __init__(self):
+        self.roles = {1: {'role_name': 'Nurse'}}
+        self.skills = {10: {'skill_name': 'Java'}, 11: {'skill_name': 'Python'}}
+        self.members = {
+            mem_id: {'first_name': name, 'middle_name': '', 'last_name': 'Test',
+                     'email': f'{name.lower()}@gmail.com', 'role_id': 1}
+            for mem_id, name in ((1, 'Ann'), (2, 'Bob'), (3, 'Cy'))
+        }
+        self.member_skills_map = {1: {10: 2, 11: 3}, 2: {10: 3}, 3: {11: 1}}
+        self.listeners = []
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def emit(self, *event):
+        for listener in self.listeners:
+            listener(*event)
+
+
+def ids(result):
+    return [row['mem_id'] for row in result[1]]
+
+
+def test_single_skill_and_all_skills_pages():
+    state = FakeState()
+    index = ExpertIndex(state)
+    assert index.skill_id('java') == 10 and index.skill_id('11') == 11 and index.skill_id('Go') is None
+
+    total, rows = index.search([(10, 1)])
+    assert total == 2 and [r['mem_id'] for r in rows] == [2, 1]
+    assert rows[0]['Team Member'] == 'Bob Test' and rows[0]['Job Role'] == 'Nurse' and rows[0]['Proficiency'] == 3
+    assert index.search([(10, 3)])[0] == 1
+    assert ids(index.search([(10, 1)], limit=1, offset=1)) == [1]
+
+    # No skill: each member once, with their best skill
+    total, rows = index.search([], min_level=2)
+    assert total == 2 and [(r['mem_id'], r['Skill']) for r in rows] == [(1, 'Python'), (2, 'Java')]
+
+    state.emit('mem_skill', 3, 10, 0, 3)
+    state.emit('mem_skill', 2, 10, 3, 0)
+    assert ids(index.search([(10, 1)])) == [3, 1]
+
+
+def test_multi_skill_and_or_ranking():
+    state = FakeState()
+    index = ExpertIndex(state)
+    assert ids(index.search([(10, 1), (11, 1)], mode='all')) == [1]
+    assert index.search([(10, 1), (11, 2)], mode='all')[0] == 1
+    assert index.search([(10, 3), (11, 3)], mode='all')[0] == 0
+
+    # any: more skills matched first, then summed proficiency, then mem_id
+    total, rows = index.search([(10, 1), (11, 1)], mode='any')
+    assert total == 3 and [r['mem_id'] for r in rows] == [1, 2, 3]
+    assert rows[0]['Skill'] == 'Java, Python' and rows[0]['Proficiency'] == 3
+    assert ids(index.search([(10, 1), (11, 1)], mode='any', limit=1, offset=2)) == [3]
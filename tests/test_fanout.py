@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from ISO_Standard_DB.db_pool import ConnectionPool
+from ISO_Standard_DB.fanout import FanOut
+
+
+class SleepyConnection:
+    """Every query takes ``delay`` seconds; records the thread that ran it"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.in_transaction = False
+        self.threads = []
+
+    def cursor(self, **kwargs):
+        return SleepyCursor(self)
+
+    def ping(self, reconnect=False):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SleepyCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql, params=()):
+        self.connection.threads.append(threading.current_thread().name)
+        time.sleep(self.connection.delay)
+        self.result = sql
+
+    def close(self):
+        pass
+
+
+def query(sql):
+    def task(cursor):
+        cursor.execute(sql)
+        return cursor.result
+    return task
+
+
+def test_independent_queries_overlap():
+    pool = ConnectionPool(lambda: SleepyConnection(0.05), size=4, max_overflow=0, timeout=0)
+    fan_out = FanOut(lambda: pool, workers=4)
+    request_cursor = SleepyConnection(0.05).cursor()
+
+    started = time.monotonic()
+    found = fan_out.run(request_cursor, {name: query(name) for name in 'abcd'})
+    elapsed = time.monotonic() - started
+
+    assert found == {'a': 'a', 'b': 'b', 'c': 'c', 'd': 'd'}
+    assert elapsed < 0.15  # four 50 ms queries, not 200 ms
+    assert request_cursor.connection.threads == [threading.current_thread().name]
+    assert pool.stats()['checked_out'] == 0 and pool.stats()['idle'] == 3
+
+
+def test_busy_pool_runs_in_the_calling_thread_and_errors_surface():
+    pool = ConnectionPool(lambda: SleepyConnection(0), size=1, max_overflow=5, timeout=0)
+    held = pool.connect()  # the request's own connection uses the only slot
+    fan_out = FanOut(lambda: pool, workers=4)
+    request_cursor = SleepyConnection(0).cursor()
+
+    assert fan_out.run(request_cursor, {'a': query('a'), 'b': query('b')}) == {'a': 'a', 'b': 'b'}
+    assert len(request_cursor.connection.threads) == 2
+    assert pool.stats()['overflow'] == 0
+
+    held.close()
+
+    def boom(cursor):
+        raise ValueError('bad query')
+
+    with pytest.raises(ValueError):
+        fan_out.run(request_cursor, {'a': query('a'), 'b': boom})
+    assert pool.stats()['checked_out'] == 0
+
+
+def test_concurrent_pages_never_queue_side_tasks_on_the_shared_executor():
+    """Two pages with four side queries each on a 4-thread executor"""
+    pool = ConnectionPool(lambda: SleepyConnection(0.05), size=10, max_overflow=0, timeout=0)
+    fan_out = FanOut(lambda: pool, workers=4)
+    peak, lock = [0], threading.Lock()
+    try_connect = pool.try_connect
+
+    def counting_try_connect():
+        connection = try_connect()
+        with lock:
+            peak[0] = max(peak[0], pool.stats()['checked_out'])
+        return connection
+
+    pool.try_connect = counting_try_connect
+    barrier = threading.Barrier(2)
+    found, cursors = {}, {}
+
+    def page(name):
+        cursors[name] = SleepyConnection(0.05).cursor()
+        barrier.wait()
+        found[name] = fan_out.run(cursors[name], {f'{name}{i}': query(f'{name}{i}') for i in range(5)})
+
+    threads = [threading.Thread(target=page, args=(name,)) for name in 'xy']
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert found == {name: {f'{name}{i}': f'{name}{i}' for i in range(5)} for name in 'xy'}
+    # Only as many side connections as there are workers to use them
+    assert peak[0] <= 4
+    side = 10 - len(cursors['x'].connection.threads) - len(cursors['y'].connection.threads)
+    assert side <= 4
+    assert pool.stats()['checked_out'] == 0
+    # Every worker slot came back: a later page fans out fully again
+    started = time.monotonic()
+    fan_out.run(SleepyConnection(0.05).cursor(), {name: query(name) for name in 'abcde'})
+    assert time.monotonic() - started < 0.15
@@ -131,3 +131,55 @@ def test_add_skill_and_assign(client):
     
     cursor.close()
     conn.close()
+
+def test_not_found_pages_release_connection(client):
+    """Early-return paths hand the request's connection back to the pool"""
+    from ISO_Standard_DB.app import get_db_pool
+
+    for url in ('/members/999999', '/roles/999999', '/skills/999999', '/members/999999/eligible-roles'):
+        response = client.get(url)
+        assert response.status_code == 302
+
+    assert get_db_pool().stats()['checked_out'] == 0
+
+def test_edit_role_applies_requirement_diff(client):
+    """Changed, added and removed requirements each get their own audit entry"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("INSERT INTO roles (role_name, description) VALUES ('Diff Tester', 'x')")
+    role_id = cursor.lastrowid
+    skill_ids = []
+    for name in ('Diff Skill A', 'Diff Skill B', 'Diff Skill C'):
+        cursor.execute("INSERT INTO skills (skill_name, category) VALUES (%s, 'Technical')", (name,))
+        skill_ids.append(cursor.lastrowid)
+    a, b, c = skill_ids
+    cursor.executemany("INSERT INTO role_requirements (role_id, skill_id, min_proficiency_required) VALUES (%s, %s, %s)",
+                       [(role_id, a, 1), (role_id, b, 1)])
+    conn.commit()
+    cursor.execute("SELECT MAX(log_id) AS last_id FROM audit_logs")
+    last_id = cursor.fetchone()['last_id']
+    cursor.close()
+    conn.close()
+
+    # Keep A as is, remove B, add C at level 2
+    response = client.post(f'/roles/{role_id}/edit', data={
+        'role_name': 'Diff Tester', 'description': 'x',
+        'existing_skill_ids[]': [a], 'existing_min_proficiencies[]': [1],
+        'new_skill_ids[]': [c], 'new_min_proficiencies[]': [2],
+        'skills_to_delete': str(b),
+    })
+    assert response.status_code == 302
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT skill_id, min_proficiency_required FROM role_requirements WHERE role_id = %s ORDER BY skill_id", (role_id,))
+    assert [(r['skill_id'], r['min_proficiency_required']) for r in cursor.fetchall()] == [(a, 1), (c, 2)]
+    cursor.execute("""
+        SELECT operation_type, record_id FROM audit_logs
+        WHERE log_id > %s AND table_name = 'role_requirements' ORDER BY log_id
+    """, (last_id,))
+    assert [(r['operation_type'], r['record_id']) for r in cursor.fetchall()] == [
+        ('INSERT', f'{role_id}-{c}'), ('DELETE', f'{role_id}-{b}')
+    ]
+    cursor.close()
+    conn.close()
@@ -0,0 +1,59 @@
+import threading
+
+from ISO_Standard_DB.metrics import Metrics
+
+
+def make(directory=None):
+    metrics = Metrics(directory=directory, flush_interval=60)
+    metrics.counter('requests_total', 'Requests')
+    metrics.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    metrics.counter('hits_total', 'Hits')
+    metrics.counter('misses_total', 'Misses')
+    metrics.ratio('hit_ratio', 'Hit ratio', 'hits_total', 'misses_total')
+    return metrics
+
+
+def test_threads_record_without_sharing_state_and_render_prometheus_text():
+    metrics = make()
+    labels = (('route', 'list_members'),)
+
+    def work():
+        for value in (0.05, 0.5, 3.0):
+            metrics.inc('requests_total', labels)
+            metrics.observe('latency_seconds', value, labels)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    work()  # a live shard next to the retired ones
+
+    text = metrics.render()
+    assert '# TYPE requests_total counter\nrequests_total{route="list_members"} 15\n' in text
+    assert (
+        'latency_seconds_bucket{route="list_members",le="0.1"} 5\n'
+        'latency_seconds_bucket{route="list_members",le="1"} 10\n'
+        'latency_seconds_bucket{route="list_members",le="+Inf"} 15\n'
+        'latency_seconds_sum{route="list_members"} 17.75\n'
+        'latency_seconds_count{route="list_members"} 15\n'
+    ) in text
+    assert len(metrics._shards) == 1  # exited threads were folded away
+    assert 'requests_total{route="list_members"} 15' in metrics.render()
+
+
+def test_processes_sharing_a_directory_are_summed(tmp_path):
+    first, second = make(str(tmp_path)), make(str(tmp_path))
+    second._started = first._started + 1  # stands in for another worker process
+    for metrics, hits, misses in ((first, 3, 1), (second, 1, 3)):
+        metrics.inc('requests_total', (('route', 'index'),), 2)
+        metrics.inc('hits_total', (('cache', 'catalog'),), hits)
+        metrics.inc('misses_total', (('cache', 'catalog'),), misses)
+        metrics.observe('latency_seconds', 0.2, (('route', 'index'),))
+    second.flush()
+
+    text = first.render()
+    assert 'requests_total{route="index"} 4\n' in text
+    assert 'latency_seconds_count{route="index"} 2\n' in text
+    assert 'hit_ratio{cache="catalog"} 0.5\n' in text
+    assert len(list(tmp_path.glob('metrics-*.json'))) == 2
@@ -0,0 +1,39 @@
+import pytest
+
+from ISO_Standard_DB.pagination import Keyset, encode_cursor
+
+KEYSET = Keyset({
+    'name': [('tm.first_name', 'first_name'), ('tm.mem_id', 'mem_id')],
+    'id': [('tm.mem_id', 'mem_id')],
+}, default_sort='name', default_limit=2)
+
+
+def test_seek_clause_and_next_cursor():
+    """The next page seeks past the last row's sort key, primary key last"""
+    page = KEYSET.parse({})
+    assert KEYSET.seek(page) == ('', [], 'tm.first_name ASC, tm.mem_id ASC')
+
+    rows = [{'first_name': 'Ann', 'mem_id': 4}, {'first_name': 'Bob', 'mem_id': 2}, {'first_name': 'Bob', 'mem_id': 9}]
+    result = KEYSET.page(rows, page)
+    assert [r['mem_id'] for r in result['items']] == [4, 2]
+
+    page = KEYSET.parse({'cursor': result['next_cursor']})
+    assert page.after == ['Bob', 2]
+    where, params, _ = KEYSET.seek(page)
+    assert where == '((tm.first_name > %s) OR (tm.first_name = %s AND tm.mem_id > %s))'
+    assert params == ['Bob', 'Bob', 2]
+
+    assert KEYSET.page(rows[:2], page)['next_cursor'] is None
+
+
+def test_invalid_sort_and_cursor_are_rejected():
+    """Only whitelisted sorts, and cursors from the same sort/order, are accepted"""
+    with pytest.raises(ValueError):
+        KEYSET.parse({'sort': 'email'})
+    with pytest.raises(ValueError):
+        KEYSET.parse({'cursor': 'not-a-cursor'})
+    with pytest.raises(ValueError):
+        KEYSET.parse({'sort': 'id', 'cursor': encode_cursor('name', 'asc', ['Bob', 2])})
+
+    page = KEYSET.parse({'sort': 'id', 'order': 'desc', 'cursor': encode_cursor('id', 'desc', [7])})
+    assert KEYSET.seek(page) == ('((tm.mem_id < %s))', [7], 'tm.mem_id DESC')
@@ -0,0 +1,81 @@
+from ISO_Standard_DB.db_pool import ConnectionPool
+from ISO_Standard_DB.fanout import FanOut, fetchall
+from ISO_Standard_DB.query_stats import QueryStats, RequestTrace, TracedConnection, current, normalize
+
+
+class FakeCursor:
+    rowcount = 3
+
+    def execute(self, sql, params=()):
+        self.sql = sql
+
+    def fetchall(self):
+        return [self.sql]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    in_transaction = False
+
+    def cursor(self, **kwargs):
+        return FakeCursor()
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_normalize_groups_executions_of_one_statement():
+    assert normalize("SELECT *  FROM skills\n WHERE skill_id = %s AND name = 'Java'") == \
+        'SELECT * FROM skills WHERE skill_id = ? AND name = ?'
+    assert normalize('DELETE FROM mem_skills WHERE skill_id IN (%s, %s, %s)') == \
+        normalize('DELETE FROM mem_skills WHERE skill_id IN (%s)') == 'DELETE FROM mem_skills WHERE skill_id IN (...)'
+    assert normalize('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)') == 'INSERT INTO t (a, b) VALUES (...)'
+    assert normalize('SELECT * FROM p_2026') == 'SELECT * FROM p_2026'
+
+
+def test_repeated_statements_are_flagged_per_route():
+    stats = QueryStats(window=10, repeat_threshold=3)
+    cursor = TracedConnection(FakeConnection()).cursor()
+    cursor.execute('SELECT 1')  # outside a request: not recorded
+
+    trace = RequestTrace()
+    token = current.set(trace)
+    try:
+        cursor.execute('SELECT * FROM roles')
+        for skill_id in range(4):
+            cursor.execute('SELECT * FROM skills WHERE skill_id = %s', (skill_id,))
+    finally:
+        current.reset(token)
+
+    assert len(trace.entries) == 5
+    assert trace.server_timing().startswith('db;dur=') and 'desc="5 queries"' in trace.server_timing()
+    flagged = stats.add('view_member', trace, 200)
+    assert list(flagged) == ['SELECT * FROM skills WHERE skill_id = ?']
+    assert flagged['SELECT * FROM skills WHERE skill_id = ?']['sites'] == {
+        f'test_query_stats.py:{test_repeated_statements_are_flagged_per_route.__code__.co_firstlineno + 10} '
+        'test_repeated_statements_are_flagged_per_route'
+    }
+
+    summary = stats.summary()['view_member']
+    assert summary['requests'] == 1 and summary['max_queries'] == 5
+    assert summary['n_plus_one'] == ['SELECT * FROM skills WHERE skill_id = ?']
+    by_sql = {stat['sql']: stat for stat in summary['statements']}
+    assert by_sql['SELECT * FROM skills WHERE skill_id = ?']['rows'] == 12
+    assert by_sql['SELECT * FROM skills WHERE skill_id = ?']['max_per_request'] == 4
+
+
+def test_fan_out_queries_land_in_the_request_trace():
+    pool = ConnectionPool(lambda: TracedConnection(FakeConnection()), size=2, max_overflow=0, timeout=0)
+    fan_out = FanOut(lambda: pool, workers=2)
+    trace = RequestTrace()
+    token = current.set(trace)
+    try:
+        fan_out.run(pool.connect().cursor(), {'a': fetchall('SELECT a'), 'b': fetchall('SELECT b')})
+    finally:
+        current.reset(token)
+    assert sorted(entry[0] for entry in trace.entries) == ['SELECT a', 'SELECT b']
@@ -0,0 +1,61 @@
+import csv
+import io
+
+from ISO_Standard_DB.report_export import heatmap_rows, report_sections, stream_csv
+
+
+class FakeCursor:
+    """Returns canned rows through fetchmany(), like an unbuffered cursor"""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        self.rows = self.results.pop(0)
+
+    def fetchmany(self, size=1):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+
+def member(mem_id, first, role=None, **extra):
+    return dict(mem_id=mem_id, first_name=first, middle_name='', last_name='Test', role_name=role, **extra)
+
+
+def test_heatmap_rows_group_members():
+    """Joined member x skill rows collapse into one row per member, 0 for missing skills"""
+    cursor = FakeCursor([[
+        member(1, 'Asha', 'Intern', skill_id=5, proficiency_level=3),
+        member(1, 'Asha', 'Intern', skill_id=7, proficiency_level=1),
+        member(2, 'Ravi', skill_id=None, proficiency_level=None),
+    ]])
+    rows = list(heatmap_rows(cursor, [{'skill_id': 7}, {'skill_id': 5}]))
+    assert rows == [['Asha Test', 'Intern', 1, 3], ['Ravi Test', 'Unassigned', 0, 0]]
+
+
+def test_csv_export_sections():
+    """Snapshot sections and streamed member rows end up in one CSV"""
+    class Snapshot:
+        payload = {
+            'total_staff': 2, 'compliance_rate': 50, 'critical_gaps': 1, 'skills_at_risk': 0,
+            'risk_report': [],
+            'category_stats': [{'category': 'Technical', 'skill_count': 1, 'members_with_skills': 1,
+                                'level_1': 0, 'level_2': 0, 'level_3': 1}],
+            'top_skills': [{'skill_name': 'Python', 'category': 'Technical', 'member_count': 1, 'avg_proficiency': 3.0}],
+            'heatmap_skills': [{'skill_id': 5, 'skill_name': 'Python'}],
+        }
+
+    cursor = FakeCursor([
+        [member(1, 'Asha', 'Intern', skill_count=1, level_total=3), member(2, 'Ravi', skill_count=0, level_total=0)],
+        [member(1, 'Asha', 'Intern', skill_id=5, proficiency_level=3), member(2, 'Ravi', skill_id=None, proficiency_level=None)],
+    ])
+    text = ''.join(stream_csv(report_sections(Snapshot, cursor), '2024-01-01 00:00:00'))
+    rows = list(csv.reader(io.StringIO(text)))
+
+    assert ['Compliance Rate', '50%'] in rows
+    assert ['1', 'Python', 'Technical', '1', '3.0'] in rows
+    start = rows.index(['TEAM MEMBER SKILLS STATISTICS'])
+    assert rows[start + 2:start + 4] == [['Asha Test', 'Intern', '1', '3.0'], ['Ravi Test', 'Unassigned', '0', '0']]
+    start = rows.index(['MASTER COMPETENCY MATRIX'])
+    assert rows[start + 1:start + 4] == [['Employee', 'Role', 'Python'], ['Asha Test', 'Intern', '3'], ['Ravi Test', 'Unassigned', '0']]
@@ -0,0 +1,72 @@
+import threading
+import time
+
+from ISO_Standard_DB.report_snapshots import ReportSnapshotService
+
+
+class FakeReports:
+    """A report loader and an audit log_id marker"""
+
+    def __init__(self):
+        self.log_id = 1
+        self.builds = 0
+        self.release = None  # an Event holds the next build until it is set
+        self.building = threading.Event()
+
+    def build(self):
+        self.builds += 1
+        self.building.set()
+        if self.release is not None:
+            self.release.wait(5)
+        return {'builds': self.builds}
+
+    def marker(self):
+        return self.log_id
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def test_rebuilds_when_the_audit_log_moves():
+    reports = FakeReports()
+    service = ReportSnapshotService(reports.build, reports.marker, interval=300, poll=0.01)
+    first = service.get()
+    assert (first.version, first.marker, first.payload) == (1, 1, {'builds': 1})
+
+    time.sleep(0.05)
+    assert service.get() is first  # nothing changed, nothing rebuilt
+
+    reports.log_id = 2
+    wait_for(lambda: service.get().version == 2)
+    assert service.get().marker == 2
+    assert [entry['version'] for entry in service.history()] == [1, 2]
+
+
+def test_rebuilds_once_the_interval_has_passed():
+    reports = FakeReports()
+    service = ReportSnapshotService(reports.build, reports.marker, interval=0.05, poll=0.01)
+    assert service.get().version == 1
+    wait_for(lambda: service.get().version >= 2)
+    assert reports.log_id == 1
+
+
+def test_get_serves_the_previous_snapshot_during_a_rebuild():
+    reports = FakeReports()
+    service = ReportSnapshotService(reports.build, reports.marker, interval=300, poll=0.01)
+    first = service.get()
+
+    reports.building.clear()
+    reports.release = threading.Event()
+    reports.log_id = 2
+    assert reports.building.wait(5)
+
+    started = time.monotonic()
+    assert service.get() is first
+    assert time.monotonic() - started < 1
+
+    reports.release.set()
+    wait_for(lambda: service.get().version == 2)
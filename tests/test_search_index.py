@@ -0,0 +1,55 @@
+from ISO_Standard_DB.search_index import SearchIndex
+
+
+class FakeState:
+    """Just the parts of AnalyticsState the index reads"""
+
+    loaded = True
+
+    def __init__(self):
+        self.skills = {1: {'skill_name': 'Python', 'category': 'Technical'},
+                       2: {'skill_name': 'Phlebotomy', 'category': 'Clinical'}}
+        self.roles = {1: {'role_name': 'Clinical Research Associate'}}
+        self.members = {
+            7: {'first_name': 'Asha', 'middle_name': '', 'last_name': 'Rao',
+                'email': 'asha.rao@gmail.com', 'phone_no': '9876543210'},
+            8: {'first_name': 'Ravi', 'middle_name': None, 'last_name': 'Ashton',
+                'email': 'ravi.i@gmail.com', 'phone_no': '1234567890'},
+        }
+        self.listeners = []
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def emit(self, *event):
+        for listener in self.listeners:
+            listener(*event)
+
+
+def found(index, query, **kwargs):
+    return [(r['type'], r['id']) for r in index.search(query, **kwargs)]
+
+
+def test_ranked_typed_results():
+    index = SearchIndex(FakeState())
+    # A field starting with the word beats a later word starting with it
+    assert found(index, 'asha') == [('member', 7), ('member', 8)]
+    assert found(index, 'p') == [('skill', 1), ('skill', 2)]
+    assert found(index, 'p', kinds=['member']) == []
+    assert found(index, 'rao asha') == [('member', 7)]
+    assert found(index, 'clin') == [('role', 1)]
+    assert found(index, '6543') == [('member', 7)]      # inside a phone number
+    assert found(index, 'pythen') == [('skill', 1)]     # typo, by shared trigrams
+    assert found(index, 'gmail') == []                  # the domain is not indexed
+
+
+def test_index_follows_deltas():
+    state = FakeState()
+    index = SearchIndex(state)
+    state.emit('member', 8, {'first_name': 'Ravi', 'middle_name': '', 'last_name': 'Iyer',
+                             'email': 'ravi.iyer@gmail.com', 'phone_no': '1234567890'})
+    assert found(index, 'iyer') == [('member', 8)]
+    assert found(index, 'ashton') == []
+    state.emit('skill_deleted', 1)
+    assert found(index, 'python') == []
+    assert index.search('ravi')[0]['label'] == 'Ravi Iyer'
@@ -0,0 +1,152 @@
+import json
+import time
+
+from ISO_Standard_DB.query_stats import TracedConnection
+from ISO_Standard_DB.slow_queries import PlanBaselines, SlowQueryLog, fingerprint, plan_shape
+
+
+def explain_document(access_type, key, cost):
+    return {
+        'query_block': {
+            'select_id': 1,
+            'cost_info': {'query_cost': str(cost)},
+            'ordering_operation': {
+                'using_filesort': True,
+                'table': {
+                    'table_name': 'team_members',
+                    'access_type': access_type,
+                    'key': key,
+                    'rows_examined_per_scan': 1000,
+                },
+            },
+        }
+    }
+
+
+class ExplainCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql, params=None):
+        self.connection.statements.append((sql, params))
+
+    def fetchone(self):
+        return (json.dumps(self.connection.plan),)
+
+    def close(self):
+        pass
+
+
+class ExplainConnection:
+    def __init__(self, plan):
+        self.plan = plan
+        self.statements = []
+
+    def cursor(self):
+        return ExplainCursor(self)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SlowCursor:
+    rowcount = 1
+
+    def execute(self, sql, params=()):
+        time.sleep(0.002)
+
+
+class SlowConnection:
+    def cursor(self, **kwargs):
+        return SlowCursor()
+
+
+def test_plan_shape_and_fingerprint_ignore_row_estimates():
+    shape = plan_shape(explain_document('ALL', None, 120.5))
+    assert shape == [
+        {'table': None, 'using_filesort': True},
+        {'table': 'team_members', 'access_type': 'ALL', 'key': None, 'rows': 1000},
+    ]
+    grown = explain_document('ALL', None, 900)
+    grown['query_block']['ordering_operation']['table']['rows_examined_per_scan'] = 50000
+    assert fingerprint(plan_shape(grown)) == fingerprint(shape)
+    assert fingerprint(plan_shape(explain_document('ref', 'idx_name', 3))) != fingerprint(shape)
+
+
+def test_traced_cursor_hands_slow_statements_over_outside_requests():
+    log = SlowQueryLog(lambda: None, threshold=0.001)
+    log._start_worker = lambda: None  # keep the statement queued
+    cursor = TracedConnection(SlowConnection(), log).cursor(dictionary=True)
+    cursor.execute('SELECT * FROM team_members WHERE email = %s', ('a@gmail.com',))
+
+    entry, = log.entries()
+    assert entry['sql'] == 'SELECT * FROM team_members WHERE email = %s'
+    assert entry['params'] == ['a@gmail.com']
+    assert entry['normalized'] == 'SELECT * FROM team_members WHERE email = ?'
+    assert entry['site'].startswith('test_slow_queries.py:')
+    assert entry['plan'] == {'status': 'pending'}
+    assert log.stats()['queued'] == 1
+
+    entry = log.capture('Get_Member_Profile', ('a@gmail.com',), 0.5, kind='callproc')
+    assert entry['sql'] == 'CALL Get_Member_Profile(%s)'
+    assert entry['plan'] == {'status': 'not explainable'}
+
+
+def test_plan_changes_against_the_previous_release_are_flagged(tmp_path):
+    path = str(tmp_path / 'baselines.json')
+    sql = 'SELECT * FROM team_members WHERE name = %s ORDER BY name'
+    connection = ExplainConnection(explain_document('ref', 'idx_name', 5))
+    before = SlowQueryLog(lambda: connection, baselines=PlanBaselines(path), release='v1', baseline_params=True)
+    plan = before.explain(sql, ('Ada',))
+    assert plan['regression'] is None
+    assert connection.statements == [('EXPLAIN FORMAT=JSON ' + sql, ('Ada',))]
+
+    # Next deploy: the index is gone, the same statement scans the table
+    connection.plan = explain_document('ALL', None, 240)
+    after = SlowQueryLog(lambda: connection, baselines=PlanBaselines(path), release='v2', baseline_params=True)
+    plan = after.explain(sql, ('Bob',))
+    assert plan['regression']['kind'] == 'plan+cost'
+    assert plan['regression']['baseline_release'] == 'v1'
+    assert list(after.regressions()) == ['SELECT * FROM team_members WHERE name = ? ORDER BY name']
+    # Explained once per interval: a repeat reuses the plan
+    assert after.explain(sql, ('Cid',)) is plan
+
+    # Statements without a baseline are new in this release
+    assert after.explain('SELECT * FROM skills WHERE skill_name = %s', ('Java',))['regression'] == \
+        {'kind': 'new', 'since': 'v2'}
+
+    # Accepting the new plans clears the flags, in other processes too
+    other = SlowQueryLog(lambda: connection, baselines=PlanBaselines(path), release='v2', baseline_params=True)
+    assert other.rebaseline() == (2, 0, [])
+    assert after.regressions() == {}
+    assert PlanBaselines(path).get('SELECT * FROM team_members WHERE name = ? ORDER BY name')['cost'] == 240
+
+
+def test_baselines_keep_no_parameters_by_default(tmp_path):
+    """Bound values stay out of the baselines file; a re-baseline then accepts the next plan"""
+    path = str(tmp_path / 'baselines.json')
+    sql = 'SELECT * FROM team_members WHERE email = %s ORDER BY name'
+    normalized = 'SELECT * FROM team_members WHERE email = ? ORDER BY name'
+    connection = ExplainConnection(explain_document('ref', 'idx_email', 5))
+    SlowQueryLog(lambda: connection, baselines=PlanBaselines(path), release='v1').explain(sql, ('ada@gmail.com',))
+    with open(path) as f:
+        assert 'ada@gmail.com' not in f.read()
+
+    connection.plan = explain_document('ALL', None, 240)
+    after = SlowQueryLog(lambda: connection, baselines=PlanBaselines(path), release='v2')
+    assert after.explain(sql, ('bob@gmail.com',))['regression']['kind'] == 'plan+cost'
+
+    explained = len(connection.statements)
+    assert SlowQueryLog(lambda: connection, baselines=PlanBaselines(path), release='v2').rebaseline() == (0, 1, [])
+    assert len(connection.statements) == explained  # nothing to explain it with
+    assert after.regressions() == {}
+
+    # The next plan seen becomes the baseline, without being flagged as new
+    fresh = SlowQueryLog(lambda: connection, baselines=PlanBaselines(path), release='v2')
+    assert fresh.explain(sql, ('cid@gmail.com',))['regression'] is None
+    assert PlanBaselines(path).get(normalized)['cost'] == 240
+    with open(path) as f:
+        assert 'gmail.com' not in f.read()
@@ -0,0 +1,26 @@
+import numpy as np
+
+from ISO_Standard_DB.staffing import best_covers, plan
+
+
+def test_exact_cover_beats_greedy():
+    """Greedy takes the widest mask first (3 members); the exact search finds 2"""
+    masks = [0b001111, 0b010011, 0b101100, 0b010000, 0b100000]
+    teams, exact = best_covers(masks, [0, 0, 0, 0, 1], 0b111111, alternatives=2)
+    assert exact
+    assert teams == [[1, 2], [0, 2, 3]]
+
+
+def test_plan_groups_members_and_reports_uncovered_needs():
+    mem_ids = np.array([1, 2, 3, 4, 5])
+    masks = np.array([0b011, 0b011, 0b001, 0b010, 0], dtype=np.uint64)
+    loads = np.array([4.0, 1.0, 0.0, 0.0, 0.0])
+
+    result = plan(mem_ids, masks, loads, 0b111)
+    assert result['exact'] and result['uncovered'] == 0b100
+    best = result['teams'][0]
+    # Members 1 and 2 cover the same needs; the less loaded one is picked
+    assert [(m['mem_id'], m['alternates']) for m in best] == [(2, [1])]
+
+    by_load = plan(mem_ids, masks, loads, 0b011, objective='load')
+    assert sorted(m['mem_id'] for m in by_load['teams'][0]) == [3, 4]